@@ -0,0 +1,130 @@
+'''chapter2搜索算法的基准测试。
+用固定的随机种子生成不同大小、不同障碍密度的迷宫，
+分别跑dfs、bfs和两种启发函数的astar，记录耗时、展开的节点数、
+内存峰值和路径长度，结果按行写成JSON，方便和以前的结果对比。
+
+用法示例：
+    python benchmark.py --sizes 10 64 256 --sparseness 0.1 0.2 --output results.jsonl
+'''
+import argparse
+import json
+import platform
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional
+
+from generic_search import astar, bfs, dfs, node_to_path
+from maze import Maze, MazeLocation, euclidean_distance, manhattan_distance
+from compact_maze import CompactMaze
+
+DEFAULT_SIZES: List[int] = [10, 64, 256, 1024, 4096]
+DEFAULT_SPARSENESS: List[float] = [0.1, 0.2, 0.3]
+ALGORITHMS: List[str] = ['dfs', 'bfs', 'astar-euclidean', 'astar-manhattan']
+BACKENDS = {'maze': Maze, 'compact': CompactMaze}
+
+
+def generate_maze(size: int, sparseness: float, seed: int, backend: str = 'maze') -> Maze:
+    '''同样的参数总是生成同样的迷宫'''
+    random.seed(f'{seed}-{size}-{sparseness}')
+    return BACKENDS[backend](size, size, sparseness, MazeLocation(0, 0),
+                             MazeLocation(size - 1, size - 1))
+
+
+def run_search(algorithm: str, maze: Maze) -> Dict:
+    '''跑一次搜索，返回展开的节点数和路径长度'''
+    expanded: int = 0
+
+    # 每个展开的节点都会做一次目标检测，数这个就行，
+    # 这样找不到路径时也有展开的节点数
+    def goal_test(ml: MazeLocation) -> bool:
+        nonlocal expanded
+        expanded += 1
+        return maze.goal_test(ml)
+
+    if algorithm == 'dfs':
+        node = dfs(maze.start, goal_test, maze.successors)
+    elif algorithm == 'bfs':
+        node = bfs(maze.start, goal_test, maze.successors)
+    else:
+        heuristic: Callable[[MazeLocation], float] = \
+            euclidean_distance(maze.goal) if algorithm == 'astar-euclidean' \
+            else manhattan_distance(maze.goal)
+        result = astar(maze.start, goal_test, maze.successors, heuristic)
+        node = result[0] if result is not None else None
+    return {'found': node is not None,
+            'nodes_expanded': expanded,
+            'path_length': len(node_to_path(node)) if node is not None else None}
+
+
+def measure(algorithm: str, maze: Maze, memory: bool) -> Dict:
+    begin: float = perf_counter()
+    record: Dict = run_search(algorithm, maze)
+    record['seconds'] = perf_counter() - begin
+    record['peak_bytes'] = None
+    if memory:
+        # tracemalloc会拖慢速度，所以单独再跑一遍来量内存
+        tracemalloc.start()
+        run_search(algorithm, maze)
+        record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return record
+
+
+def run_benchmarks(sizes: List[int], sparseness_values: List[float],
+                   algorithms: List[str], seed: int = 0, repeat: int = 1,
+                   memory: bool = True, backend: str = 'maze') -> Iterator[Dict]:
+    for size in sizes:
+        for sparseness in sparseness_values:
+            maze: Maze = generate_maze(size, sparseness, seed, backend)
+            for algorithm in algorithms:
+                for run in range(repeat):
+                    record: Dict = {'size': size, 'sparseness': sparseness,
+                                    'seed': seed, 'backend': backend,
+                                    'algorithm': algorithm, 'run': run}
+                    record.update(measure(algorithm, maze, memory))
+                    yield record
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark chapter2 search algorithms.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--sparseness', type=float, nargs='+', default=DEFAULT_SPARSENESS)
+    parser.add_argument('--algorithms', nargs='+', choices=ALGORITHMS, default=ALGORITHMS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='maze')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the extra tracemalloc run')
+    parser.add_argument('--output', help='write JSON lines to this file')
+    args = parser.parse_args(argv)
+
+    environment: Dict = {'python': platform.python_version(),
+                         'implementation': platform.python_implementation(),
+                         'machine': platform.machine()}
+    output = open(args.output, 'w') if args.output else None
+    try:
+        print(f'{"size":>6} {"sparse":>6} {"algorithm":<16} {"found":>5} '
+              f'{"expanded":>10} {"path":>7} {"seconds":>9} {"peak MB":>9}')
+        for record in run_benchmarks(args.sizes, args.sparseness, args.algorithms,
+                                     args.seed, args.repeat, not args.no_memory,
+                                     args.backend):
+            record.update(environment)
+            if output is not None:
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+            peak: str = f'{record["peak_bytes"] / 2**20:.1f}' \
+                if record['peak_bytes'] is not None else '-'
+            print(f'{record["size"]:>6} {record["sparseness"]:>6} '
+                  f'{record["algorithm"]:<16} {str(record["found"]):>5} '
+                  f'{str(record["nodes_expanded"]):>10} {str(record["path_length"]):>7} '
+                  f'{record["seconds"]:>9.3f} {peak:>9}')
+            sys.stdout.flush()
+    finally:
+        if output is not None:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
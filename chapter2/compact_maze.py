@@ -0,0 +1,105 @@
+import random
+from typing import List
+
+from maze import Maze, MazeLocation, Cell
+
+# 每种格子对应的字节
+EMPTY: int = ord(Cell.EMPTY.value)
+BLOCKED: int = ord(Cell.BLOCKED.value)
+START: int = ord(Cell.START.value)
+GOAL: int = ord(Cell.GOAL.value)
+PATH: int = ord(Cell.PATH.value)
+
+# 把格子的字节翻译成能不能走
+_OPEN_TABLE: bytes = bytes(0 if b == BLOCKED else 1 for b in range(256))
+
+
+class CompactMaze(Maze):
+    '''格子存在一个bytearray里的迷宫，每个格子一个字节，内容就是Cell的字符。
+    随机生成、open_rows和打印整块交给bytes的C实现去做，适合批量生成大迷宫。
+    mark和clear的路径是任意的一串格子，bytearray没有按下标列表赋值的操作，
+    还是逐个格子设置，不过路径的长度比格子数少得多。
+    对外的接口和Maze一样，Maze本身还是用Cell的列表，同样的随机种子生成同样的迷宫'''
+
+    def __init__(self, rows=10, columns=10, sparseness=0.2,
+                 start=MazeLocation(0,0), goal=MazeLocation(9,9)):
+        self._rows = rows
+        self._columns = columns
+        self.start = start
+        self.goal = goal
+        self._randomly_fill(rows, columns, sparseness)
+        self._cells[self._index(start)] = START
+        self._cells[self._index(goal)] = GOAL
+
+    @classmethod
+    def from_maze(cls, maze: Maze) -> 'CompactMaze':
+        '''把普通的迷宫转换成紧凑的迷宫，格子内容不变'''
+        compact = cls.__new__(cls)
+        compact._rows = maze._rows
+        compact._columns = maze._columns
+        compact.start = maze.start
+        compact.goal = maze.goal
+        compact._cells = bytearray(str(maze).replace('\n', ''), 'ascii')
+        return compact
+
+    def _index(self, ml: MazeLocation) -> int:
+        return ml.row * self._columns + ml.column
+
+    def _randomly_fill(self, rows, columns, sparseness):
+        # 一次生成所有格子的随机字节，再用翻译表把小于阈值的字节变成障碍
+        # 概率的精度是1/256
+        threshold: int = round(sparseness * 256)
+        table: bytes = bytes(BLOCKED if b < threshold else EMPTY for b in range(256))
+        self._cells: bytearray = bytearray(random.randbytes(rows * columns).translate(table))
+
+    def successors(self, ml: MazeLocation) -> List[MazeLocation]:
+        cells: bytearray = self._cells
+        index: int = ml.row * self._columns + ml.column
+        locations: List[MazeLocation] = []
+        if ml.row + 1 < self._rows and cells[index + self._columns] != BLOCKED:
+            locations.append(MazeLocation(ml.row + 1, ml.column))
+        if ml.row - 1 >= 0 and cells[index - self._columns] != BLOCKED:
+            locations.append(MazeLocation(ml.row - 1, ml.column))
+        if ml.column + 1 < self._columns and cells[index + 1] != BLOCKED:
+            locations.append(MazeLocation(ml.row, ml.column + 1))
+        if ml.column - 1 >= 0 and cells[index - 1] != BLOCKED:
+            locations.append(MazeLocation(ml.row, ml.column - 1))
+        return locations
+
+    def set_cell(self, ml: MazeLocation, cell: Cell) -> None:
+        self._cells[self._index(ml)] = ord(cell.value)
+
+    def _fill(self, path: List[MazeLocation], value: int) -> None:
+        cells: bytearray = self._cells
+        columns: int = self._columns
+        for row, column in path:
+            cells[row * columns + column] = value
+        cells[self._index(self.start)] = START
+        cells[self._index(self.goal)] = GOAL
+
+    def mark(self, path):
+        self._fill(path, PATH)
+
+    def clear(self, path):
+        self._fill(path, EMPTY)
+
+    def open_rows(self) -> List[bytes]:
+        mask: bytes = self._cells.translate(_OPEN_TABLE)
+        columns: int = self._columns
+        return [mask[r * columns:(r + 1) * columns] for r in range(self._rows)]
+
+    def __str__(self):
+        columns: int = self._columns
+        rows = (self._cells[r * columns:(r + 1) * columns] for r in range(self._rows))
+        return (b'\n'.join(rows) + b'\n').decode('ascii')
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+    for size in (1000, 4000):
+        begin: float = perf_counter()
+        Maze(size, size, 0.2, MazeLocation(0, 0), MazeLocation(size - 1, size - 1))
+        middle: float = perf_counter()
+        CompactMaze(size, size, 0.2, MazeLocation(0, 0), MazeLocation(size - 1, size - 1))
+        end: float = perf_counter()
+        print(f'{size}x{size}: Maze {middle - begin:.2f}s, CompactMaze {end - middle:.2f}s')
@@ -1,7 +1,8 @@
 from __future__ import annotations
 from typing import TypeVar, Iterable, Sequence, Generic, List, Callable, Set,\
-Deque, Dict, Any, Optional,Protocol
+Deque, Dict, Any, Optional, Protocol, Tuple, Iterator
 from heapq import heappush, heappop
+from array import array
 
 # 它表示任何类型都可以
 T = TypeVar('T')
@@ -63,6 +64,9 @@ class Stack:
         return repr(self._container)
 
 class Node(Generic[T]):
+    # 用__slots__省掉每个节点的__dict__，大规模搜索时能省下不少内存
+    __slots__ = ('state', 'parent', 'cost', 'heuristic')
+
     # Optional的意思是说这个参数可能是None
     def __init__(self,state:T,parent:Optional[Node],cost:float=0.0,
                  heuristic:float=0.0)->None:
@@ -74,7 +78,12 @@ class Node(Generic[T]):
     
     def __lt__(self,other:Node)->bool:
         '''为了使用小顶堆，必须实现小于的比较'''
-        return (self.cost + self.heuristic)<(other.cost + self.heuristic)
+        f_self: float = self.cost + self.heuristic
+        f_other: float = other.cost + other.heuristic
+        if f_self != f_other:
+            return f_self < f_other
+        # f一样的时候，优先展开g更大（也就是h更小）的，它离终点更近
+        return self.cost > other.cost
 
 
 def dfs(initial:T,goal_test:Callable[[T],bool],successors:Callable[[T],List[T]])->Optional[Node[T]]:
@@ -106,6 +115,9 @@ def dfs(initial:T,goal_test:Callable[[T],bool],successors:Callable[[T],List[T]])
     return None
         
 def node_to_path(node:Node[T])->List[T]:
+    # 紧凑搜索返回的是路径句柄，它自己知道怎么还原路径
+    if isinstance(node, PathHandle):
+        return node.to_path()
     path:List[T] = [node.state]
     # 从后往前遍历
     while node.parent is not None:
@@ -178,17 +190,566 @@ def astar(initial,goal_test,successors,heuristic):
     frontier = PriorityQueue()
     # 把起点装进去
     frontier.push(Node(initial,None,0.0,heuristic(initial)))
+    # 每个状态目前已知的最小代价
     explored = {initial:0.0}
+    # 已经展开过的状态
+    closed = set()
+    # 展开过的节点数
     count = 0
     while not frontier.empty:
         current_node = frontier.pop()
         current_state = current_node.state
+        # 堆里不做decrease-key，同一个状态可能有好几个条目，
+        # 已经展开过的或者后来找到了更短路径的都是过期条目，直接跳过
+        if current_state in closed or current_node.cost > explored[current_state]:
+            continue
+        closed.add(current_state)
         count += 1
         if goal_test(current_state):
             return current_node,count
+        new_cost = current_node.cost + 1
         for child in successors(current_state):
-            new_cost = current_node.cost + 1
             if child not in explored or explored[child]>new_cost:
                 explored[child] = new_cost
+                # 启发函数不一致时可能找到已展开状态的更短路径，要重新打开
+                closed.discard(child)
                 frontier.push(Node(child,current_node,new_cost,heuristic(child)))
     return None
+
+
+# 下面是紧凑模式的搜索
+# 每个状态第一次被发现时分配一个整数id，父节点和代价都存在array里，
+# 不再为每个状态创建一个Node对象
+NO_PARENT = -1
+
+
+class PathHandle(Generic[T]):
+    '''紧凑搜索的结果，只保存状态表和父节点id数组，需要时再还原路径'''
+    __slots__ = ('_states', '_parents', '_costs', 'index')
+
+    def __init__(self, states: List[T], parents: array,
+                 costs: Optional[array], index: int) -> None:
+        self._states: List[T] = states
+        self._parents: array = parents
+        self._costs: Optional[array] = costs
+        # 终点的id
+        self.index: int = index
+
+    @property
+    def state(self) -> T:
+        return self._states[self.index]
+
+    @property
+    def cost(self) -> float:
+        # dfs和bfs不记录代价，每走一步算1
+        if self._costs is None:
+            return float(len(self.to_path()) - 1)
+        return self._costs[self.index]
+
+    @property
+    def explored_count(self) -> int:
+        '''搜索过程中一共发现了多少个状态'''
+        return len(self._states)
+
+    def to_path(self) -> List[T]:
+        path: List[T] = []
+        index: int = self.index
+        # 顺着父节点id往回走
+        while index != NO_PARENT:
+            path.append(self._states[index])
+            index = self._parents[index]
+        path.reverse()
+        return path
+
+
+def compact_dfs(initial: T, goal_test: Callable[[T], bool],
+                successors: Callable[[T], List[T]]) -> Optional[PathHandle[T]]:
+    '''和dfs一样，但是栈里只放整数id'''
+    # 状态到id的映射，同时充当explored集合
+    ids: Dict[T, int] = {initial: 0}
+    states: List[T] = [initial]
+    parents: array = array('l', [NO_PARENT])
+    frontier: array = array('l', [0])
+
+    while frontier:
+        current: int = frontier.pop()
+        current_state: T = states[current]
+        if goal_test(current_state):
+            return PathHandle(states, parents, None, current)
+        for child in successors(current_state):
+            if child in ids:
+                continue
+            child_id: int = len(states)
+            ids[child] = child_id
+            states.append(child)
+            parents.append(current)
+            frontier.append(child_id)
+    return None
+
+
+def compact_bfs(initial: T, goal_test: Callable[[T], bool],
+                successors: Callable[[T], List[T]]) -> Optional[PathHandle[T]]:
+    '''和bfs一样，但是不需要单独的队列'''
+    ids: Dict[T, int] = {initial: 0}
+    states: List[T] = [initial]
+    parents: array = array('l', [NO_PARENT])
+    # 广度优先时状态被发现的顺序就是出队的顺序，
+    # 所以id本身就是队列，只要记住队头在哪里
+    head: int = 0
+
+    while head < len(states):
+        current_state: T = states[head]
+        if goal_test(current_state):
+            return PathHandle(states, parents, None, head)
+        for child in successors(current_state):
+            if child in ids:
+                continue
+            ids[child] = len(states)
+            states.append(child)
+            parents.append(head)
+        head += 1
+    return None
+
+
+def compact_astar(initial: T, goal_test: Callable[[T], bool],
+                  successors: Callable[[T], List[T]],
+                  heuristic: Callable[[T], float]) -> Optional[Tuple[PathHandle[T], int]]:
+    '''和astar一样，堆里放的是(f, -g, id)元组，代价存在array里'''
+    ids: Dict[T, int] = {initial: 0}
+    states: List[T] = [initial]
+    parents: array = array('l', [NO_PARENT])
+    costs: array = array('d', [0.0])
+    # 1表示已经展开过
+    closed: bytearray = bytearray(1)
+    # 第二项是-g，f一样时g大的先出堆
+    frontier: List[Tuple[float, float, int]] = [(heuristic(initial), -0.0, 0)]
+    count: int = 0
+
+    while frontier:
+        _, neg_cost, current = heappop(frontier)
+        # 过期条目
+        if closed[current] or -neg_cost > costs[current]:
+            continue
+        closed[current] = 1
+        current_state: T = states[current]
+        count += 1
+        if goal_test(current_state):
+            return PathHandle(states, parents, costs, current), count
+        new_cost: float = costs[current] + 1
+        for child in successors(current_state):
+            child_id: Optional[int] = ids.get(child)
+            if child_id is None:
+                child_id = len(states)
+                ids[child] = child_id
+                states.append(child)
+                parents.append(current)
+                costs.append(new_cost)
+                closed.append(0)
+            elif costs[child_id] > new_cost:
+                parents[child_id] = current
+                costs[child_id] = new_cost
+                closed[child_id] = 0
+            else:
+                continue
+            heappush(frontier, (new_cost + heuristic(child), -new_cost, child_id))
+    return None
+
+
+def _path_to_node(path: List[T]) -> Node[T]:
+    '''把状态列表串成Node链表，这样node_to_path还能照常使用'''
+    node: Optional[Node[T]] = None
+    for cost, state in enumerate(path):
+        node = Node(state, node, float(cost))
+    return node
+
+
+def _join_paths(meet: T, forward_parents: Dict[T, Optional[T]],
+                backward_parents: Dict[T, Optional[T]]) -> List[T]:
+    '''两边的搜索在meet相遇，把两半路径拼起来'''
+    path: List[T] = []
+    state: Optional[T] = meet
+    while state is not None:
+        path.append(state)
+        state = forward_parents[state]
+    path.reverse()
+    state = backward_parents[meet]
+    while state is not None:
+        path.append(state)
+        state = backward_parents[state]
+    return path
+
+
+def bidirectional_bfs(initial: T, goal: T, successors: Callable[[T], List[T]],
+                      predecessors: Optional[Callable[[T], List[T]]] = None) -> Optional[Node[T]]:
+    '''从起点和终点同时做广度优先搜索，在中间相遇。
+    predecessors默认和successors一样，也就是无向图'''
+    if initial == goal:
+        return Node(initial, None)
+    if predecessors is None:
+        predecessors = successors
+    # 两个方向各自的父节点和层数
+    parents: List[Dict[T, Optional[T]]] = [{initial: None}, {goal: None}]
+    depths: List[Dict[T, int]] = [{initial: 0}, {goal: 0}]
+    frontiers: List[List[T]] = [[initial], [goal]]
+    expanders = [successors, predecessors]
+
+    while frontiers[0] and frontiers[1]:
+        # 每次扩展小的那一边的一整层
+        side: int = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        other: int = 1 - side
+        best: Optional[T] = None
+        best_length: int = 0
+        next_frontier: List[T] = []
+        for state in frontiers[side]:
+            depth: int = depths[side][state] + 1
+            for child in expanders[side](state):
+                if child in depths[side]:
+                    continue
+                parents[side][child] = state
+                depths[side][child] = depth
+                next_frontier.append(child)
+                # 碰到了另一边已经发现的状态，记下最短的那个
+                if child in depths[other]:
+                    length: int = depth + depths[other][child]
+                    if best is None or length < best_length:
+                        best, best_length = child, length
+        # 这一层扩展完才返回，保证路径最短
+        if best is not None:
+            return _path_to_node(_join_paths(best, parents[0], parents[1]))
+        frontiers[side] = next_frontier
+    return None
+
+
+def bidirectional_astar(initial: T, goal: T, successors: Callable[[T], List[T]],
+                        heuristic: Callable[[T], float],
+                        reverse_heuristic: Callable[[T], float],
+                        predecessors: Optional[Callable[[T], List[T]]] = None) -> Optional[Tuple[Node[T], int]]:
+    '''双向A*，heuristic估计到终点的距离，reverse_heuristic估计到起点的距离。
+    两个启发函数都要是一致的，每一步代价是1'''
+    if initial == goal:
+        return Node(initial, None), 0
+    if predecessors is None:
+        predecessors = successors
+    expanders = [successors, predecessors]
+    heuristics = [heuristic, reverse_heuristic]
+    costs: List[Dict[T, float]] = [{initial: 0.0}, {goal: 0.0}]
+    parents: List[Dict[T, Optional[T]]] = [{initial: None}, {goal: None}]
+    closed: List[Set[T]] = [set(), set()]
+    # 状态本身不一定能比较大小，所以加一个序号
+    sequence: int = 0
+    frontiers: List[List[Tuple[float, float, int, T]]] = [
+        [(heuristic(initial), -0.0, 0, initial)],
+        [(reverse_heuristic(goal), -0.0, 1, goal)]]
+    # 目前找到的最短路径长度和相遇点
+    best: float = float('inf')
+    meet: Optional[T] = None
+    count: int = 0
+
+    while True:
+        # 先扔掉两个堆顶的过期条目
+        for side in (0, 1):
+            frontier = frontiers[side]
+            while frontier and (frontier[0][3] in closed[side] or
+                                -frontier[0][1] > costs[side][frontier[0][3]]):
+                heappop(frontier)
+        if not frontiers[0] or not frontiers[1]:
+            break
+        # 任何一边的最小f都是剩下路径长度的下界
+        if max(frontiers[0][0][0], frontiers[1][0][0]) >= best:
+            break
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        other = 1 - side
+        _, neg_cost, _, state = heappop(frontiers[side])
+        closed[side].add(state)
+        count += 1
+        new_cost: float = -neg_cost + 1
+        for child in expanders[side](state):
+            if child not in costs[side] or costs[side][child] > new_cost:
+                costs[side][child] = new_cost
+                parents[side][child] = state
+                closed[side].discard(child)
+                sequence += 1
+                heappush(frontiers[side], (new_cost + heuristics[side](child),
+                                           -new_cost, sequence, child))
+            if child in costs[other] and costs[side][child] + costs[other][child] < best:
+                best = costs[side][child] + costs[other][child]
+                meet = child
+
+    if meet is None:
+        return None
+    return _path_to_node(_join_paths(meet, parents[0], parents[1])), count
+
+
+def ida_star(initial: T, goal_test: Callable[[T], bool],
+             successors: Callable[[T], List[T]],
+             heuristic: Callable[[T], float],
+             table_size: int = 100000) -> Optional[Tuple[Node[T], int]]:
+    '''迭代加深A*。每一轮做一次受f上限限制的深度优先搜索，
+    除了当前这条路径，只用一个最多table_size个状态的置换表记住每个状态见过的最小代价，
+    内存有上限，代价是反复展开'''
+    bound: float = heuristic(initial)
+    count: int = 0
+    # 置换表：状态 -> (到达它的最小代价, 这个代价是第几轮记下的)
+    # 以更大的代价再次到达的状态，下面的搜索已经被更好的那条路径覆盖了，直接剪掉；
+    # 同一轮里以同样的代价再次到达也剪掉，新的一轮上限变大了，要重新展开
+    table: Dict[T, Tuple[float, int]] = {initial: (0.0, 0)}
+    iteration: int = 0
+    while True:
+        iteration += 1
+        table[initial] = (0.0, iteration)
+        root: Node[T] = Node(initial, None, 0.0, heuristic(initial))
+        # 用显式的栈代替递归，路径很长也不会超过递归深度
+        stack: List[Tuple[Node[T], Iterator[T]]] = []
+        # 当前路径上的状态，用来避免绕圈
+        on_path: Set[T] = {initial}
+        # 这一轮被剪掉的节点里最小的f，就是下一轮的上限
+        next_bound: float = float('inf')
+        if goal_test(initial):
+            return root, count
+        count += 1
+        stack.append((root, iter(successors(initial))))
+        while stack:
+            node, children = stack[-1]
+            child: Optional[T] = next(children, None)
+            if child is None:
+                stack.pop()
+                on_path.discard(node.state)
+                continue
+            if child in on_path:
+                continue
+            child_cost: float = node.cost + 1
+            seen: Optional[Tuple[float, int]] = table.get(child)
+            if seen is not None and (seen[0] < child_cost or
+                                     (seen[0] == child_cost and seen[1] == iteration)):
+                continue
+            child_node: Node[T] = Node(child, node, child_cost, heuristic(child))
+            f: float = child_node.cost + child_node.heuristic
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+            if goal_test(child):
+                return child_node, count
+            # 表满了就不再记新的状态，已经记下的还会更新
+            if seen is not None or len(table) < table_size:
+                table[child] = (child_cost, iteration)
+            count += 1
+            on_path.add(child)
+            stack.append((child_node, iter(successors(child))))
+        if next_bound == float('inf'):
+            return None
+        bound = next_bound
+
+
+class _BoundedNode(Generic[T]):
+    '''有内存上限的A*里用的节点，比Node多记了一些簿记信息'''
+    __slots__ = ('state', 'parent', 'cost', 'f', 'depth', 'children',
+                 'expanded', 'alive', 'forgotten', 'version')
+
+    def __init__(self, state: T, parent: Optional[_BoundedNode[T]],
+                 cost: float, f: float, depth: int) -> None:
+        self.state: T = state
+        self.parent: Optional[_BoundedNode[T]] = parent
+        self.cost: float = cost
+        self.f: float = f
+        self.depth: int = depth
+        # 还留在内存里的孩子个数
+        self.children: int = 0
+        self.expanded: bool = False
+        # 被删掉以后就是False
+        self.alive: bool = True
+        # 被删掉的孩子和它们备份下来的f
+        self.forgotten: Dict[T, float] = {}
+        # 每次重新进堆时加1，旧的堆条目就过期了
+        self.version: int = 0
+
+    @property
+    def estimate(self) -> float:
+        '''还没展开过就是自己的f，展开过就是被删掉的孩子里最小的f'''
+        if not self.expanded:
+            return self.f
+        return min(self.forgotten.values(), default=float('inf'))
+
+    def on_path(self, state: T) -> bool:
+        node: Optional[_BoundedNode[T]] = self
+        while node is not None:
+            if node.state == state:
+                return True
+            node = node.parent
+        return False
+
+
+def memory_bounded_astar(initial: T, goal_test: Callable[[T], bool],
+                         successors: Callable[[T], List[T]],
+                         heuristic: Callable[[T], float],
+                         max_nodes: int = 100000,
+                         table_size: int = 100000) -> Optional[Tuple[Node[T], int]]:
+    '''SMA*风格的A*，内存里最多保存max_nodes个节点。
+    满了以后删掉f最大、最浅的叶子，把它的f备份到父节点上，
+    父节点以后成为最好的候选时再把它重新生成出来。
+    和ida_star一样用一个最多table_size个状态的置换表记住每个状态见过的最小代价，
+    代价没有更小的重复状态不再生成'''
+    if max_nodes < 2:
+        raise ValueError('max_nodes should be at least 2.')
+    inf: float = float('inf')
+    root: _BoundedNode[T] = _BoundedNode(initial, None, 0.0, heuristic(initial), 0)
+    # 置换表：状态 -> 到达它的最小代价
+    table: Dict[T, float] = {initial: 0.0}
+    # 内存里代价等于表里的最小代价的那个节点，同样代价的重复状态不再生成
+    holders: Dict[T, _BoundedNode[T]] = {initial: root}
+    # 候选节点：没展开过的叶子，或者有被删掉的孩子可以重新生成的节点
+    best_nodes: List[Tuple[float, int, int, int, _BoundedNode[T]]] = []
+    # 可以删除的叶子
+    worst_leaves: List[Tuple[float, int, int, int, _BoundedNode[T]]] = []
+    sequence: int = 0
+    size: int = 1
+    count: int = 0
+
+    def update(node: _BoundedNode[T]) -> None:
+        '''节点的估计值或者孩子个数变了，重新进堆'''
+        nonlocal sequence
+        node.version += 1
+        sequence += 1
+        estimate: float = node.estimate
+        # f小、深的优先展开
+        heappush(best_nodes, (estimate, -node.depth, sequence, node.version, node))
+        # f大、浅的优先删除，根节点不能删
+        if node.children == 0 and node.parent is not None:
+            heappush(worst_leaves, (-estimate, node.depth, sequence, node.version, node))
+
+    def valid(entry: Tuple[float, int, int, int, _BoundedNode[T]]) -> bool:
+        return entry[4].alive and entry[3] == entry[4].version
+
+    def dominated(state: T, cost: float) -> bool:
+        '''已经有更短的路径到过state，或者内存里有同样代价的节点，
+        那条路径要么还在内存里，要么备份在它的祖先的forgotten里，不用再生成'''
+        best_cost: Optional[float] = table.get(state)
+        if best_cost is None or cost < best_cost:
+            return False
+        if cost > best_cost:
+            return True
+        holder: Optional[_BoundedNode[T]] = holders.get(state)
+        return holder is not None and holder.alive
+
+    update(root)
+    while True:
+        while best_nodes and not valid(best_nodes[0]):
+            heappop(best_nodes)
+        if not best_nodes or best_nodes[0][0] == inf:
+            return None
+        best: _BoundedNode[T] = heappop(best_nodes)[4]
+        if not best.expanded and goal_test(best.state):
+            path: List[T] = []
+            node: Optional[_BoundedNode[T]] = best
+            while node is not None:
+                path.append(node.state)
+                node = node.parent
+            path.reverse()
+            return _path_to_node(path), count
+        count += 1
+        new_cost: float = best.cost + 1
+        if best.expanded:
+            # 只把f最小的那些被删掉的孩子重新生成出来，带着它们备份下来的f，
+            # 其他的孩子留在forgotten里，轮到它们的时候再说
+            lowest: float = best.estimate
+            children: List[Tuple[T, float]] = [(state, f) for state, f
+                                               in best.forgotten.items() if f == lowest]
+            for state, _ in children:
+                del best.forgotten[state]
+        else:
+            best.expanded = True
+            children = [(child, max(best.f, new_cost + heuristic(child)))
+                        for child in successors(best.state)
+                        if not best.on_path(child)]
+        for child, f in children:
+            if dominated(child, new_cost):
+                continue
+            # 到了内存能容纳的最大深度还不是终点，这条路走不通
+            if best.depth + 2 >= max_nodes and not goal_test(child):
+                f = inf
+            child_node: _BoundedNode[T] = _BoundedNode(child, best, new_cost, f, best.depth + 1)
+            # 表满了就不再记新的状态，已经记下的还会更新
+            if child in table or len(table) < table_size:
+                table[child] = new_cost
+                holders[child] = child_node
+            best.children += 1
+            size += 1
+            update(child_node)
+        update(best)
+        # 内存超了，删掉最差的叶子
+        while size > max_nodes:
+            while not valid(worst_leaves[0]) or worst_leaves[0][4].children:
+                heappop(worst_leaves)
+            worst: _BoundedNode[T] = heappop(worst_leaves)[4]
+            worst.alive = False
+            if holders.get(worst.state) is worst:
+                del holders[worst.state]
+            parent: _BoundedNode[T] = worst.parent
+            parent.forgotten[worst.state] = worst.estimate
+            parent.children -= 1
+            size -= 1
+            update(parent)
+
+
+# 下面的搜索直接在CSR（压缩稀疏行）格式的邻接表上进行：
+# 状态就是0到n-1的整数，状态i的邻居是targets[offsets[i]:offsets[i+1]]
+# 状态个数事先知道，父节点数组可以一次分配好
+
+def _indexed_path(parents: array, goal: int) -> List[int]:
+    path: List[int] = [goal]
+    while parents[path[-1]] != path[-1]:
+        path.append(parents[path[-1]])
+    path.reverse()
+    return path
+
+
+def indexed_bfs(start: int, goal: int, offsets: Sequence[int],
+                targets: Sequence[int]) -> Optional[List[int]]:
+    '''在CSR邻接表上做广度优先搜索，返回id组成的路径'''
+    size: int = len(offsets) - 1
+    # 起点的父节点是自己，NO_PARENT表示还没发现
+    parents: array = array('l', [NO_PARENT]) * size
+    parents[start] = start
+    queue: array = array('l', [start])
+    head: int = 0
+    while head < len(queue):
+        current: int = queue[head]
+        head += 1
+        if current == goal:
+            return _indexed_path(parents, goal)
+        for edge in range(offsets[current], offsets[current + 1]):
+            child: int = targets[edge]
+            if parents[child] == NO_PARENT:
+                parents[child] = current
+                queue.append(child)
+    return None
+
+
+def indexed_astar(start: int, goal: int, offsets: Sequence[int],
+                  targets: Sequence[int],
+                  heuristic: Callable[[int], float]) -> Optional[Tuple[List[int], int]]:
+    '''在CSR邻接表上做A*，每一步代价是1，返回路径和展开的节点数'''
+    size: int = len(offsets) - 1
+    parents: array = array('l', [NO_PARENT]) * size
+    parents[start] = start
+    costs: array = array('d', [float('inf')]) * size
+    costs[start] = 0.0
+    closed: bytearray = bytearray(size)
+    frontier: List[Tuple[float, float, int]] = [(heuristic(start), -0.0, start)]
+    count: int = 0
+    while frontier:
+        _, neg_cost, current = heappop(frontier)
+        if closed[current] or -neg_cost > costs[current]:
+            continue
+        closed[current] = 1
+        count += 1
+        if current == goal:
+            return _indexed_path(parents, goal), count
+        new_cost: float = costs[current] + 1
+        for edge in range(offsets[current], offsets[current + 1]):
+            child: int = targets[edge]
+            if new_cost < costs[child]:
+                costs[child] = new_cost
+                parents[child] = current
+                closed[child] = 0
+                heappush(frontier, (new_cost + heuristic(child), -new_cost, child))
+    return None
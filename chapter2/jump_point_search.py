@@ -0,0 +1,204 @@
+from heapq import heappush, heappop
+from math import sqrt
+from typing import Dict, List, Optional, Tuple
+
+from maze import Maze, MazeLocation
+
+# 走一步斜线的代价
+SQRT2: float = sqrt(2)
+
+
+class JumpPointSearch:
+    '''专门给格子迷宫用的跳点搜索，通过Maze.open_rows读取格子。
+    沿着直线（和斜线）一直往前跳，只有碰到"被迫邻居"或者终点才停下来，
+    A*只展开这些跳点，开阔的迷宫里展开的节点数会少很多。
+    diagonal为True时可以斜着走，但不能穿过障碍的拐角'''
+
+    def __init__(self, maze: Maze, diagonal: bool = False) -> None:
+        self.maze: Maze = maze
+        self.diagonal: bool = diagonal
+        self._rows: int = maze._rows
+        self._columns: int = maze._columns
+        # 四周各加一圈障碍，跳的时候就不用检查越界了
+        self._width: int = self._columns + 2
+        self._open: bytearray = bytearray((self._rows + 2) * self._width)
+        for row, cells in enumerate(maze.open_rows()):
+            base: int = (row + 1) * self._width + 1
+            self._open[base:base + self._columns] = cells
+        self._goal: int = 0
+
+    def _index(self, ml: MazeLocation) -> int:
+        return (ml.row + 1) * self._width + ml.column + 1
+
+    def _location(self, index: int) -> MazeLocation:
+        row, column = divmod(index, self._width)
+        return MazeLocation(row - 1, column - 1)
+
+    def _forced(self, p: int, d: int) -> bool:
+        '''沿着d方向直着走到p时，旁边有没有被迫邻居'''
+        cells: bytearray = self._open
+        # 和前进方向垂直的一步
+        e: int = self._width if d in (1, -1) else 1
+        return bool((cells[p - e] and not cells[p - e - d]) or
+                    (cells[p + e] and not cells[p + e - d]))
+
+    def _jump_straight(self, p: int, d: int, turn: bool) -> Optional[int]:
+        '''沿着d方向直着跳，返回跳点，没有就返回None。
+        只能横竖走的时候，竖着走的每一步都要看看横着能不能跳到跳点(turn)'''
+        cells: bytearray = self._open
+        goal: int = self._goal
+        while True:
+            p += d
+            if not cells[p]:
+                return None
+            if p == goal or self._forced(p, d):
+                return p
+            if turn and (self._jump_straight(p, 1, False) is not None or
+                         self._jump_straight(p, -1, False) is not None):
+                return p
+
+    def _jump_diagonal(self, p: int, dv: int, dh: int) -> Optional[int]:
+        '''沿着斜线跳，dv是竖直分量，dh是水平分量'''
+        cells: bytearray = self._open
+        goal: int = self._goal
+        while True:
+            p += dv + dh
+            if not cells[p]:
+                return None
+            if p == goal:
+                return p
+            # 斜着走的每一步都要看看横竖方向能不能跳到跳点
+            if self._jump_straight(p, dv, False) is not None or \
+                    self._jump_straight(p, dh, False) is not None:
+                return p
+            # 不能穿过拐角
+            if not (cells[p + dv] and cells[p + dh]):
+                return None
+
+    def _jump(self, p: int, d: int) -> Optional[int]:
+        if d in (1, -1):
+            return self._jump_straight(p, d, False)
+        if d in (self._width, -self._width):
+            return self._jump_straight(p, d, not self.diagonal)
+        dh: int = 1 if (d + self._width) % self._width == 1 else -1
+        return self._jump_diagonal(p, d - dh, dh)
+
+    def _directions(self, p: int, parent: Optional[int]) -> List[int]:
+        '''根据来的方向剪枝，返回需要继续跳的方向'''
+        cells: bytearray = self._open
+        w: int = self._width
+        if parent is None:
+            directions: List[int] = [d for d in (1, -1, w, -w) if cells[p + d]]
+            if self.diagonal:
+                directions += [dv + dh for dv in (w, -w) for dh in (1, -1)
+                               if cells[p + dv] and cells[p + dh]]
+            return directions
+        # 从parent到p的单位方向
+        row_delta, column_delta = divmod(p, w)
+        parent_row, parent_column = divmod(parent, w)
+        dr: int = (row_delta > parent_row) - (row_delta < parent_row)
+        dc: int = (column_delta > parent_column) - (column_delta < parent_column)
+        dv, dh = dr * w, dc
+        directions = []
+        if dv and dh:
+            if cells[p + dv]:
+                directions.append(dv)
+            if cells[p + dh]:
+                directions.append(dh)
+            if cells[p + dv] and cells[p + dh]:
+                directions.append(dv + dh)
+            return directions
+        d: int = dv or dh
+        e: int = w if dh else 1
+        if cells[p + d]:
+            directions.append(d)
+            if self.diagonal:
+                for side in (e, -e):
+                    if cells[p + side]:
+                        directions.append(d + side)
+        for side in (e, -e):
+            if cells[p + side]:
+                directions.append(side)
+        return directions
+
+    def _distance(self, a: int, b: int) -> float:
+        '''两个格子之间的距离，能斜着走时是八方向距离，否则是曼哈顿距离'''
+        row_a, column_a = divmod(a, self._width)
+        row_b, column_b = divmod(b, self._width)
+        dy: int = abs(row_a - row_b)
+        dx: int = abs(column_a - column_b)
+        if self.diagonal:
+            return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+        return dx + dy
+
+    def _expand_path(self, jump_points: List[int]) -> List[MazeLocation]:
+        '''跳点之间是直线或者斜线，把中间的格子补上'''
+        path: List[MazeLocation] = [self._location(jump_points[0])]
+        w: int = self._width
+        for a, b in zip(jump_points, jump_points[1:]):
+            row_a, column_a = divmod(a, w)
+            row_b, column_b = divmod(b, w)
+            step: int = (((row_b > row_a) - (row_b < row_a)) * w +
+                         (column_b > column_a) - (column_b < column_a))
+            while a != b:
+                a += step
+                path.append(self._location(a))
+        return path
+
+    def search(self, start: Optional[MazeLocation] = None,
+               goal: Optional[MazeLocation] = None) -> Optional[Tuple[List[MazeLocation], int]]:
+        '''返回完整的路径和展开过的跳点个数，找不到就返回None'''
+        start_index: int = self._index(start or self.maze.start)
+        self._goal = self._index(goal or self.maze.goal)
+        if not self._open[start_index] or not self._open[self._goal]:
+            return None
+        costs: Dict[int, float] = {start_index: 0.0}
+        parents: Dict[int, Optional[int]] = {start_index: None}
+        closed: set = set()
+        frontier: List[Tuple[float, float, int]] = \
+            [(self._distance(start_index, self._goal), -0.0, start_index)]
+        count: int = 0
+        while frontier:
+            _, neg_cost, p = heappop(frontier)
+            if p in closed or -neg_cost > costs[p]:
+                continue
+            closed.add(p)
+            count += 1
+            if p == self._goal:
+                jump_points: List[int] = []
+                node: Optional[int] = p
+                while node is not None:
+                    jump_points.append(node)
+                    node = parents[node]
+                jump_points.reverse()
+                return self._expand_path(jump_points), count
+            for d in self._directions(p, parents[p]):
+                jump_point: Optional[int] = self._jump(p, d)
+                if jump_point is None or jump_point in closed:
+                    continue
+                new_cost: float = costs[p] + self._distance(p, jump_point)
+                if jump_point not in costs or costs[jump_point] > new_cost:
+                    costs[jump_point] = new_cost
+                    parents[jump_point] = p
+                    heappush(frontier, (new_cost + self._distance(jump_point, self._goal),
+                                        -new_cost, jump_point))
+        return None
+
+
+def jump_point_search(maze: Maze, diagonal: bool = False) -> Optional[Tuple[List[MazeLocation], int]]:
+    '''用跳点搜索从迷宫的起点走到终点'''
+    return JumpPointSearch(maze, diagonal).search()
+
+
+if __name__ == '__main__':
+    m: Maze = Maze(2000, 2000, 0.1, MazeLocation(0, 0), MazeLocation(1999, 1999))
+    result = jump_point_search(m)
+    if result is None:
+        print('No solution by JPS')
+    else:
+        path, count = result
+        print(f'JPS: path length {len(path)}, {count} jump points expanded')
+    result = jump_point_search(m, diagonal=True)
+    if result is not None:
+        print(f'JPS (8-connected): path length {len(result[0])}, '
+              f'{result[1]} jump points expanded')
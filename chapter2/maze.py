@@ -53,6 +53,10 @@ class Maze:
             locations.append(MazeLocation(ml.row, ml.column - 1))
         return locations
 
+    def set_cell(self, ml: MazeLocation, cell: Cell) -> None:
+        '''修改一个格子，比如临时堵上或者打通'''
+        self._grid[ml.row][ml.column] = cell
+
     def mark(self,path):
         for maze_location in path:
             self._grid[maze_location.row][maze_location.column] = \
@@ -68,11 +72,13 @@ class Maze:
         self._grid[self.start.row][self.start.column] = Cell.START
         self._grid[self.goal.row][self.goal.column] =  Cell.GOAL
 
+    def open_rows(self) -> List[bytes]:
+        '''每一行一个bytes，1表示能走，0表示障碍'''
+        return [bytes(cell != Cell.BLOCKED for cell in row) for row in self._grid]
+
     def __str__(self):
-        output = ''
-        for row in self._grid:
-            output += ''.join(c.value for c in row)+'\n'
-        return output
+        # 一次join出结果，不用反复拼接字符串
+        return ''.join(''.join(c.value for c in row)+'\n' for row in self._grid)
 
 def euclidean_distance(goal:MazeLocation):
     '''直线距离'''
@@ -0,0 +1,94 @@
+from array import array
+from typing import Callable, List
+
+from maze import Maze, MazeLocation
+
+
+class MazeAdjacency:
+    '''迷宫的CSR邻接表，构造一次，可以反复交给indexed_bfs/indexed_astar使用。
+    格子(row, column)的id是row * columns + column，
+    它的邻居是targets[offsets[id]:offsets[id + 1]]，顺序和Maze.successors一样'''
+
+    def __init__(self, maze: Maze) -> None:
+        self._rows: int = maze._rows
+        self._columns: int = maze._columns
+        columns: int = self._columns
+        size: int = self._rows * columns
+        cells: bytes = b''.join(maze.open_rows())
+        self.offsets: array = array('l', [0]) * (size + 1)
+        self.targets: array = array('l')
+        targets: array = self.targets
+        for cell in range(size):
+            if cells[cell]:
+                row, column = divmod(cell, columns)
+                if row + 1 < self._rows and cells[cell + columns]:
+                    targets.append(cell + columns)
+                if row > 0 and cells[cell - columns]:
+                    targets.append(cell - columns)
+                if column + 1 < columns and cells[cell + 1]:
+                    targets.append(cell + 1)
+                if column > 0 and cells[cell - 1]:
+                    targets.append(cell - 1)
+            self.offsets[cell + 1] = len(targets)
+
+    def id_of(self, ml: MazeLocation) -> int:
+        return ml.row * self._columns + ml.column
+
+    def location_of(self, cell: int) -> MazeLocation:
+        return MazeLocation(*divmod(cell, self._columns))
+
+    def to_locations(self, path: List[int]) -> List[MazeLocation]:
+        return [self.location_of(cell) for cell in path]
+
+    def neighbors(self, cell: int) -> array:
+        return self.targets[self.offsets[cell]:self.offsets[cell + 1]]
+
+    def manhattan_distance(self, goal: MazeLocation) -> Callable[[int], int]:
+        '''和maze.manhattan_distance一样，只是参数是格子的id'''
+        columns: int = self._columns
+        goal_row, goal_column = goal
+
+        def distance(cell: int) -> int:
+            row, column = divmod(cell, columns)
+            return abs(row - goal_row) + abs(column - goal_column)
+        return distance
+
+
+if __name__ == '__main__':
+    import random
+    from time import perf_counter
+    from generic_search import astar, bfs, indexed_astar, indexed_bfs
+    from maze import manhattan_distance
+
+    random.seed(2020)
+    size: int = 1000
+    m: Maze = Maze(size, size, 0.2, MazeLocation(0, 0), MazeLocation(size - 1, size - 1))
+
+    begin: float = perf_counter()
+    adjacency: MazeAdjacency = MazeAdjacency(m)
+    print(f'Building CSR adjacency: {perf_counter() - begin:.2f}s')
+    start: int = adjacency.id_of(m.start)
+    goal: int = adjacency.id_of(m.goal)
+
+    begin = perf_counter()
+    result = astar(m.start, m.goal_test, m.successors, manhattan_distance(m.goal))
+    elapsed: float = perf_counter() - begin
+    if result is not None:
+        print(f'astar with Maze.successors: {result[1]} nodes in {elapsed:.2f}s, '
+              f'{result[1] / elapsed:.0f} nodes/s')
+
+    begin = perf_counter()
+    indexed = indexed_astar(start, goal, adjacency.offsets, adjacency.targets,
+                            adjacency.manhattan_distance(m.goal))
+    elapsed = perf_counter() - begin
+    if indexed is not None:
+        print(f'indexed_astar on CSR: {indexed[1]} nodes in {elapsed:.2f}s, '
+              f'{indexed[1] / elapsed:.0f} nodes/s')
+
+    begin = perf_counter()
+    bfs(m.start, m.goal_test, m.successors)
+    middle: float = perf_counter()
+    indexed_bfs(start, goal, adjacency.offsets, adjacency.targets)
+    end: float = perf_counter()
+    print(f'bfs with Maze.successors: {middle - begin:.2f}s, '
+          f'indexed_bfs on CSR: {end - middle:.2f}s')
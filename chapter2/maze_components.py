@@ -0,0 +1,153 @@
+from array import array
+from typing import List
+
+from maze import Maze, MazeLocation, Cell
+
+# 障碍格子没有连通分量
+NO_COMPONENT = -1
+
+
+class UnionFind:
+    '''并查集，带路径减半和按大小合并，find几乎是常数时间'''
+
+    def __init__(self, size: int = 0) -> None:
+        self._parent: array = array('l', range(size))
+        self._size: array = array('l', [1]) * size
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def add(self, size: int = 1) -> int:
+        '''新加一个集合，返回它的编号。
+        size是这个元素代表的成员个数，几个成员共用一个元素时用得到'''
+        element: int = len(self._parent)
+        self._parent.append(element)
+        self._size.append(size)
+        return element
+
+    def find(self, element: int) -> int:
+        parent: array = self._parent
+        while parent[element] != element:
+            # 路径减半：顺手把自己挂到爷爷节点上
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, a: int, b: int) -> bool:
+        '''合并两个集合，原来就在一起返回False'''
+        root_a: int = self.find(a)
+        root_b: int = self.find(b)
+        if root_a == root_b:
+            return False
+        # 小的挂到大的下面
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        return True
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+    def size_of(self, element: int) -> int:
+        '''element所在集合的大小'''
+        return self._size[self.find(element)]
+
+
+class MazeComponents:
+    '''迷宫的连通分量索引，用来O(1)回答两个格子是否连通。
+    打通格子时直接合并；堵上格子可能把一个分量拆开，
+    并查集不支持拆分，所以只把受影响的那个分量重新填充一遍'''
+
+    def __init__(self, maze: Maze) -> None:
+        self.maze: Maze = maze
+        self._rows: int = maze._rows
+        self._columns: int = maze._columns
+        self._open: bytearray = bytearray(b''.join(maze.open_rows()))
+        size: int = self._rows * self._columns
+        # 每个格子在并查集里对应的元素，拆分时会换成新的元素
+        self._elements: array = array('l', range(size))
+        self._sets: UnionFind = UnionFind(size)
+        columns: int = self._columns
+        for cell in range(size):
+            if not self._open[cell]:
+                continue
+            # 只需要和右边、下边的格子合并
+            if (cell + 1) % columns and self._open[cell + 1]:
+                self._sets.union(cell, cell + 1)
+            if cell + columns < size and self._open[cell + columns]:
+                self._sets.union(cell, cell + columns)
+
+    def _id(self, ml: MazeLocation) -> int:
+        return ml.row * self._columns + ml.column
+
+    def _neighbors(self, cell: int) -> List[int]:
+        columns: int = self._columns
+        row, column = divmod(cell, columns)
+        neighbors: List[int] = []
+        if row + 1 < self._rows and self._open[cell + columns]:
+            neighbors.append(cell + columns)
+        if row > 0 and self._open[cell - columns]:
+            neighbors.append(cell - columns)
+        if column + 1 < columns and self._open[cell + 1]:
+            neighbors.append(cell + 1)
+        if column > 0 and self._open[cell - 1]:
+            neighbors.append(cell - 1)
+        return neighbors
+
+    def component(self, ml: MazeLocation) -> int:
+        '''格子所在连通分量的编号，障碍格子返回NO_COMPONENT'''
+        cell: int = self._id(ml)
+        if not self._open[cell]:
+            return NO_COMPONENT
+        return self._sets.find(self._elements[cell])
+
+    def component_size(self, ml: MazeLocation) -> int:
+        cell: int = self._id(ml)
+        if not self._open[cell]:
+            return 0
+        return self._sets.size_of(self._elements[cell])
+
+    def reachable(self, start: MazeLocation, goal: MazeLocation) -> bool:
+        '''两个格子是否连通'''
+        component: int = self.component(start)
+        return component != NO_COMPONENT and component == self.component(goal)
+
+    def unblock(self, ml: MazeLocation, cell: Cell = Cell.EMPTY) -> None:
+        '''打通一个格子，和周围能走的格子合并'''
+        index: int = self._id(ml)
+        self.maze.set_cell(ml, cell)
+        if self._open[index]:
+            return
+        self._open[index] = 1
+        # 原来的元素可能还挂着别人，换一个新的
+        self._elements[index] = self._sets.add()
+        for neighbor in self._neighbors(index):
+            self._sets.union(self._elements[index], self._elements[neighbor])
+
+    def block(self, ml: MazeLocation) -> None:
+        '''堵上一个格子。原来的分量可能断成几块，
+        从它的每个邻居出发重新填充，每一块分配新的并查集元素'''
+        index: int = self._id(ml)
+        self.maze.set_cell(ml, Cell.BLOCKED)
+        if not self._open[index]:
+            return
+        self._open[index] = 0
+        relabeled: set = set()
+        for neighbor in self._neighbors(index):
+            if neighbor in relabeled:
+                continue
+            region: List[int] = [neighbor]
+            relabeled.add(neighbor)
+            stack: List[int] = [neighbor]
+            while stack:
+                current: int = stack.pop()
+                for next_cell in self._neighbors(current):
+                    if next_cell not in relabeled:
+                        relabeled.add(next_cell)
+                        region.append(next_cell)
+                        stack.append(next_cell)
+            # 这一块的格子共用一个新元素
+            element: int = self._sets.add(len(region))
+            for cell in region:
+                self._elements[cell] = element
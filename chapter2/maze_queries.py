@@ -0,0 +1,241 @@
+from array import array
+from collections import OrderedDict
+from heapq import heappush, heappop
+from typing import List, Optional, Tuple
+
+from maze import Maze, MazeLocation
+from maze_components import MazeComponents
+
+# 还没有到达的格子的距离
+UNREACHED = -1
+# 查询次数最多记住缓存的BFS树个数这么多倍的起点
+SOURCE_COUNTS_PER_TREE = 16
+
+
+class MazeQueryService:
+    '''对同一个迷宫回答大量的最短路径查询。
+    构造时先算好连通分量（不连通的查询O(1)就能回答）和若干个地标的距离表，
+    查询时用地标(ALT)启发函数做A*；查询多的起点会缓存整棵BFS树'''
+
+    def __init__(self, maze: Maze, landmarks: int = 8,
+                 tree_cache_size: int = 64, tree_threshold: int = 2) -> None:
+        self.maze: Maze = maze
+        self._rows: int = maze._rows
+        self._columns: int = maze._columns
+        self._open: bytes = b''.join(maze.open_rows())
+        self.components: MazeComponents = MazeComponents(maze)
+        # 每个地标到所有格子的距离
+        self._landmarks: List[int] = []
+        self._landmark_distances: List[array] = []
+        self._choose_landmarks(landmarks)
+        # 起点id -> BFS树的父节点数组，最近用过的放在后面
+        self._trees: OrderedDict = OrderedDict()
+        self.tree_cache_size: int = tree_cache_size
+        # 同一个起点查询了这么多次以后就缓存它的BFS树
+        self.tree_threshold: int = tree_threshold
+        # 起点id -> 还没缓存BFS树时查询过几次，最近查询的放在后面，
+        # 只查一次的起点很多，超过上限就忘掉最久没查过的
+        self._source_counts: OrderedDict = OrderedDict()
+        # A*一共展开了多少个格子
+        self.expanded: int = 0
+
+    def _id(self, ml: MazeLocation) -> int:
+        return ml.row * self._columns + ml.column
+
+    def _location(self, cell: int) -> MazeLocation:
+        return MazeLocation(*divmod(cell, self._columns))
+
+    def _neighbors(self, cell: int) -> List[int]:
+        columns: int = self._columns
+        cells: bytes = self._open
+        row, column = divmod(cell, columns)
+        neighbors: List[int] = []
+        if row + 1 < self._rows and cells[cell + columns]:
+            neighbors.append(cell + columns)
+        if row > 0 and cells[cell - columns]:
+            neighbors.append(cell - columns)
+        if column + 1 < columns and cells[cell + 1]:
+            neighbors.append(cell + 1)
+        if column > 0 and cells[cell - 1]:
+            neighbors.append(cell - 1)
+        return neighbors
+
+    def _bfs(self, source: int) -> Tuple[array, array]:
+        '''从source出发的整棵BFS树，返回父节点和距离数组'''
+        size: int = self._rows * self._columns
+        parents: array = array('l', [UNREACHED]) * size
+        distances: array = array('l', [UNREACHED]) * size
+        parents[source] = source
+        distances[source] = 0
+        queue: List[int] = [source]
+        head: int = 0
+        while head < len(queue):
+            cell: int = queue[head]
+            head += 1
+            for neighbor in self._neighbors(cell):
+                if distances[neighbor] == UNREACHED:
+                    distances[neighbor] = distances[cell] + 1
+                    parents[neighbor] = cell
+                    queue.append(neighbor)
+        return parents, distances
+
+    def _choose_landmarks(self, count: int) -> None:
+        '''在最大的连通分量里用最远点选法选地标：
+        第一个地标离分量里任意一个格子最远，之后每次选离已有地标最远的格子'''
+        open_cells: List[int] = [c for c in range(len(self._open)) if self._open[c]]
+        if not open_cells:
+            return
+        seed: int = max(open_cells, key=lambda c: self.components.component_size(self._location(c)))
+        _, distances = self._bfs(seed)
+        reached: List[int] = [c for c in range(len(self._open))
+                              if distances[c] != UNREACHED]
+        # 每个格子离最近的地标有多远
+        nearest: array = distances
+        for _ in range(count):
+            candidate: int = max(reached, key=nearest.__getitem__)
+            if candidate in self._landmarks:
+                break
+            _, distances = self._bfs(candidate)
+            self._landmarks.append(candidate)
+            self._landmark_distances.append(distances)
+            nearest = array('l', (min(a, b) for a, b in zip(nearest, distances))) \
+                if len(self._landmarks) > 1 else distances
+
+    def reachable(self, start: MazeLocation, goal: MazeLocation) -> bool:
+        '''两个格子是否连通'''
+        return self.components.reachable(start, goal)
+
+    def _heuristic(self, cell: int, goal: int) -> int:
+        '''ALT启发函数：利用三角不等式，|d(L,goal) - d(L,cell)|是下界'''
+        best: int = abs(cell // self._columns - goal // self._columns) + \
+            abs(cell % self._columns - goal % self._columns)
+        for distances in self._landmark_distances:
+            to_goal: int = distances[goal]
+            to_cell: int = distances[cell]
+            if to_goal != UNREACHED and to_cell != UNREACHED:
+                estimate: int = abs(to_goal - to_cell)
+                if estimate > best:
+                    best = estimate
+        return best
+
+    def _tree(self, source: int) -> Optional[array]:
+        '''缓存里的BFS树，顺便把它挪到最近使用的位置'''
+        tree: Optional[array] = self._trees.get(source)
+        if tree is not None:
+            self._trees.move_to_end(source)
+        return tree
+
+    def _count_query(self, source: int) -> bool:
+        '''记一次从source出发的查询，次数到了tree_threshold返回True'''
+        counts: OrderedDict = self._source_counts
+        count: int = counts.pop(source, 0) + 1
+        if count >= self.tree_threshold:
+            return True
+        counts[source] = count
+        if len(counts) > SOURCE_COUNTS_PER_TREE * self.tree_cache_size:
+            counts.popitem(last=False)
+        return False
+
+    def _build_tree(self, source: int) -> array:
+        parents, _ = self._bfs(source)
+        self._trees[source] = parents
+        if len(self._trees) > self.tree_cache_size:
+            self._trees.popitem(last=False)
+        return parents
+
+    def _astar(self, start: int, goal: int) -> List[int]:
+        costs: dict = {start: 0}
+        parents: dict = {start: start}
+        frontier: List[Tuple[int, int, int]] = [(self._heuristic(start, goal), 0, start)]
+        closed: set = set()
+        while frontier:
+            _, neg_cost, cell = heappop(frontier)
+            if cell in closed or -neg_cost > costs[cell]:
+                continue
+            closed.add(cell)
+            self.expanded += 1
+            if cell == goal:
+                break
+            new_cost: int = costs[cell] + 1
+            for neighbor in self._neighbors(cell):
+                if neighbor not in costs or costs[neighbor] > new_cost:
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = cell
+                    heappush(frontier, (new_cost + self._heuristic(neighbor, goal),
+                                        -new_cost, neighbor))
+        path: List[int] = [goal]
+        while path[-1] != start:
+            path.append(parents[path[-1]])
+        path.reverse()
+        return path
+
+    def shortest_path(self, start: MazeLocation, goal: MazeLocation) -> Optional[List[MazeLocation]]:
+        '''从start到goal的最短路径，不连通就返回None'''
+        if not self.reachable(start, goal):
+            return None
+        source: int = self._id(start)
+        target: int = self._id(goal)
+        tree: Optional[array] = self._tree(source)
+        reverse: bool = False
+        if tree is None:
+            # 迷宫是无向的，终点的BFS树倒过来也能用
+            tree = self._tree(target)
+            reverse = tree is not None
+        if tree is None:
+            if self._count_query(source):
+                tree = self._build_tree(source)
+        if tree is None:
+            cells: List[int] = self._astar(source, target)
+        else:
+            root, leaf = (target, source) if reverse else (source, target)
+            cells = [leaf]
+            while cells[-1] != root:
+                cells.append(tree[cells[-1]])
+            if not reverse:
+                cells.reverse()
+        return [self._location(cell) for cell in cells]
+
+    def distance(self, start: MazeLocation, goal: MazeLocation) -> Optional[int]:
+        '''最短路径的步数，不连通就返回None'''
+        path: Optional[List[MazeLocation]] = self.shortest_path(start, goal)
+        return None if path is None else len(path) - 1
+
+
+if __name__ == '__main__':
+    import random
+    from time import perf_counter
+    from generic_search import astar
+    from maze import manhattan_distance
+
+    random.seed(2020)
+    size: int = 200
+    m: Maze = Maze(size, size, 0.25, MazeLocation(0, 0), MazeLocation(size - 1, size - 1))
+    begin: float = perf_counter()
+    service: MazeQueryService = MazeQueryService(m)
+    print(f'Precomputation: {perf_counter() - begin:.2f}s')
+
+    def random_location() -> MazeLocation:
+        return MazeLocation(random.randrange(size), random.randrange(size))
+
+    # 一半的查询集中在几个热门起点上
+    hot: List[MazeLocation] = [random_location() for _ in range(20)]
+    queries: List[Tuple[MazeLocation, MazeLocation]] = [
+        (random.choice(hot) if i % 2 else random_location(), random_location())
+        for i in range(10000)]
+
+    begin = perf_counter()
+    answered: int = sum(service.shortest_path(s, g) is not None for s, g in queries)
+    elapsed: float = perf_counter() - begin
+    print(f'MazeQueryService: {len(queries)} queries ({answered} reachable) in '
+          f'{elapsed:.2f}s, {len(queries) / elapsed:.0f} queries/s, '
+          f'{service.expanded} cells expanded by A*')
+
+    # 对照：每次都从头做A*，只跑前1000个
+    begin = perf_counter()
+    rows: List[bytes] = m.open_rows()
+    for s, g in queries[:1000]:
+        if rows[s.row][s.column] and rows[g.row][g.column]:
+            astar(s, lambda ml, g=g: ml == g, m.successors, manhattan_distance(g))
+    elapsed = perf_counter() - begin
+    print(f'astar from scratch: 1000 queries in {elapsed:.2f}s, '
+          f'{1000 / elapsed:.0f} queries/s')
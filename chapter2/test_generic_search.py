@@ -0,0 +1,428 @@
+import unittest
+import random
+
+from generic_search import (Node, bfs, dfs, astar, node_to_path,
+                            compact_bfs, compact_dfs, compact_astar,
+                            bidirectional_bfs, bidirectional_astar,
+                            ida_star, memory_bounded_astar, indexed_bfs,
+                            indexed_astar)
+from maze import Maze, MazeLocation, Cell, manhattan_distance
+from jump_point_search import jump_point_search
+from compact_maze import CompactMaze
+from maze_queries import MazeQueryService, SOURCE_COUNTS_PER_TREE
+from maze_components import MazeComponents
+from maze_adjacency import MazeAdjacency
+from benchmark import generate_maze, run_benchmarks
+
+
+def open_maze(rows: int, columns: int) -> Maze:
+    '''没有障碍的迷宫，结果是确定的'''
+    return Maze(rows, columns, 0.0, MazeLocation(0, 0),
+                MazeLocation(rows - 1, columns - 1))
+
+
+def random_maze(seed: int, size: int = 20, sparseness: float = 0.25) -> Maze:
+    random.seed(seed)
+    return Maze(size, size, sparseness, MazeLocation(0, 0),
+                MazeLocation(size - 1, size - 1))
+
+
+class CompactSearchTestCase(unittest.TestCase):
+    def test_compact_bfs_same_length_as_bfs(self):
+        '''紧凑bfs找到的路径和bfs一样短'''
+        for seed in range(10):
+            m = random_maze(seed)
+            node = bfs(m.start, m.goal_test, m.successors)
+            handle = compact_bfs(m.start, m.goal_test, m.successors)
+            if node is None:
+                self.assertIsNone(handle)
+                continue
+            self.assertEqual(len(node_to_path(node)), len(handle.to_path()))
+            self.assertEqual(handle.cost, len(handle.to_path()) - 1)
+
+    def test_compact_dfs_path_is_valid(self):
+        '''紧凑dfs的路径每一步都是合法的'''
+        m = open_maze(8, 8)
+        handle = compact_dfs(m.start, m.goal_test, m.successors)
+        path = node_to_path(handle)
+        self.assertEqual(path[0], m.start)
+        self.assertEqual(path[-1], m.goal)
+        for a, b in zip(path, path[1:]):
+            self.assertIn(b, m.successors(a))
+
+    def test_compact_astar_matches_astar(self):
+        '''紧凑A*的路径代价和A*一样'''
+        for seed in range(10):
+            m = random_maze(seed)
+            distance = manhattan_distance(m.goal)
+            result = astar(m.start, m.goal_test, m.successors, distance)
+            compact = compact_astar(m.start, m.goal_test, m.successors,
+                                    distance)
+            if result is None:
+                self.assertIsNone(compact)
+                continue
+            self.assertEqual(result[0].cost, compact[0].cost)
+            self.assertEqual(compact[0].state, m.goal)
+
+
+class AStarTestCase(unittest.TestCase):
+    def test_node_order_uses_both_heuristics(self):
+        '''按f=g+h排序，f相同时g大的优先'''
+        self.assertLess(Node('a', None, 1.0, 1.0), Node('b', None, 0.0, 3.0))
+        self.assertFalse(Node('a', None, 0.0, 3.0) < Node('b', None, 1.0, 1.0))
+        self.assertLess(Node('a', None, 2.0, 1.0), Node('b', None, 1.0, 2.0))
+
+    def test_open_maze_expands_only_the_path(self):
+        '''没有障碍时，A*只会展开路径上的格子'''
+        m = open_maze(10, 10)
+        distance = manhattan_distance(m.goal)
+        node, count = astar(m.start, m.goal_test, m.successors, distance)
+        self.assertEqual(len(node_to_path(node)), 19)
+        self.assertEqual(count, 19)
+        handle, compact_count = compact_astar(m.start, m.goal_test,
+                                              m.successors, distance)
+        self.assertEqual(compact_count, 19)
+
+    def test_astar_is_optimal(self):
+        '''A*的路径和bfs一样短'''
+        for seed in range(10):
+            m = random_maze(seed)
+            node = bfs(m.start, m.goal_test, m.successors)
+            result = astar(m.start, m.goal_test, m.successors,
+                           manhattan_distance(m.goal))
+            if node is None:
+                self.assertIsNone(result)
+            else:
+                self.assertEqual(len(node_to_path(node)) - 1, result[0].cost)
+
+
+class BidirectionalTestCase(unittest.TestCase):
+    def test_bidirectional_bfs_is_shortest(self):
+        '''双向bfs的路径和bfs一样短，而且是连通的'''
+        for seed in range(20):
+            m = random_maze(seed)
+            node = bfs(m.start, m.goal_test, m.successors)
+            result = bidirectional_bfs(m.start, m.goal, m.successors)
+            if node is None:
+                self.assertIsNone(result)
+                continue
+            path = node_to_path(result)
+            self.assertEqual(len(node_to_path(node)), len(path))
+            self.assertEqual((path[0], path[-1]), (m.start, m.goal))
+            for a, b in zip(path, path[1:]):
+                self.assertIn(b, m.successors(a))
+
+    def test_bidirectional_astar_is_shortest(self):
+        '''双向A*的路径和bfs一样短'''
+        for seed in range(20):
+            m = random_maze(seed)
+            node = bfs(m.start, m.goal_test, m.successors)
+            result = bidirectional_astar(m.start, m.goal, m.successors,
+                                         manhattan_distance(m.goal),
+                                         manhattan_distance(m.start))
+            if node is None:
+                self.assertIsNone(result)
+                continue
+            path = node_to_path(result[0])
+            self.assertEqual(len(node_to_path(node)), len(path))
+            self.assertEqual(result[0].cost, len(path) - 1)
+            for a, b in zip(path, path[1:]):
+                self.assertIn(b, m.successors(a))
+
+    def test_directed_predecessors(self):
+        '''有向图要传入predecessors'''
+        graph = {0: [1], 1: [2], 2: [3], 3: []}
+        reverse = {0: [], 1: [0], 2: [1], 3: [2]}
+        result = bidirectional_bfs(0, 3, graph.__getitem__,
+                                   reverse.__getitem__)
+        self.assertEqual(node_to_path(result), [0, 1, 2, 3])
+        self.assertIsNone(bidirectional_bfs(3, 0, graph.__getitem__,
+                                            reverse.__getitem__))
+
+
+class MemoryBoundedTestCase(unittest.TestCase):
+    def solvable_mazes(self):
+        for seed in range(30):
+            m = random_maze(seed, 10)
+            node = bfs(m.start, m.goal_test, m.successors)
+            if node is not None:
+                yield m, len(node_to_path(node)) - 1
+
+    def test_ida_star_is_optimal(self):
+        '''IDA*的路径和bfs一样短'''
+        for m, length in self.solvable_mazes():
+            node, count = ida_star(m.start, m.goal_test, m.successors,
+                                   manhattan_distance(m.goal))
+            self.assertEqual(node.cost, length)
+            self.assertEqual(node_to_path(node)[-1], m.goal)
+
+    def test_memory_bounded_astar_is_optimal(self):
+        '''内存只够放下一条最短路径时也能找到最优解'''
+        for m, length in self.solvable_mazes():
+            for budget in (length + 2, length + 10, 1000):
+                node, count = memory_bounded_astar(m.start, m.goal_test,
+                                                   m.successors,
+                                                   manhattan_distance(m.goal),
+                                                   budget)
+                self.assertEqual(node.cost, length)
+
+    def test_large_maze_expansions(self):
+        '''40x40的迷宫上重复状态被置换表剪掉，展开次数和A*是一个数量级。
+        只检查当前路径的话这个迷宫几秒钟都搜不完'''
+        m = random_maze(5, 40)
+        node, expected = astar(m.start, m.goal_test, m.successors,
+                               manhattan_distance(m.goal))
+        node, count = ida_star(m.start, m.goal_test, m.successors,
+                               manhattan_distance(m.goal))
+        self.assertEqual(node.cost, 80)
+        self.assertLess(count, 3 * expected)
+        for budget in (82, 1000):
+            node, count = memory_bounded_astar(m.start, m.goal_test,
+                                               m.successors,
+                                               manhattan_distance(m.goal),
+                                               budget)
+            self.assertEqual(node.cost, 80)
+            self.assertLess(count, 3 * expected)
+
+    def test_small_table(self):
+        '''置换表很小、放不下所有状态时结果还是最优的'''
+        for m, length in self.solvable_mazes():
+            node, count = ida_star(m.start, m.goal_test, m.successors,
+                                   manhattan_distance(m.goal), 10)
+            self.assertEqual(node.cost, length)
+            node, count = memory_bounded_astar(m.start, m.goal_test,
+                                               m.successors,
+                                               manhattan_distance(m.goal),
+                                               length + 2, 10)
+            self.assertEqual(node.cost, length)
+
+    def test_memory_bounded_astar_budget_too_small(self):
+        '''内存放不下路径时返回None'''
+        m = open_maze(5, 5)
+        self.assertIsNone(memory_bounded_astar(m.start, m.goal_test,
+                                               m.successors,
+                                               manhattan_distance(m.goal), 5))
+        self.assertRaises(ValueError, memory_bounded_astar, m.start,
+                          m.goal_test, m.successors,
+                          manhattan_distance(m.goal), 1)
+
+
+class JumpPointSearchTestCase(unittest.TestCase):
+    def assert_valid_path(self, m, path, diagonal):
+        self.assertEqual((path[0], path[-1]), (m.start, m.goal))
+        for a, b in zip(path, path[1:]):
+            dr, dc = b.row - a.row, b.column - a.column
+            self.assertEqual(max(abs(dr), abs(dc)), 1)
+            self.assertNotEqual(m._grid[b.row][b.column], Cell.BLOCKED)
+            if dr and dc:
+                # 不能穿过障碍的拐角
+                self.assertTrue(diagonal)
+                self.assertNotEqual(m._grid[a.row + dr][a.column], Cell.BLOCKED)
+                self.assertNotEqual(m._grid[a.row][a.column + dc], Cell.BLOCKED)
+
+    def test_same_length_as_bfs(self):
+        '''只能横竖走时，跳点搜索的路径和bfs一样短'''
+        for seed in range(30):
+            m = random_maze(seed)
+            node = bfs(m.start, m.goal_test, m.successors)
+            result = jump_point_search(m)
+            if node is None:
+                self.assertIsNone(result)
+                continue
+            self.assert_valid_path(m, result[0], False)
+            self.assertEqual(len(result[0]), len(node_to_path(node)))
+
+    def test_diagonal_path(self):
+        '''可以斜着走时，空迷宫里直接走对角线'''
+        m = open_maze(30, 30)
+        path, count = jump_point_search(m, diagonal=True)
+        self.assertEqual(len(path), 30)
+        self.assertLessEqual(count, 2)
+        for seed in range(30):
+            m = random_maze(seed)
+            result = jump_point_search(m, diagonal=True)
+            if result is not None:
+                self.assert_valid_path(m, result[0], True)
+
+    def test_expands_fewer_nodes(self):
+        '''开阔的迷宫里跳点比A*展开的格子少得多'''
+        m = open_maze(50, 50)
+        m._grid[1][2] = Cell.BLOCKED
+        _, astar_count = astar(m.start, m.goal_test, m.successors,
+                               manhattan_distance(m.goal))
+        path, count = jump_point_search(m)
+        self.assertEqual(len(path), 99)
+        self.assertLess(count * 5, astar_count)
+
+
+class CompactMazeTestCase(unittest.TestCase):
+    def test_same_behaviour_as_maze(self):
+        '''转换成紧凑迷宫以后，邻居、打印、标记和清除都不变'''
+        m = random_maze(3)
+        compact = CompactMaze.from_maze(m)
+        self.assertEqual(str(m), str(compact))
+        self.assertEqual(m.open_rows(), compact.open_rows())
+        for row in range(m._rows):
+            for column in range(m._columns):
+                ml = MazeLocation(row, column)
+                self.assertEqual(m.successors(ml), compact.successors(ml))
+        node = bfs(m.start, m.goal_test, m.successors)
+        path = node_to_path(node)
+        m.mark(path)
+        compact.mark(path)
+        self.assertEqual(str(m), str(compact))
+        m.clear(path)
+        compact.clear(path)
+        self.assertEqual(str(m), str(compact))
+        self.assertEqual(jump_point_search(m), jump_point_search(compact))
+
+    def test_random_fill(self):
+        '''随机生成的障碍比例大致符合sparseness'''
+        random.seed(0)
+        m = CompactMaze(200, 200, 0.3, MazeLocation(0, 0), MazeLocation(199, 199))
+        text = str(m)
+        self.assertEqual(len(text), 200 * 201)
+        self.assertEqual(text[0], 'S')
+        self.assertEqual(text[-2], 'G')
+        self.assertAlmostEqual(text.count('X') / (200 * 200), 0.3, delta=0.02)
+        self.assertEqual(str(CompactMaze(10, 10, 0.0)).count('X'), 0)
+        self.assertEqual(str(CompactMaze(10, 10, 1.0)).count('X'), 98)
+
+
+class MazeQueryServiceTestCase(unittest.TestCase):
+    def test_queries_match_bfs(self):
+        '''查询结果和bfs一样短，不连通的返回None'''
+        m = random_maze(7, 15, 0.3)
+        service = MazeQueryService(m, landmarks=3, tree_cache_size=2)
+        rng = random.Random(1)
+        cells = [MazeLocation(r, c) for r in range(15) for c in range(15)
+                 if m.open_rows()[r][c]]
+        # 前几个查询的起点重复，会用到缓存的BFS树
+        pairs = [(cells[0], rng.choice(cells)) for _ in range(5)] + \
+            [(rng.choice(cells), rng.choice(cells)) for _ in range(100)]
+        for start, goal in pairs:
+            node = bfs(start, lambda ml: ml == goal, m.successors)
+            path = service.shortest_path(start, goal)
+            self.assertEqual(service.reachable(start, goal), node is not None)
+            if node is None:
+                self.assertIsNone(path)
+                continue
+            self.assertEqual(len(path), len(node_to_path(node)))
+            self.assertEqual((path[0], path[-1]), (start, goal))
+            for a, b in zip(path, path[1:]):
+                self.assertIn(b, m.successors(a))
+        self.assertLessEqual(len(service._trees), 2)
+        # 只查过一次的起点不会越积越多
+        self.assertLessEqual(len(service._source_counts), SOURCE_COUNTS_PER_TREE * 2)
+
+
+class MazeComponentsTestCase(unittest.TestCase):
+    def assert_matches_bfs(self, m, components, cells):
+        for start in cells[:10]:
+            # 用洪水填充能到达的格子集合来核对
+            node_reach = {start}
+            frontier = [start]
+            while frontier:
+                current = frontier.pop()
+                for child in m.successors(current):
+                    if child not in node_reach:
+                        node_reach.add(child)
+                        frontier.append(child)
+            for goal in cells:
+                self.assertEqual(components.reachable(start, goal),
+                                 goal in node_reach)
+                if goal in node_reach:
+                    self.assertEqual(components.component_size(goal),
+                                     len(node_reach))
+
+    def open_cells(self, m):
+        rows = m.open_rows()
+        return [MazeLocation(r, c) for r in range(len(rows))
+                for c in range(len(rows[0])) if rows[r][c]]
+
+    def test_block_and_unblock(self):
+        '''堵上和打通格子以后，连通性和bfs的结果一致'''
+        m = random_maze(11, 12, 0.2)
+        components = MazeComponents(m)
+        self.assert_matches_bfs(m, components, self.open_cells(m))
+        rng = random.Random(5)
+        for _ in range(15):
+            ml = MazeLocation(rng.randrange(12), rng.randrange(12))
+            if rng.random() < 0.6:
+                components.block(ml)
+                self.assertFalse(components.reachable(ml, ml))
+            else:
+                components.unblock(ml)
+            self.assert_matches_bfs(m, components, self.open_cells(m))
+
+    def test_split_corridor(self):
+        '''堵住走廊中间，两边就不连通了'''
+        m = open_maze(1, 5)
+        components = MazeComponents(m)
+        self.assertTrue(components.reachable(m.start, m.goal))
+        components.block(MazeLocation(0, 2))
+        self.assertFalse(components.reachable(m.start, m.goal))
+        self.assertEqual(components.component_size(m.start), 2)
+        components.unblock(MazeLocation(0, 2))
+        self.assertTrue(components.reachable(m.start, m.goal))
+        self.assertEqual(components.component_size(m.goal), 5)
+
+
+class MazeAdjacencyTestCase(unittest.TestCase):
+    def test_neighbors_match_successors(self):
+        '''CSR里的邻居和Maze.successors一样'''
+        m = random_maze(4, 12)
+        adjacency = MazeAdjacency(m)
+        for row in range(12):
+            for column in range(12):
+                ml = MazeLocation(row, column)
+                if m.open_rows()[row][column]:
+                    neighbors = adjacency.neighbors(adjacency.id_of(ml))
+                    self.assertEqual(list(map(adjacency.location_of, neighbors)),
+                                     m.successors(ml))
+
+    def test_indexed_search(self):
+        '''在CSR上搜索的路径和bfs一样短'''
+        for seed in range(20):
+            m = random_maze(seed)
+            adjacency = MazeAdjacency(m)
+            start, goal = adjacency.id_of(m.start), adjacency.id_of(m.goal)
+            node = bfs(m.start, m.goal_test, m.successors)
+            path = indexed_bfs(start, goal, adjacency.offsets, adjacency.targets)
+            result = indexed_astar(start, goal, adjacency.offsets,
+                                   adjacency.targets,
+                                   adjacency.manhattan_distance(m.goal))
+            if node is None:
+                self.assertIsNone(path)
+                self.assertIsNone(result)
+                continue
+            expected = len(node_to_path(node))
+            self.assertEqual(len(path), expected)
+            self.assertEqual(len(result[0]), expected)
+            locations = adjacency.to_locations(result[0])
+            self.assertEqual((locations[0], locations[-1]), (m.start, m.goal))
+            for a, b in zip(locations, locations[1:]):
+                self.assertIn(b, m.successors(a))
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    def test_seeded_mazes_are_reproducible(self):
+        '''同样的种子生成同样的迷宫'''
+        self.assertEqual(str(generate_maze(20, 0.2, 1)),
+                         str(generate_maze(20, 0.2, 1)))
+        self.assertNotEqual(str(generate_maze(20, 0.2, 1)),
+                            str(generate_maze(20, 0.2, 2)))
+
+    def test_records(self):
+        '''每种组合都有一条记录，bfs和A*的路径一样长'''
+        records = list(run_benchmarks([10, 16], [0.0], ['bfs', 'astar-manhattan'],
+                                      memory=False))
+        self.assertEqual(len(records), 4)
+        for record in records:
+            self.assertTrue(record['found'])
+            self.assertEqual(record['path_length'], 2 * record['size'] - 1)
+            self.assertGreater(record['nodes_expanded'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+'''用位运算解n皇后问题。
+棋盘的行、两个方向的斜线各用一个整数的二进制位表示有没有被占，
+一列里还能放皇后的行就是一次按位或再取反，不用一个一个皇后地比较。
+列和行都从1开始编号，解的格式和queens_csp的一样：{列: 行}。
+'''
+from typing import Callable, Dict, Iterator, List, Optional
+
+from csp import CSP, STOP_CHECK_INTERVAL, Inference, Symmetry, ValueOrderer, VariableSelector
+from queens import QueensConstraint, QueensMirrorSymmetry
+
+
+class BitboardQueens:
+    '''n皇后的专用求解器。solve找一个解，solutions按列的顺序产生所有的解，
+    count只数解的个数'''
+
+    def __init__(self, n: int) -> None:
+        self.n: int = n
+        self.full: int = (1 << n) - 1
+        # 最近一次搜索放过多少次皇后
+        self.nodes: int = 0
+
+    def _fixed_rows(self, assignment: Optional[Dict[int,int]]) -> List[int]:
+        '''每一列允许放皇后的行，已经定好的列只允许那一行'''
+        allowed: List[int] = [self.full] * self.n
+        for column, row in (assignment or {}).items():
+            allowed[column - 1] = 1 << (row - 1) if 1 <= row <= self.n else 0
+        return allowed
+
+    def solve(self, assignment: Optional[Dict[int,int]] = None,
+              should_stop: Optional[Callable[[], bool]] = None) -> Optional[Dict[int,int]]:
+        '''每次挑能放的行最少的那一列，某一列一行都不能放时马上回头。
+        按列的顺序搜索30皇后要放五千多万次皇后，这样只要一百多次'''
+        n, full = self.n, self.full
+        self.nodes = 0
+        allowed: List[int] = self._fixed_rows(assignment)
+        # rows的第r位：第r行被占了；up的第r+c位、down的第r-c+n-1位：这两条斜线被占了
+        rows: int = 0
+        up: int = 0
+        down: int = 0
+        free: List[int] = list(range(n))
+        placed: Dict[int,int] = {}
+        # 每一层是[列, 还没试过的行, 放这一列之前的rows, up, down]
+        stack: List[List[int]] = []
+        while True:
+            if not free:
+                return {column + 1: row + 1 for column, row in placed.items()}
+            best: int = -1
+            best_rows: int = 0
+            best_count: int = n + 1
+            for column in free:
+                available: int = allowed[column] & ~(rows | (up >> column) |
+                                                     (down >> (n - 1 - column)))
+                count: int = available.bit_count()
+                if count < best_count:
+                    best, best_rows, best_count = column, available, count
+                    if count == 0:
+                        break
+            if best_count > 0:
+                free.remove(best)
+                stack.append([best, best_rows, rows, up, down])
+            # 在栈顶这一列换一行放；没有行可换就退回上一列
+            while stack:
+                top: List[int] = stack[-1]
+                column, available, rows, up, down = top
+                if available:
+                    bit: int = available & -available
+                    top[1] = available ^ bit
+                    self.nodes += 1
+                    if should_stop is not None and \
+                            self.nodes % STOP_CHECK_INTERVAL == 0 and should_stop():
+                        return None
+                    row: int = bit.bit_length() - 1
+                    rows |= bit
+                    up |= 1 << (row + column)
+                    down |= 1 << (row - column + n - 1)
+                    placed[column] = row
+                    break
+                stack.pop()
+                free.append(column)
+                placed.pop(column, None)
+            else:
+                return None
+
+    def solutions(self, assignment: Optional[Dict[int,int]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None) -> Iterator[Dict[int,int]]:
+        '''从第1列到第n列依次放皇后，每放一列两个方向的斜线各移一位'''
+        n, full = self.n, self.full
+        self.nodes = 0
+        allowed: List[int] = self._fixed_rows(assignment)
+        # 第depth层的行、斜线、还没试过的行和选中的行
+        rows: List[int] = [0] * n
+        left: List[int] = [0] * n
+        right: List[int] = [0] * n
+        available: List[int] = [0] * n
+        chosen: List[int] = [0] * n
+        available[0] = allowed[0]
+        depth: int = 0
+        while depth >= 0:
+            candidates: int = available[depth]
+            if not candidates:
+                depth -= 1
+                continue
+            bit: int = candidates & -candidates
+            available[depth] = candidates ^ bit
+            chosen[depth] = bit
+            self.nodes += 1
+            if should_stop is not None and \
+                    self.nodes % STOP_CHECK_INTERVAL == 0 and should_stop():
+                return
+            if depth == n - 1:
+                yield {column + 1: chosen[column].bit_length() for column in range(n)}
+                continue
+            taken: int = rows[depth] | bit
+            to_left: int = ((left[depth] | bit) << 1) & full
+            to_right: int = (right[depth] | bit) >> 1
+            depth += 1
+            rows[depth], left[depth], right[depth] = taken, to_left, to_right
+            available[depth] = allowed[depth] & ~(taken | to_left | to_right)
+
+    def count(self) -> int:
+        '''上下翻转得到的还是解，所以第一列只放上半边，每个解算两次；
+        n是奇数时第一列放在正中间的那些解再单独数一遍'''
+        n, full = self.n, self.full
+        self.nodes = 0
+        if n == 1:
+            return 1
+        total: int = 0
+        half: int = (1 << (n // 2)) - 1
+        for first, weight in ((half, 2), ((1 << (n // 2)) if n % 2 else 0, 1)):
+            found: int = 0
+            rows: List[int] = [0] * n
+            left: List[int] = [0] * n
+            right: List[int] = [0] * n
+            available: List[int] = [0] * n
+            available[0] = first
+            depth: int = 0
+            while depth >= 0:
+                candidates: int = available[depth]
+                if not candidates:
+                    depth -= 1
+                    continue
+                bit: int = candidates & -candidates
+                available[depth] = candidates ^ bit
+                self.nodes += 1
+                taken: int = rows[depth] | bit
+                to_left: int = ((left[depth] | bit) << 1) & full
+                to_right: int = (right[depth] | bit) >> 1
+                if depth == n - 2:
+                    # 最后一列不用再往下走，能放几行就是几个解
+                    found += (full & ~(taken | to_left | to_right)).bit_count()
+                    continue
+                depth += 1
+                rows[depth], left[depth], right[depth] = taken, to_left, to_right
+                available[depth] = full & ~(taken | to_left | to_right)
+            total += weight * found
+        return total
+
+
+class BitboardQueensCSP(CSP[int,int]):
+    '''和queens_csp一样的CSP，不指定挑变量、取值顺序和约束传播时改用BitboardQueens，
+    否则还是用通用的回溯搜索'''
+
+    def __init__(self, n: int) -> None:
+        columns: List[int] = list(range(1, n + 1))
+        super().__init__(columns, {column: list(range(1, n + 1)) for column in columns})
+        self.add_constraint(QueensConstraint(columns))
+        self.engine: BitboardQueens = BitboardQueens(n)
+
+    def backtracking_search(self, assignment: Optional[Dict[int,int]] = None,
+                            select_variable: Optional[VariableSelector] = None,
+                            order_values: Optional[ValueOrderer] = None,
+                            inference: Optional[Inference] = None,
+                            should_stop: Optional[Callable[[], bool]] = None
+                            ) -> Optional[Dict[int,int]]:
+        if select_variable is not None or order_values is not None or inference is not None:
+            return super().backtracking_search(assignment, select_variable, order_values,
+                                               inference, should_stop)
+        solution: Optional[Dict[int,int]] = self.engine.solve(assignment, should_stop)
+        self.assignments_tried = self.engine.nodes
+        return solution
+
+    def count_solutions(self, assignment: Optional[Dict[int,int]] = None,
+                        select_variable: Optional[VariableSelector] = None,
+                        order_values: Optional[ValueOrderer] = None,
+                        inference: Optional[Inference] = None,
+                        symmetry: Optional[Symmetry] = None,
+                        limit: Optional[int] = None) -> int:
+        '''整个棋盘都没有限制时直接用BitboardQueens.count，它自己利用了上下翻转的对称性，
+        所以symmetry是QueensMirrorSymmetry时结果也一样'''
+        if assignment or select_variable is not None or order_values is not None or \
+                inference is not None or limit is not None or \
+                not (symmetry is None or isinstance(symmetry, QueensMirrorSymmetry)):
+            return super().count_solutions(assignment, select_variable, order_values,
+                                           inference, symmetry, limit)
+        total: int = self.engine.count()
+        self.assignments_tried = self.engine.nodes
+        return total
+
+    def _solve(self, assignment: Optional[Dict[int,int]],
+               select_variable: Optional[VariableSelector],
+               order_values: Optional[ValueOrderer], inference: Optional[Inference],
+               symmetry: Optional[Symmetry],
+               should_stop: Optional[Callable[[], bool]] = None) -> Iterator[Dict[int,int]]:
+        if select_variable is not None or order_values is not None or inference is not None:
+            yield from super()._solve(assignment, select_variable, order_values,
+                                      inference, symmetry, should_stop)
+            return
+        self.assignments_tried = 0
+        for solution in self.engine.solutions(assignment, should_stop):
+            self.assignments_tried = self.engine.nodes
+            if symmetry is None or symmetry.allowed(solution):
+                yield solution
+        self.assignments_tried = self.engine.nodes
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+    from csp import forward_checking, minimum_remaining_values
+
+    print(f'{"n":>3} {"bitboard":>10} {"placements":>11} {"csp mrv+fc":>11} {"assignments":>12}')
+    for n in range(4, 31):
+        csp: BitboardQueensCSP = BitboardQueensCSP(n)
+        begin: float = perf_counter()
+        csp.backtracking_search()
+        bitboard_seconds: float = perf_counter() - begin
+        placements: int = csp.assignments_tried
+        begin = perf_counter()
+        csp.backtracking_search(select_variable=minimum_remaining_values,
+                                inference=forward_checking)
+        print(f'{n:>3} {bitboard_seconds:>10.4f} {placements:>11} '
+              f'{perf_counter() - begin:>11.4f} {csp.assignments_tried:>12}')
+    print()
+    print(f'{"n":>3} {"solutions":>10} {"seconds":>8}')
+    for n in range(4, 14):
+        begin = perf_counter()
+        total: int = BitboardQueens(n).count()
+        print(f'{n:>3} {total:>10} {perf_counter() - begin:>8.3f}')
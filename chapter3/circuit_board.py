@@ -1,6 +1,7 @@
-from typing import Dict,List,NamedTuple,Optional
+from typing import Dict,List,NamedTuple,Optional,Set
 
 from csp import CSP,Constraint
+from grid_mask import PlacementMasks,MaskOverlapConstraint,cell_index,rectangle_shape,mask_cells
 
 Grid = List[List[str]]
 
@@ -39,6 +40,28 @@ def generate_domain(chip: str, grid: Grid) -> List[List[GridLocation]]:
                         for c in range(col,col+h)])
     return domain
 
+def generate_mask_domain(chip: str, grid: Grid) -> PlacementMasks:
+    '''和generate_domain一样的摆放、一样的顺序，但每个摆放是一个整数mask'''
+    domain: PlacementMasks = PlacementMasks()
+    height: int = len(grid)
+    width: int = len(grid[0])
+    h: int = int(chip[-1])
+    w: int = int(chip[-2])
+    lying: int = rectangle_shape(h,w,width)
+    standing: int = rectangle_shape(w,h,width)
+    for row in range(height):
+        for col in range(width):
+            start: int = cell_index(row,col,width)
+            if col+w <= width and row+h <= height:
+                domain.add(lying,start)
+            if h != w and col+h <= width and row+w <= height:
+                domain.add(standing,start)
+    return domain
+
+def mask_to_locations(mask: int, grid: Grid) -> List[GridLocation]:
+    '''把mask变回芯片占的格子，按从上到下、从左到右的顺序'''
+    return [GridLocation(r,c) for r,c in mask_cells(mask,len(grid[0]))]
+
 class CircuitBoardConstraint(Constraint[str,List[GridLocation]]):
     def __init__(self,chips: List[str]) -> None:
         super().__init__(chips)
@@ -50,13 +73,26 @@ class CircuitBoardConstraint(Constraint[str,List[GridLocation]]):
             for locs in values]
         return len(set(all_locations)) == len(all_locations)
 
+    def check(self, variable: str, assignment: Dict[str, List[GridLocation]]) -> bool:
+        # 只需要看刚放下的这个和其他已经放好的有没有重叠
+        placed = set(assignment[variable])
+        for other in self.chips:
+            if other != variable and other in assignment and \
+                    not placed.isdisjoint(assignment[other]):
+                return False
+        return True
 
-if __name__ == '__main__':
-    grid: Grid = generate_grid(9,9)
-    # 芯片的第0个字符代表芯片的颜色，后面两个字符代表芯片的宽和高
-    chips: List[str] = ['A94','B33','D61','E25']
+    def conflicts(self, variable: str, assignment: Dict[str, List[GridLocation]]) -> Set[str]:
+        # 和刚放下的这个有重叠的那些
+        placed = set(assignment[variable])
+        return {other for other in self.chips if other != variable and other in assignment
+                and not placed.isdisjoint(assignment[other])}
+
+
+def circuit_board_csp(grid: Grid, chips: List[str]) -> CSP[str,List[GridLocation]]:
+    '''芯片是变量，芯片在电路板上所有能放的位置是domain'''
     locations: Dict[str, List[List[GridLocation]]] = {}
-    # 这个字典用于优化
+    # 这个字典用于优化，形状一样的芯片能放的位置也一样
     cache: Dict[str,List[List[GridLocation]]] = {}
 
     # 把可行的domain添加到字典locations里面
@@ -66,18 +102,56 @@ if __name__ == '__main__':
         # 一定要保证宽比高长
         if width < height:
             width,height = height,width
-        if key:= f'{width}{height}' in cache:
+        if (key:= f'{width}{height}') in cache:
             locations[chip] = cache[key]
         else:
             locations[chip] = cache[key] = generate_domain(chip,grid)
     csp: CSP[str,List[GridLocation]] = CSP(chips,locations)
     csp.add_constraint(CircuitBoardConstraint(chips))
-    solution:Optional[Dict[str,List[GridLocation]]] = csp.backtracking_search()
+    return csp
+
+
+def circuit_board_mask_csp(grid: Grid, chips: List[str]) -> CSP[str,int]:
+    '''和circuit_board_csp一样，但摆放用mask表示，检查重叠只要按位与'''
+    locations: Dict[str, PlacementMasks] = {}
+    cache: Dict[str, PlacementMasks] = {}
+    for chip in chips:
+        width, height = sorted((int(chip[-2]), int(chip[-1])), reverse=True)
+        if (key:= f'{width}{height}') not in cache:
+            cache[key] = generate_mask_domain(chip,grid)
+        locations[chip] = cache[key]
+    csp: CSP[str,int] = CSP(chips,locations)
+    csp.add_constraint(MaskOverlapConstraint(chips))
+    return csp
+
+
+def solve_circuit_board(grid: Grid, chips: List[str],
+                        backend: str = 'csp') -> Optional[Dict[str,List[GridLocation]]]:
+    '''backend是'csp'时用回溯法，是'dlx'时当成精确覆盖问题用Dancing Links解'''
+    if backend == 'dlx':
+        from dancing_links import placement_search
+        domains: Dict[str,PlacementMasks] = circuit_board_mask_csp(grid,chips).domains
+        solution: Optional[Dict[str,int]] = placement_search(domains)
+    elif backend == 'csp':
+        solution = circuit_board_mask_csp(grid,chips).backtracking_search()
+    else:
+        raise ValueError(f'Unknown backend {backend!r}.')
+    if solution is None:
+        return None
+    return {chip: mask_to_locations(mask,grid) for chip,mask in solution.items()}
+
+
+if __name__ == '__main__':
+    grid: Grid = generate_grid(9,9)
+    # 芯片的第0个字符代表芯片的颜色，后面两个字符代表芯片的宽和高
+    chips: List[str] = ['A94','B33','D61','E25']
+    csp: CSP[str,int] = circuit_board_mask_csp(grid,chips)
+    solution:Optional[Dict[str,int]] = csp.backtracking_search()
     if solution is None:
         print('No solution')
     else:
-        for chip,grid_locations in solution.items():
-            for grid_location in grid_locations:
+        for chip,mask in solution.items():
+            for grid_location in mask_to_locations(mask,grid):
                 grid[grid_location.row][grid_location.column] = chip[0]
         display_grid(grid)
     
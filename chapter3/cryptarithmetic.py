@@ -0,0 +1,148 @@
+'''任意的字母算术题，比如SEND + MORE = MONEY。
+除了字母以外，每一列还有一个进位变量，每一列的加法是一个只涉及这一列的限制，
+一列的字母和进位都安排好了马上就能检查，不用等所有字母都安排好再算整个等式。
+不同的字母代表不同的数字，拆成每两个字母之间的二元限制，配合前向检查，
+一个字母定下来以后其他字母就不会再去试这个数字；
+一列只剩一个变量没安排时，前向检查也会把让这一列不成立的值删掉。
+'''
+from typing import Dict, List, Optional, Set, Tuple
+
+from csp import (CSP, BinaryConstraint, Constraint, forward_checking,
+                 minimum_remaining_values)
+
+
+def parse_puzzle(puzzle: str) -> Tuple[List[str], str]:
+    '''把"WORD + WORD = WORD"拆成加数和结果，加数可以有任意多个'''
+    sides: List[str] = puzzle.upper().split('=')
+    if len(sides) != 2:
+        raise ValueError(f'Puzzle must contain exactly one "=": {puzzle!r}')
+    addends: List[str] = [word.strip() for word in sides[0].split('+')]
+    result: str = sides[1].strip()
+    for word in addends + [result]:
+        if not word.isalpha():
+            raise ValueError(f'Not a word: {word!r} in {puzzle!r}')
+    if len(set(''.join(addends) + result)) > 10:
+        raise ValueError(f'More than ten different letters in {puzzle!r}')
+    return addends, result
+
+
+def carry(column: int) -> str:
+    '''从第column列进到下一列的进位，个位是第0列。
+    用小写字母开头，不会和题目里的大写字母重名'''
+    return f'carry{column}'
+
+
+class ColumnConstraint(Constraint[str,int]):
+    '''一列的加法：这一列的字母加上进来的进位，个位是结果的字母，十位是进位。
+    写成线性等式 sum(系数*变量) == 0，同一个字母在一列里出现几次系数就加几。
+    还有变量没安排时，用它们的取值范围算出左边最小和最大能是多少，
+    0不在这个范围里就已经不可能满足了'''
+    def __init__(self, coefficients: Dict[str,int], bounds: Dict[str,Tuple[int,int]]) -> None:
+        # 系数为0的变量（比如在两边各出现一次）不影响这一列
+        self.coefficients: Dict[str,int] = {v: c for v, c in coefficients.items() if c != 0}
+        super().__init__(list(self.coefficients))
+        # 每个变量的最小值和最大值
+        self.bounds: Dict[str,Tuple[int,int]] = {v: bounds[v] for v in self.coefficients}
+
+    def satisfied(self, assignment: Dict[str,int]) -> bool:
+        low: int = 0
+        high: int = 0
+        for variable, coefficient in self.coefficients.items():
+            if variable in assignment:
+                value: int = coefficient * assignment[variable]
+                low += value
+                high += value
+            else:
+                smallest, largest = self.bounds[variable]
+                if coefficient > 0:
+                    low += coefficient * smallest
+                    high += coefficient * largest
+                else:
+                    low += coefficient * largest
+                    high += coefficient * smallest
+        return low <= 0 <= high
+
+    def check(self, variable: str, assignment: Dict[str,int]) -> bool:
+        return self.satisfied(assignment)
+
+
+class DifferentLettersConstraint(BinaryConstraint[str,int]):
+    def allowed(self, first_value: int, second_value: int) -> bool:
+        # 不同的字母代表不同的数字
+        return first_value != second_value
+
+
+def cryptarithmetic_csp(puzzle: str) -> CSP[str,int]:
+    '''变量是题目里的字母和每一列的进位，按从个位到最高位的顺序排好，
+    剩余值一样多时先安排低位的列'''
+    addends, result = parse_puzzle(puzzle)
+    width: int = len(result)
+    if any(len(word) > width for word in addends):
+        raise ValueError(f'An addend is longer than the result in {puzzle!r}')
+    variables: List[str] = []
+    domains: Dict[str,List[int]] = {}
+    # 最高位的字母不能是0
+    leading: Set[str] = {word[0] for word in addends + [result] if len(word) > 1}
+    columns: List[Dict[str,int]] = []
+    carry_in: int = 0
+    for column in range(width):
+        coefficients: Dict[str,int] = {}
+        letters: List[str] = [word[-1 - column] for word in addends if column < len(word)]
+        for letter in letters:
+            coefficients[letter] = coefficients.get(letter, 0) + 1
+        coefficients[result[-1 - column]] = coefficients.get(result[-1 - column], 0) - 1
+        for letter in letters + [result[-1 - column]]:
+            if letter not in domains:
+                variables.append(letter)
+                domains[letter] = list(range(1 if letter in leading else 0, 10))
+        if column > 0:
+            coefficients[carry(column - 1)] = 1
+        if column < width - 1:
+            # 进位最多是这一列能加出来的最大的数除以10
+            carry_in = (9 * len(letters) + carry_in) // 10
+            variables.append(carry(column))
+            domains[carry(column)] = list(range(carry_in + 1))
+            coefficients[carry(column)] = -10
+        columns.append(coefficients)
+    bounds: Dict[str,Tuple[int,int]] = {v: (domain[0], domain[-1]) for v, domain in domains.items()}
+    csp: CSP[str,int] = CSP(variables, domains)
+    for coefficients in columns:
+        csp.add_constraint(ColumnConstraint(coefficients, bounds))
+    letters: List[str] = [v for v in variables if v.isupper()]
+    for i, first in enumerate(letters):
+        for second in letters[i + 1:]:
+            csp.add_constraint(DifferentLettersConstraint(first, second))
+    return csp
+
+
+def solve_cryptarithmetic(puzzle: str) -> Optional[Dict[str,int]]:
+    '''返回每个字母代表的数字，没有解返回None。
+    进位常常只剩一个可能的值，所以先安排剩余值最少的变量，
+    SO + MANY + ... = TESTS这样41个加数的题只要试一千次左右'''
+    csp: CSP[str,int] = cryptarithmetic_csp(puzzle)
+    solution: Optional[Dict[str,int]] = csp.backtracking_search(
+        select_variable=minimum_remaining_values, inference=forward_checking)
+    if solution is None:
+        return None
+    return {variable: digit for variable, digit in solution.items() if variable.isupper()}
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+
+    puzzles: List[str] = [
+        'SEND + MORE = MONEY',
+        'DONALD + GERALD = ROBERT',
+        'CROSS + ROADS = DANGER',
+        'BASE + BALL = GAMES',
+        'THIS + IS + VERY = EASY',
+        'SO + MANY + MORE + MEN + SEEM + TO + SAY + THAT + THEY + MAY + SOON + TRY + TO + '
+        'STAY + AT + HOME + SO + AS + TO + SEE + OR + HEAR + THE + SAME + ONE + MAN + TRY + '
+        'TO + MEET + THE + TEAM + ON + THE + MOON + AS + HE + HAS + AT + THE + OTHER + TEN '
+        '= TESTS',
+    ]
+    for puzzle in puzzles:
+        begin: float = perf_counter()
+        solution: Optional[Dict[str,int]] = solve_cryptarithmetic(puzzle)
+        name: str = puzzle if len(puzzle) < 40 else puzzle[:30] + '...'
+        print(f'{name:<34} {perf_counter() - begin:.3f}s {solution}')
@@ -1,5 +1,10 @@
+from __future__ import annotations
 from abc import ABC,abstractmethod
-from typing import Generic,TypeVar,Dict,List,Optional
+from collections import deque, OrderedDict
+from typing import Generic,TypeVar,Dict,List,Optional,Set,Callable,Tuple,Deque,Iterator,FrozenSet
+
+# 搜索时每尝试这么多次赋值问一次should_stop
+STOP_CHECK_INTERVAL: int = 1000
 
 # 变量类型
 V = TypeVar('V')
@@ -18,6 +23,142 @@ class Constraint(Generic[V,D],ABC):
     def satisfied(self, assignment: Dict[V,D]) -> bool:
         ...
 
+    def check(self, variable: V, assignment: Dict[V,D]) -> bool:
+        '''刚刚给variable赋了值，检查它和其他变量有没有冲突。
+        其他变量之间在之前已经检查过了，子类可以覆盖，只检查和variable有关的部分'''
+        return self.satisfied(assignment)
+
+    def conflicts(self, variable: V, assignment: Dict[V,D]) -> Set[V]:
+        '''variable的值和哪些已安排的变量冲突，没有冲突就是空集合。
+        默认把作用范围里所有已安排的变量都算上，子类可以给出更准确的集合'''
+        if self.check(variable, assignment):
+            return set()
+        return {v for v in self.variables if v != variable and v in assignment}
+
+
+class BinaryConstraint(Constraint[V,D]):
+    '''只涉及两个变量的限制条件，子类只需要实现allowed。
+    CSP会把它存进邻接表，检查时直接比较两个值'''
+    def __init__(self, first: V, second: V) -> None:
+        super().__init__([first, second])
+        self.first: V = first
+        self.second: V = second
+
+    @abstractmethod
+    def allowed(self, first_value: D, second_value: D) -> bool:
+        '''first取first_value、second取second_value时是否满足条件'''
+        ...
+
+    def satisfied(self, assignment: Dict[V,D]) -> bool:
+        if self.first not in assignment or self.second not in assignment:
+            return True
+        return self.allowed(assignment[self.first], assignment[self.second])
+
+
+class DomainStore(Generic[V,D]):
+    '''搜索过程中每个变量还剩下哪些值。
+    删掉的值只做标记并记在trail上，回溯时按trail撤销，不需要复制domain'''
+
+    def __init__(self, domains: Dict[V,List[D]]) -> None:
+        self._domains: Dict[V,List[D]] = domains
+        # 1表示这个下标的值还在
+        self._alive: Dict[V,bytearray] = {v: bytearray(b'\x01') * len(values)
+                                          for v, values in domains.items()}
+        self._sizes: Dict[V,int] = {v: len(values) for v, values in domains.items()}
+        self._trail: List[Tuple[V,int]] = []
+
+    def values(self, variable: V) -> List[D]:
+        alive: bytearray = self._alive[variable]
+        return [value for value, keep in zip(self._domains[variable], alive) if keep]
+
+    def indexed_values(self, variable: V) -> List[Tuple[int,D]]:
+        '''还在的值和它们在原来domain里的下标'''
+        alive: bytearray = self._alive[variable]
+        return [(index, value) for index, value in enumerate(self._domains[variable])
+                if alive[index]]
+
+    def size(self, variable: V) -> int:
+        return self._sizes[variable]
+
+    def remove(self, variable: V, index: int) -> None:
+        self._alive[variable][index] = 0
+        self._sizes[variable] -= 1
+        self._trail.append((variable, index))
+
+    def mark(self) -> int:
+        '''记下现在trail的位置，以后undo到这里'''
+        return len(self._trail)
+
+    def undo(self, mark: int) -> None:
+        trail: List[Tuple[V,int]] = self._trail
+        while len(trail) > mark:
+            variable, index = trail.pop()
+            self._alive[variable][index] = 1
+            self._sizes[variable] += 1
+
+
+class Symmetry(Generic[V,D]):
+    '''打破对称性的钩子，默认什么都不做。
+    allowed排除掉和已经搜过的部分安排对称的那些，
+    multiplicity是一个留下来的解代表了多少个解'''
+    def allowed(self, assignment: Dict[V,D]) -> bool:
+        return True
+
+    def multiplicity(self, solution: Dict[V,D]) -> int:
+        return 1
+
+
+def _hashable(value: object) -> object:
+    '''把列表这样不能哈希的值变成元组，用来记nogood'''
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return tuple(_hashable(v) for v in value)
+
+
+class NogoodCache(Generic[V]):
+    '''搜索中学到的nogood：这几个变量同时取这几个值就一定没有解。
+    最多保存capacity个，满了就淘汰最久没有用到的那个'''
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity: int = capacity
+        self._nogoods: OrderedDict = OrderedDict()
+        # (变量, 值) -> 包含它的nogood
+        self._index: Dict[Tuple[V,object],Set[FrozenSet[Tuple[V,object]]]] = {}
+        self.hits: int = 0
+
+    def __len__(self) -> int:
+        return len(self._nogoods)
+
+    def add(self, nogood: Dict[V,object]) -> None:
+        if self.capacity <= 0 or not nogood:
+            return
+        key: FrozenSet[Tuple[V,object]] = frozenset(nogood.items())
+        if key in self._nogoods:
+            self._nogoods.move_to_end(key)
+            return
+        self._nogoods[key] = None
+        for pair in key:
+            self._index.setdefault(pair, set()).add(key)
+        if len(self._nogoods) > self.capacity:
+            oldest, _ = self._nogoods.popitem(last=False)
+            for pair in oldest:
+                bucket = self._index[pair]
+                bucket.discard(oldest)
+                if not bucket:
+                    del self._index[pair]
+
+    def conflicts(self, variable: V, value: object, values: Dict[V,object]) -> Set[V]:
+        '''variable刚取了value，如果和values里的其他值组成了一个nogood，
+        返回这个nogood里的其他变量，否则返回空集合'''
+        for key in self._index.get((variable, value), ()):
+            if all(v in values and values[v] == token for v, token in key):
+                self._nogoods.move_to_end(key)
+                self.hits += 1
+                return {v for v, _ in key if v != variable}
+        return set()
+
 
 class CSP(Generic[V,D]):
     def __init__(self, variables: List[V], domains: Dict[V,List[D]]) -> None:
@@ -25,43 +166,465 @@ class CSP(Generic[V,D]):
         self.variables: List[V] = variables
         self.domains: Dict[V,List[D]] = domains
         self.constraints: Dict[V,List[Constraint[V,D]]] = {}
+        # 和每个变量共享限制条件的其他变量
+        self.neighbors: Dict[V,Set[V]] = {}
+        # 二元限制的邻接表：变量 -> [(另一个变量, 条件, 这个变量是不是first)]
+        self._binary: Dict[V,List[Tuple[V,BinaryConstraint[V,D],bool]]] = {}
+        # 其他的限制条件
+        self._general: Dict[V,List[Constraint[V,D]]] = {}
         for variable in self.variables:
             self.constraints[variable] = []
+            self.neighbors[variable] = set()
+            self._binary[variable] = []
+            self._general[variable] = []
             if variable not in self.domains:
                 raise LookupError('Every variable should have a domain assigned to it.')
+        # 最近一次搜索一共尝试了多少次赋值
+        self.assignments_tried: int = 0
+        # 做约束传播时，搜索过程中各个变量剩下的值
+        self.domain_store: Optional[DomainStore[V,D]] = None
+        # 最近一次backjumping_search学到的nogood
+        self.nogoods: Optional[NogoodCache[V]] = None
+        # (x, y) -> 同时涉及x和y的限制条件
+        self._shared: Dict[Tuple[V,V],List[Constraint[V,D]]] = {}
 
     def add_constraint(self, constraint: Constraint[V,D]) -> None:
         '''把限制条件加进来'''
         for variable in constraint.variables:
             # 不能加无关的变量
-            if variable not in self.variables:
+            if variable not in self.constraints:
                 raise LookupError('Variable in constraint not in CSP.')
             else:
                 self.constraints[variable].append(constraint)
+                self.neighbors[variable].update(v for v in constraint.variables
+                                                if v != variable)
+        if isinstance(constraint, BinaryConstraint):
+            self._binary[constraint.first].append((constraint.second, constraint, True))
+            self._binary[constraint.second].append((constraint.first, constraint, False))
+        else:
+            for variable in constraint.variables:
+                self._general[variable].append(constraint)
+        self._shared.clear()
 
     def consistent(self, variable: V, assignment: Dict[V,D]) -> bool:
-        '''检查目前的安排对当前这个变量来说是否合理'''
-        for constraint in self.constraints[variable]:
-            if not constraint.satisfied(assignment):
+        '''检查刚刚赋值的variable和已安排的变量有没有冲突，
+        假设其他变量之间已经是一致的'''
+        value: D = assignment[variable]
+        # 二元限制只需要看已安排的邻居
+        for other, constraint, is_first in self._binary[variable]:
+            if other in assignment:
+                if is_first:
+                    if not constraint.allowed(value, assignment[other]):
+                        return False
+                elif not constraint.allowed(assignment[other], value):
+                    return False
+        for constraint in self._general[variable]:
+            if not constraint.check(variable, assignment):
                 return False
         return True
 
-    def backtracking_search(self, assignment: Dict[V,D] = {}) -> Optional[Dict[V,D]]:
-        # 如果每个变量都被安排了，那么安排就完成了
-        if len(assignment) == len(self.variables):
-            return assignment
-
-        # 获取所有还没有安排的变量
-        unassigned = [v for v in self.variables if v not in assignment]
-
-        # 获取第一个未排定的变量所有可能的值
-        first: V = unassigned[0]
-        for value in self.domains[first]:
-            local_assignment = assignment.copy()
-            local_assignment[first] = value
-            # 如果还是一致的，递归
-            if self.consistent(first, local_assignment):
-                result: Optional[Dict[V,D]] = self.backtracking_search(local_assignment)
-                if result is not None:
-                    return result
-        return None
+    def conflict_set(self, variable: V, assignment: Dict[V,D]) -> Set[V]:
+        '''刚刚赋值的variable和哪些已安排的变量冲突，一致的话是空集合'''
+        binary, general = self._conflicts(variable, assignment)
+        return binary | general
+
+    def _conflicts(self, variable: V,
+                   assignment: Dict[V,D]) -> Tuple[Set[V],Set[V]]:
+        '''分开给出二元限制和其他限制里的冲突变量。
+        二元限制里的每一个冲突变量单独就能解释冲突，其他限制要所有变量合起来才行'''
+        value: D = assignment[variable]
+        binary: Set[V] = set()
+        for other, constraint, is_first in self._binary[variable]:
+            if other in assignment:
+                if is_first:
+                    if not constraint.allowed(value, assignment[other]):
+                        binary.add(other)
+                elif not constraint.allowed(assignment[other], value):
+                    binary.add(other)
+        general: Set[V] = set()
+        for constraint in self._general[variable]:
+            general |= constraint.conflicts(variable, assignment)
+        return binary, general
+
+    def constraints_between(self, first: V, second: V) -> List[Constraint[V,D]]:
+        '''同时涉及两个变量的限制条件'''
+        key: Tuple[V,V] = (first, second)
+        shared: Optional[List[Constraint[V,D]]] = self._shared.get(key)
+        if shared is None:
+            shared = [c for c in self.constraints[first] if second in c.variables]
+            self._shared[key] = shared
+        return shared
+
+    def current_domain(self, variable: V) -> List[D]:
+        '''变量目前可以取的值，做约束传播时是剪枝以后剩下的值'''
+        if self.domain_store is not None:
+            return self.domain_store.values(variable)
+        return self.domains[variable]
+
+    def remaining_values(self, variable: V, assignment: Dict[V,D]) -> List[D]:
+        '''在目前的安排下，变量还能取的、不会立刻冲突的值'''
+        # 约束传播已经把和已安排变量冲突的值删掉了
+        if self.domain_store is not None:
+            return self.domain_store.values(variable)
+        return self.consistent_values(variable, assignment)
+
+    def consistent_values(self, variable: V, assignment: Dict[V,D]) -> List[D]:
+        '''current_domain里和assignment不冲突的值。
+        和remaining_values不同，做约束传播时也逐个检查，
+        assignment里还没有传播过的试探性赋值也算在内'''
+        remaining: List[D] = []
+        for value in self.current_domain(variable):
+            assignment[variable] = value
+            if self.consistent(variable, assignment):
+                remaining.append(value)
+        assignment.pop(variable, None)
+        return remaining
+
+    def backtracking_search(self, assignment: Optional[Dict[V,D]] = None,
+                            select_variable: Optional[VariableSelector] = None,
+                            order_values: Optional[ValueOrderer] = None,
+                            inference: Optional[Inference] = None,
+                            should_stop: Optional[Callable[[], bool]] = None) -> Optional[Dict[V,D]]:
+        '''assignment是已经定好的部分安排，不会被修改；
+        select_variable决定下一个安排哪个变量，默认按声明顺序；
+        order_values决定按什么顺序尝试取值，默认按domain里的顺序；
+        inference是每次赋值以后做的约束传播，比如forward_checking或者mac；
+        should_stop每隔一段时间调用一次，返回True时放弃搜索，返回None'''
+        solutions: Iterator[Dict[V,D]] = self._solve(assignment, select_variable,
+                                                     order_values, inference, None,
+                                                     should_stop)
+        try:
+            return next(solutions, None)
+        finally:
+            solutions.close()
+
+    def backjumping_search(self, assignment: Optional[Dict[V,D]] = None,
+                           select_variable: Optional[VariableSelector] = None,
+                           order_values: Optional[ValueOrderer] = None,
+                           nogood_cache_size: int = 10000,
+                           max_nogood_size: int = 4) -> Optional[Dict[V,D]]:
+        '''冲突导向回跳(CBJ)加nogood学习，前三个参数和backtracking_search一样。
+        每个变量记下让它的值失败的那些变量(冲突集)，值都失败了就直接跳回
+        冲突集里最深的那个变量，中间那些无关的变量不用再一个一个试；
+        同时把冲突集上的取值记成nogood，以后再遇到同样的组合马上排除。
+        涉及的变量多于max_nogood_size的nogood很少能再碰到，就不记了'''
+        self.assignments_tried = 0
+        assignment = dict(assignment) if assignment else {}
+        order_values = order_values or domain_order
+        self.nogoods = NogoodCache(nogood_cache_size)
+        # id(值) -> (值, 能哈希的样子)，同一个值只转换一次，
+        # 把值本身也存下来，保证id不会被别的对象重新用到
+        converted: Dict[int,Tuple[D,object]] = {}
+
+        def token(value: D) -> object:
+            pair: Optional[Tuple[D,object]] = converted.get(id(value))
+            if pair is None:
+                pair = converted[id(value)] = (value, _hashable(value))
+            return pair[1]
+
+        # 已安排的值变成能哈希的样子，用来查nogood
+        tokens: Dict[V,object] = {v: token(value) for v, value in assignment.items()}
+        order: List[V] = [v for v in self.variables if v not in assignment]
+        # 变量 -> 它在栈里的位置
+        level: Dict[V,int] = {}
+        # 每一层是(变量, 还没试过的值, 冲突集)
+        stack: List[Tuple[V,Iterator[D],Set[V]]] = []
+        descend: bool = True
+        while True:
+            if descend:
+                if len(assignment) == len(self.variables):
+                    return assignment
+                variable: V = order[len(stack)] if select_variable is None \
+                    else select_variable(self, assignment)
+                level[variable] = len(stack)
+                stack.append((variable, iter(order_values(self, variable, assignment)), set()))
+            variable, values, conflicts = stack[-1]
+            descend = False
+            for value in values:
+                self.assignments_tried += 1
+                assignment[variable] = value
+                tokens[variable] = token(value)
+                binary, general = self._conflicts(variable, assignment)
+                if general:
+                    # 非二元的限制要这些变量合在一起才排除这个值，只记一个的话
+                    # 冲突集太小，会跳过还有别的值可以试的变量
+                    conflicts |= binary | general
+                elif binary:
+                    # 只有二元限制冲突时，只记最早安排的那个冲突变量，能跳得更远
+                    conflicts.add(min(binary, key=lambda v: level.get(v, -1)))
+                else:
+                    found: Set[V] = self.nogoods.conflicts(variable, tokens[variable], tokens)
+                    if not found:
+                        descend = True
+                        break
+                    conflicts |= found
+                del assignment[variable]
+                del tokens[variable]
+            if descend:
+                continue
+            # 这个变量的值都失败了，冲突集上的取值就是一个nogood
+            stack.pop()
+            del level[variable]
+            if len(conflicts) <= max_nogood_size:
+                self.nogoods.add({v: tokens[v] for v in conflicts})
+            jumpable: List[V] = [v for v in conflicts if v in level]
+            if not jumpable:
+                # 冲突只和一开始给定的安排有关
+                return None
+            target: V = max(jumpable, key=level.__getitem__)
+            while stack[-1][0] != target:
+                skipped: V = stack.pop()[0]
+                del level[skipped]
+                del assignment[skipped]
+                del tokens[skipped]
+            # 目标变量继承冲突集，换下一个值
+            stack[-1][2].update(v for v in conflicts if v != target)
+            del assignment[target]
+            del tokens[target]
+
+    def iter_solutions(self, assignment: Optional[Dict[V,D]] = None,
+                       select_variable: Optional[VariableSelector] = None,
+                       order_values: Optional[ValueOrderer] = None,
+                       inference: Optional[Inference] = None,
+                       symmetry: Optional[Symmetry] = None,
+                       limit: Optional[int] = None) -> Iterator[Dict[V,D]]:
+        '''边搜索边一个一个地产生解，参数和backtracking_search一样。
+        有symmetry时只产生它认可的那些解；limit是最多产生几个解。
+        同一个CSP同一时间只能有一个搜索在进行'''
+        if limit is not None and limit <= 0:
+            self.assignments_tried = 0
+            return
+        found: int = 0
+        for solution in self._solve(assignment, select_variable, order_values,
+                                    inference, symmetry):
+            found += 1
+            yield dict(solution)
+            # 够数了马上结束，不再去找下一个解
+            if limit is not None and found >= limit:
+                return
+
+    def count_solutions(self, assignment: Optional[Dict[V,D]] = None,
+                        select_variable: Optional[VariableSelector] = None,
+                        order_values: Optional[ValueOrderer] = None,
+                        inference: Optional[Inference] = None,
+                        symmetry: Optional[Symmetry] = None,
+                        limit: Optional[int] = None) -> int:
+        '''解的个数，不复制解。有symmetry时每个找到的解按它的multiplicity计数；
+        limit限制的是找到的解的个数'''
+        if limit is not None and limit <= 0:
+            self.assignments_tried = 0
+            return 0
+        count: int = 0
+        found: int = 0
+        for solution in self._solve(assignment, select_variable, order_values,
+                                    inference, symmetry):
+            found += 1
+            count += 1 if symmetry is None else symmetry.multiplicity(solution)
+            if limit is not None and found >= limit:
+                break
+        return count
+
+    def _solve(self, assignment: Optional[Dict[V,D]],
+               select_variable: Optional[VariableSelector],
+               order_values: Optional[ValueOrderer], inference: Optional[Inference],
+               symmetry: Optional[Symmetry],
+               should_stop: Optional[Callable[[], bool]] = None) -> Iterator[Dict[V,D]]:
+        '''准备好搜索需要的状态，产生的是搜索中正在用的那个字典'''
+        self.assignments_tried = 0
+        # 整个搜索只用这一份安排，原地修改
+        assignment = dict(assignment) if assignment else {}
+        if inference is not None:
+            self.domain_store = DomainStore(self.domains)
+        try:
+            # 先根据已经给出的安排做一次传播
+            if inference is not None and \
+                    not inference(self, self.domain_store, None, assignment):
+                return
+            yield from self._search(assignment, select_variable,
+                                    order_values or domain_order, inference, symmetry,
+                                    should_stop)
+        finally:
+            self.domain_store = None
+
+    def _search(self, assignment: Dict[V,D], select_variable: Optional[VariableSelector],
+                order_values: ValueOrderer, inference: Optional[Inference],
+                symmetry: Optional[Symmetry],
+                should_stop: Optional[Callable[[], bool]]) -> Iterator[Dict[V,D]]:
+        '''用显式的栈代替递归，变量再多也不会超过递归深度。
+        栈里每一层是(变量, 还没试过的值, 进入这一层时trail的位置)，
+        回溯时把这一层的赋值删掉，再把传播删掉的值撤销到trail的位置'''
+        store: Optional[DomainStore[V,D]] = self.domain_store
+        # 没有指定怎么挑变量时，第几层就安排第几个变量
+        order: List[V] = [v for v in self.variables if v not in assignment]
+        stack: List[Tuple[V,Iterator[D],int]] = []
+        descend: bool = True
+        while True:
+            if descend and len(assignment) == len(self.variables):
+                # 每个变量都被安排了，找到一个解
+                yield assignment
+                if not stack:
+                    return
+                # 接着找下一个解，当作最后一个值没有成功
+                variable, _, mark = stack[-1]
+                del assignment[variable]
+                if store is not None:
+                    store.undo(mark)
+            elif descend:
+                variable = order[len(stack)] if select_variable is None \
+                    else select_variable(self, assignment)
+                mark = store.mark() if store is not None else 0
+                stack.append((variable, iter(order_values(self, variable, assignment)), mark))
+            variable, values, mark = stack[-1]
+            descend = False
+            for value in values:
+                self.assignments_tried += 1
+                if should_stop is not None and \
+                        self.assignments_tried % STOP_CHECK_INTERVAL == 0 and should_stop():
+                    return
+                assignment[variable] = value
+                if self.consistent(variable, assignment) and \
+                        (symmetry is None or symmetry.allowed(assignment)) and \
+                        (inference is None or inference(self, store, variable, assignment)):
+                    descend = True
+                    break
+                del assignment[variable]
+                if store is not None:
+                    store.undo(mark)
+            if descend:
+                continue
+            # 这个变量的值都试过了，回到上一层换一个值
+            stack.pop()
+            if not stack:
+                return
+            previous, _, previous_mark = stack[-1]
+            del assignment[previous]
+            if store is not None:
+                store.undo(previous_mark)
+
+
+# 挑选下一个变量的函数，参数是CSP和目前的安排
+VariableSelector = Callable[[CSP, Dict], object]
+# 决定取值顺序的函数，参数是CSP、变量和目前的安排
+ValueOrderer = Callable[[CSP, object, Dict], List]
+# 约束传播函数，参数是CSP、剩余值、刚刚安排的变量（None表示全部检查一遍）
+# 和目前的安排，发现某个变量无值可取时返回False
+Inference = Callable[[CSP, DomainStore, object, Dict], bool]
+
+
+def first_unassigned(csp: CSP[V,D], assignment: Dict[V,D]) -> V:
+    '''按声明顺序挑第一个没有安排的变量'''
+    for variable in csp.variables:
+        if variable not in assignment:
+            return variable
+
+
+def _unassigned_degree(csp: CSP[V,D], variable: V, assignment: Dict[V,D]) -> int:
+    return sum(1 for neighbor in csp.neighbors[variable] if neighbor not in assignment)
+
+
+def minimum_remaining_values(csp: CSP[V,D], assignment: Dict[V,D]) -> V:
+    '''最少剩余值(MRV)：挑能取的值最少的变量，最容易失败的先处理'''
+    return min((v for v in csp.variables if v not in assignment),
+               key=lambda v: len(csp.remaining_values(v, assignment)))
+
+
+def degree(csp: CSP[V,D], assignment: Dict[V,D]) -> V:
+    '''度启发：挑和最多未安排变量有限制关系的变量'''
+    return max((v for v in csp.variables if v not in assignment),
+               key=lambda v: _unassigned_degree(csp, v, assignment))
+
+
+def mrv_degree(csp: CSP[V,D], assignment: Dict[V,D]) -> V:
+    '''先按MRV挑，剩余值一样多的再按度启发挑'''
+    return min((v for v in csp.variables if v not in assignment),
+               key=lambda v: (len(csp.remaining_values(v, assignment)),
+                              -_unassigned_degree(csp, v, assignment)))
+
+
+def domain_order(csp: CSP[V,D], variable: V, assignment: Dict[V,D]) -> List[D]:
+    '''按domain里的顺序尝试'''
+    return csp.current_domain(variable)
+
+
+def least_constraining_value(csp: CSP[V,D], variable: V, assignment: Dict[V,D]) -> List[D]:
+    '''最少约束值(LCV)：先试给邻居留下最多选择的值'''
+    unassigned: List[V] = [n for n in csp.neighbors[variable] if n not in assignment]
+
+    def choices_left(value: D) -> int:
+        assignment[variable] = value
+        # 试探的值还没有传播到邻居的剩余值里，要逐个检查
+        left: int = sum(len(csp.consistent_values(n, assignment)) for n in unassigned)
+        del assignment[variable]
+        return left
+    # sorted是稳定的，留下的选择一样多时保持原来的顺序
+    return sorted(csp.current_domain(variable), key=choices_left, reverse=True)
+
+
+def forward_checking(csp: CSP[V,D], store: DomainStore[V,D], variable: Optional[V],
+                     assignment: Dict[V,D]) -> bool:
+    '''前向检查：刚安排了variable，把它的未安排邻居里和目前安排冲突的值删掉'''
+    if variable is None:
+        # 对已经安排的每个变量都做一遍
+        return all(forward_checking(csp, store, v, assignment) for v in list(assignment))
+    for neighbor in csp.neighbors[variable]:
+        if neighbor in assignment:
+            continue
+        for index, value in store.indexed_values(neighbor):
+            assignment[neighbor] = value
+            if not csp.consistent(neighbor, assignment):
+                store.remove(neighbor, index)
+        del assignment[neighbor]
+        if store.size(neighbor) == 0:
+            return False
+    return True
+
+
+def _revise(csp: CSP[V,D], store: DomainStore[V,D], first: V, second: V) -> bool:
+    '''删掉first里在second中找不到支持的值，有删除就返回True。
+    只看这两个变量组成的部分安排，和已安排变量的冲突由前向检查负责'''
+    constraints: List[Constraint[V,D]] = csp.constraints_between(first, second)
+    second_values: List[D] = store.values(second)
+    pair: Dict[V,D] = {}
+    revised: bool = False
+    for index, value in store.indexed_values(first):
+        pair[first] = value
+        supported: bool = False
+        for other in second_values:
+            pair[second] = other
+            if all(c.check(first, pair) for c in constraints):
+                supported = True
+                break
+        if not supported:
+            store.remove(first, index)
+            revised = True
+    return revised
+
+
+def mac(csp: CSP[V,D], store: DomainStore[V,D], variable: Optional[V],
+        assignment: Dict[V,D]) -> bool:
+    '''维护弧相容(MAC)：用AC-3把传播一直做到不动为止'''
+    if variable is None:
+        # 所有未安排变量之间的弧，外加已安排变量的前向检查
+        if not forward_checking(csp, store, None, assignment):
+            return False
+        arcs: Deque[Tuple[V,V]] = deque((x, y) for x in csp.variables if x not in assignment
+                                        for y in csp.neighbors[x] if y not in assignment)
+    else:
+        if not forward_checking(csp, store, variable, assignment):
+            return False
+        arcs = deque((x, y) for y in csp.neighbors[variable] if y not in assignment
+                     for x in csp.neighbors[y] if x not in assignment)
+    queued: Set[Tuple[V,V]] = set(arcs)
+    while arcs:
+        arc: Tuple[V,V] = arcs.popleft()
+        queued.discard(arc)
+        first, second = arc
+        if _revise(csp, store, first, second):
+            if store.size(first) == 0:
+                return False
+            for neighbor in csp.neighbors[first]:
+                if neighbor != second and neighbor not in assignment and \
+                        (neighbor, first) not in queued:
+                    arcs.append((neighbor, first))
+                    queued.add((neighbor, first))
+    return True
@@ -0,0 +1,149 @@
+'''比较CSP求解时不同的变量选择和取值顺序策略。
+对每个问题、每种策略组合，记录尝试过的赋值次数和耗时。
+再比较前向检查和MAC在更大的问题上的表现，
+以及冲突导向回跳和普通回溯访问的节点数。
+
+用法：
+    python csp_benchmark.py
+'''
+import random
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from csp import (CSP, BinaryConstraint, first_unassigned, minimum_remaining_values, degree,
+                 mrv_degree, domain_order, least_constraining_value,
+                 forward_checking, mac)
+from queens import queens_csp
+from map_coloring import australia_csp
+from send_more_money import send_more_money_csp
+from cryptarithmetic import cryptarithmetic_csp
+from circuit_board import circuit_board_csp, generate_grid
+from word_search import word_search_csp, generate_grid as generate_letters
+
+PROBLEMS: Dict[str, Callable[[], CSP]] = {
+    '8 queens': lambda: queens_csp(8),
+    '16 queens': lambda: queens_csp(16),
+    'Australia map': australia_csp,
+    'SEND+MORE=MONEY': send_more_money_csp,
+    'SEND+MORE columns': lambda: cryptarithmetic_csp('SEND + MORE = MONEY'),
+}
+
+SELECTORS: Dict[str, Callable] = {
+    'first': first_unassigned,
+    'mrv': minimum_remaining_values,
+    'degree': degree,
+    'mrv+degree': mrv_degree,
+}
+
+ORDERERS: Dict[str, Callable] = {
+    'domain': domain_order,
+    'lcv': least_constraining_value,
+}
+
+INFERENCES: Dict[str, Optional[Callable]] = {
+    'none': None,
+    'fc': forward_checking,
+    'mac': mac,
+}
+
+# 不做传播的话这些问题要跑很久，只用来比较传播方式
+PROPAGATION_PROBLEMS: Dict[str, Callable[[], CSP]] = {
+    '30 queens': lambda: queens_csp(30),
+    '20 queens': lambda: queens_csp(20),
+}
+
+
+class TableConstraint(BinaryConstraint[int,int]):
+    '''用表格列出不允许的取值组合'''
+    def __init__(self, first: int, second: int, forbidden: Set[Tuple[int,int]]) -> None:
+        super().__init__(first, second)
+        self.forbidden: Set[Tuple[int,int]] = forbidden
+
+    def allowed(self, first_value: int, second_value: int) -> bool:
+        return (first_value, second_value) not in self.forbidden
+
+
+def random_binary_csp(seed: int, n: int = 30, d: int = 6, density: float = 0.15,
+                      tightness: float = 0.3) -> CSP[int,int]:
+    '''随机二元CSP：每对变量以density的概率有限制，每个限制禁止tightness比例的取值组合'''
+    generator: random.Random = random.Random(seed)
+    variables: List[int] = list(range(n))
+    csp: CSP[int,int] = CSP(variables, {v: list(range(d)) for v in variables})
+    for first in variables:
+        for second in range(first + 1, n):
+            if generator.random() < density:
+                forbidden = {(x, y) for x in range(d) for y in range(d)
+                             if generator.random() < tightness}
+                csp.add_constraint(TableConstraint(first, second, forbidden))
+    return csp
+
+
+BACKJUMPING_PROBLEMS: Dict[str, Callable[[], CSP]] = {
+    # 六块芯片正好铺满6x5的板子，按顺序回溯要试十几万次。
+    # 失败的芯片的摆放覆盖了整块板子，冲突集总是包括前面所有的芯片，回跳和回溯试的次数一样
+    'circuit 6x5': lambda: circuit_board_csp(generate_grid(6, 5),
+                                             ['A12', 'B21', 'C42', 'D12', 'E42', 'F42']),
+    'circuit 7x7': lambda: circuit_board_csp(generate_grid(7, 7),
+                                             ['A23', 'B33', 'C32', 'D41', 'E14', 'F22', 'G34']),
+    'word search 7x7': lambda: word_search_csp(generate_letters(7, 7),
+                                               ['MATTHEW', 'JOE', 'MARY', 'SARAH', 'SALLY',
+                                                'ANNE', 'BOB', 'CHRIS', 'DAVID', 'EVE']),
+    'random binary 1': lambda: random_binary_csp(1),
+    'random binary 4': lambda: random_binary_csp(4),
+}
+
+
+def run(problem: str, selector: str, orderer: str,
+        inference: str = 'none') -> Tuple[bool, int, float]:
+    csp: CSP = {**PROBLEMS, **PROPAGATION_PROBLEMS}[problem]()
+    begin: float = perf_counter()
+    solution = csp.backtracking_search(select_variable=SELECTORS[selector],
+                                       order_values=ORDERERS[orderer],
+                                       inference=INFERENCES[inference])
+    return solution is not None, csp.assignments_tried, perf_counter() - begin
+
+
+def main(problems: List[str] = None) -> None:
+    print(f'{"problem":<18} {"variable":<11} {"value":<7} {"solved":>6} '
+          f'{"assignments":>12} {"seconds":>8}')
+    for problem in problems or list(PROBLEMS):
+        for selector in SELECTORS:
+            for orderer in ORDERERS:
+                solved, tried, seconds = run(problem, selector, orderer)
+                print(f'{problem:<18} {selector:<11} {orderer:<7} {str(solved):>6} '
+                      f'{tried:>12} {seconds:>8.3f}')
+
+
+def propagation(problems: List[str] = None) -> None:
+    print(f'{"problem":<18} {"inference":<9} {"solved":>6} {"assignments":>12} {"seconds":>8}')
+    for problem in problems or list(PROPAGATION_PROBLEMS):
+        for inference in ('fc', 'mac'):
+            solved, tried, seconds = run(problem, 'mrv', 'domain', inference)
+            print(f'{problem:<18} {inference:<9} {str(solved):>6} {tried:>12} {seconds:>8.3f}')
+
+
+def backjumping(problems: List[str] = None, seconds: float = 10.0) -> None:
+    '''普通回溯最多跑seconds秒，超时的记为没有解出来'''
+    print(f'{"problem":<18} {"search":<12} {"solved":>6} {"assignments":>12} '
+          f'{"seconds":>8} {"nogood hits":>11}')
+    for problem in problems or list(BACKJUMPING_PROBLEMS):
+        csp: CSP = BACKJUMPING_PROBLEMS[problem]()
+        begin: float = perf_counter()
+        solution = csp.backtracking_search(
+            should_stop=lambda: perf_counter() - begin > seconds)
+        print(f'{problem:<18} {"backtracking":<12} {str(solution is not None):>6} '
+              f'{csp.assignments_tried:>12} {perf_counter() - begin:>8.3f} {"-":>11}')
+        csp = BACKJUMPING_PROBLEMS[problem]()
+        begin = perf_counter()
+        solution = csp.backjumping_search()
+        print(f'{problem:<18} {"backjumping":<12} {str(solution is not None):>6} '
+              f'{csp.assignments_tried:>12} {perf_counter() - begin:>8.3f} '
+              f'{csp.nogoods.hits:>11}')
+
+
+if __name__ == '__main__':
+    main()
+    print()
+    propagation()
+    print()
+    backjumping()
@@ -0,0 +1,208 @@
+'''用Knuth的Dancing Links实现Algorithm X，解精确覆盖问题。
+每个变量（芯片、单词）是一个主要列，必须正好被覆盖一次；
+每个格子是一个次要列，最多被覆盖一次，也就是摆放不能重叠。
+每一行是某个变量的一个摆放，覆盖这个变量的列和它占的格子的列。
+节点之间的链接都存在整数列表里，删除和恢复一列只是改几个下标。
+'''
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+from grid_mask import mask_cells
+
+# 变量类型
+V = TypeVar('V')
+# 摆放类型：GridLocation的列表，或者grid_mask里的整数mask
+P = TypeVar('P')
+
+# 根节点
+ROOT = 0
+
+
+class ExactCover:
+    '''primary里的列必须正好覆盖一次，secondary里的列最多覆盖一次'''
+
+    def __init__(self, primary: Iterable[Hashable], secondary: Iterable[Hashable] = ()) -> None:
+        self._column_of: Dict[Hashable, int] = {}
+        # 每个节点的左右上下邻居和它所在的列，第0个是根节点，然后是各列的列头
+        self._left: List[int] = [0]
+        self._right: List[int] = [0]
+        self._up: List[int] = [0]
+        self._down: List[int] = [0]
+        self._column: List[int] = [0]
+        # 节点属于哪一行，列头是-1
+        self._row: List[int] = [-1]
+        # 每一列还剩几个节点
+        self._size: List[int] = [0]
+        for item in primary:
+            header: int = self._new_header(item)
+            # 主要列接在根节点的左边
+            self._left[header] = self._left[ROOT]
+            self._right[header] = ROOT
+            self._right[self._left[ROOT]] = header
+            self._left[ROOT] = header
+        for item in secondary:
+            # 次要列不在根节点的链表里，所以不会被选来覆盖
+            self._new_header(item)
+        self.rows: List[Hashable] = []
+        # 最近一次搜索访问过多少个节点
+        self.nodes_visited: int = 0
+
+    def _new_node(self, column: int, row: int) -> int:
+        node: int = len(self._left)
+        self._left.append(node)
+        self._right.append(node)
+        self._up.append(node)
+        self._down.append(node)
+        self._column.append(column)
+        self._row.append(row)
+        self._size.append(0)
+        return node
+
+    def _new_header(self, item: Hashable) -> int:
+        if item in self._column_of:
+            raise ValueError(f'Duplicate item {item!r}.')
+        header: int = self._new_node(len(self._left), -1)
+        self._column_of[item] = header
+        return header
+
+    def add_row(self, name: Hashable, items: Iterable[Hashable]) -> None:
+        '''加一行，name是找到解时返回的东西，items是这一行覆盖的列'''
+        row: int = len(self.rows)
+        self.rows.append(name)
+        first: Optional[int] = None
+        for item in items:
+            header: int = self._column_of[item]
+            node: int = self._new_node(header, row)
+            # 接在这一列的最下面
+            self._up[node] = self._up[header]
+            self._down[node] = header
+            self._down[self._up[header]] = node
+            self._up[header] = node
+            self._size[header] += 1
+            if first is None:
+                first = node
+            else:
+                # 接在这一行的最右边
+                self._left[node] = self._left[first]
+                self._right[node] = first
+                self._right[self._left[first]] = node
+                self._left[first] = node
+
+    def _cover(self, header: int) -> None:
+        left, right, up, down = self._left, self._right, self._up, self._down
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i: int = down[header]
+        while i != header:
+            j: int = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                self._size[self._column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, header: int) -> None:
+        left, right, up, down = self._left, self._right, self._up, self._down
+        i: int = up[header]
+        while i != header:
+            j: int = left[i]
+            while j != i:
+                self._size[self._column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def _choose_column(self) -> int:
+        '''剩下节点最少的主要列，最容易失败的先处理'''
+        best: int = self._right[ROOT]
+        header: int = self._right[best]
+        while header != ROOT:
+            if self._size[header] < self._size[best]:
+                best = header
+            header = self._right[header]
+        return best
+
+    def solutions(self) -> Iterator[List[Hashable]]:
+        '''一个一个地产生所有的解，每个解是选中的那些行的name'''
+        self.nodes_visited = 0
+        chosen: List[int] = []
+        yield from self._search(chosen)
+
+    def _search(self, chosen: List[int]) -> Iterator[List[Hashable]]:
+        right, left, down, column = self._right, self._left, self._down, self._column
+        if right[ROOT] == ROOT:
+            yield [self.rows[self._row[node]] for node in chosen]
+            return
+        header: int = self._choose_column()
+        self._cover(header)
+        node: int = down[header]
+        while node != header:
+            self.nodes_visited += 1
+            chosen.append(node)
+            j: int = right[node]
+            while j != node:
+                self._cover(column[j])
+                j = right[j]
+            yield from self._search(chosen)
+            j = left[node]
+            while j != node:
+                self._uncover(column[j])
+                j = left[j]
+            chosen.pop()
+            node = down[node]
+        self._uncover(header)
+
+    def solve(self) -> Optional[List[Hashable]]:
+        '''第一个解，没有解就返回None'''
+        return next(self.solutions(), None)
+
+
+def _cells(placement) -> Iterable[Hashable]:
+    '''摆放占的格子：mask就是每一位的下标，列表就是里面的每个格子'''
+    if isinstance(placement, int):
+        return (index for index, _ in mask_cells(placement, 1))
+    return placement
+
+
+def placement_search(domains: Dict[V, Sequence[P]]) -> Optional[Dict[V, P]]:
+    '''给每个变量从它的domain里挑一个摆放，摆放之间不能重叠。
+    domain就是generate_domain或者generate_mask_domain生成的那种'''
+    # 变量和格子分别包一层，免得变量和格子的值碰巧一样
+    cells: Dict[Hashable, None] = {}
+    for domain in domains.values():
+        for placement in domain:
+            cells.update((('cell', cell), None) for cell in _cells(placement))
+    problem: ExactCover = ExactCover((('variable', v) for v in domains), cells)
+    for variable, domain in domains.items():
+        for index, placement in enumerate(domain):
+            problem.add_row((variable, index),
+                            [('variable', variable), *(('cell', cell) for cell in _cells(placement))])
+    solution: Optional[List[Hashable]] = problem.solve()
+    if solution is None:
+        return None
+    return {variable: domains[variable][index] for variable, index in solution}
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+    from csp import minimum_remaining_values
+    import circuit_board
+
+    # 16块芯片正好铺满10x10的板子，普通回溯15秒内找不到解
+    grid = circuit_board.generate_grid(10, 10)
+    chips: List[str] = ['A43', 'B33', 'C13', 'D12', 'E22', 'F22', 'G31', 'H42',
+                        'I43', 'J13', 'K21', 'L21', 'M23', 'N43', 'O23', 'P43']
+    begin: float = perf_counter()
+    solution = circuit_board.solve_circuit_board(grid, chips, backend='dlx')
+    print(f'Dancing Links: {perf_counter() - begin:.3f}s')
+    begin = perf_counter()
+    circuit_board.circuit_board_mask_csp(grid, chips).backtracking_search(
+        select_variable=minimum_remaining_values)
+    print(f'Backtracking with MRV: {perf_counter() - begin:.3f}s')
+    for chip, locations in solution.items():
+        for location in locations:
+            grid[location.row][location.column] = chip[0]
+    circuit_board.display_grid(grid)
@@ -0,0 +1,95 @@
+'''用整数的二进制位表示格子上的一组格子，第row行第column列是第row*width+column位。
+两个摆放有没有重叠只要做一次按位与。
+PlacementMasks只保存每个摆放的形状编号和起点，用到的时候才把形状移到起点，
+所以100x100的板子上几万个摆放也只占很少的内存。
+'''
+from array import array
+from typing import Dict, Iterator, List, Sequence, Set, Tuple, Union
+
+from csp import Constraint
+
+
+def cell_index(row: int, column: int, width: int) -> int:
+    '''第row行第column列的格子在mask里是第几位'''
+    return row * width + column
+
+
+def line_shape(length: int, step: int) -> int:
+    '''从第0位开始、每隔step位一个格子、一共length个格子的一条线'''
+    shape: int = 0
+    for k in range(length):
+        shape |= 1 << (k * step)
+    return shape
+
+
+def rectangle_shape(rows: int, columns: int, width: int) -> int:
+    '''左上角在第0位的rows行columns列的矩形'''
+    row_bits: int = (1 << columns) - 1
+    shape: int = 0
+    for r in range(rows):
+        shape |= row_bits << (r * width)
+    return shape
+
+
+def mask_cells(mask: int, width: int) -> Iterator[Tuple[int, int]]:
+    '''按从上到下、从左到右的顺序给出mask里每个格子的(行, 列)'''
+    while mask:
+        lowest: int = mask & -mask
+        yield divmod(lowest.bit_length() - 1, width)
+        mask ^= lowest
+
+
+class PlacementMasks(Sequence[int]):
+    '''一个变量所有可能的摆放，每个摆放是一个整数mask'''
+
+    def __init__(self) -> None:
+        self._shapes: List[int] = []
+        self._shape_ids: Dict[int, int] = {}
+        # 第i个摆放用的形状和它的起点
+        self._shape_of: array = array('l')
+        self._starts: array = array('l')
+
+    def add(self, shape: int, start: int) -> None:
+        '''把形状的第0位放到start位上'''
+        shape_id: int = self._shape_ids.setdefault(shape, len(self._shapes))
+        if shape_id == len(self._shapes):
+            self._shapes.append(shape)
+        self._shape_of.append(shape_id)
+        self._starts.append(start)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._shapes[self._shape_of[index]] << self._starts[index]
+
+    def __iter__(self) -> Iterator[int]:
+        shapes: List[int] = self._shapes
+        for shape_id, start in zip(self._shape_of, self._starts):
+            yield shapes[shape_id] << start
+
+
+class MaskOverlapConstraint(Constraint[str, int]):
+    '''所有变量的摆放都不能重叠'''
+    def satisfied(self, assignment: Dict[str, int]) -> bool:
+        occupied: int = 0
+        for variable in self.variables:
+            mask: int = assignment.get(variable, 0)
+            if occupied & mask:
+                return False
+            occupied |= mask
+        return True
+
+    def check(self, variable: str, assignment: Dict[str, int]) -> bool:
+        mask: int = assignment[variable]
+        for other in self.variables:
+            if other != variable and assignment.get(other, 0) & mask:
+                return False
+        return True
+
+    def conflicts(self, variable: str, assignment: Dict[str, int]) -> Set[str]:
+        mask: int = assignment[variable]
+        return {other for other in self.variables
+                if other != variable and assignment.get(other, 0) & mask}
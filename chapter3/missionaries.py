@@ -1,60 +1,55 @@
-from generic_search import Node,bfs,node_to_path
+import os
+import sys
+from typing import Iterator, List, Optional, Tuple
+
+# generic_search在chapter2里，和chapter4的graph.py一样把仓库的根目录加到路径上
+classic_dir = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0,classic_dir)
+
+from chapter2.generic_search import bfs,node_to_path,compact_bfs,PathHandle
 
 MAX_NUM = 3
 
 class MCState:
-    def __init__(self,missionaries:int,cannibals:int,boat:bool):
+    def __init__(self,missionaries:int,cannibals:int,boat:bool,max_num:int=MAX_NUM):
         # 西岸的传教士和食人族的数量
         self.wm = missionaries
         self.wc = cannibals
+        self.max_num = max_num
         # 东岸的数量
-        self.em = MAX_NUM - self.wm
-        self.ec = MAX_NUM - self.wc
+        self.em = max_num - self.wm
+        self.ec = max_num - self.wc
         # True表示船在西岸，否则在东岸
         self.boat = boat
     
     @property
     def is_legal(self):
-        if self.wm < self.wc and self.wm > 0:
-            return False
-        if self.em < self.ec and self.em > 0:
-            return False
-        return True
+        return legal(self.wm,self.wc,self.max_num)
 
         
     def goal_test(self):
         '''检查是否实现了目标'''
-        return self.is_legal and self.em == MAX_NUM and self.ec == MAX_NUM
+        return self.is_legal and self.em == self.max_num and self.ec == self.max_num
     
     def successors(self):
-        sucs = []
-        # 如果船在西岸
-        if self.boat:
-            if self.wm > 1:
-                sucs.append(MCState(self.wm-2,self.wc,not self.boat))
-            if self.wm > 0:
-                sucs.append(MCState(self.wm-1,self.wc,not self.boat))
-            if self.wc > 1:
-                sucs.append(MCState(self.wm,self.wc-2,not self.boat))
-            if self.wc > 0:
-                sucs.append(MCState(self.wm,self.wc-1,not self.boat))
-            if self.wm > 0 and self.wc > 0:
-                sucs.append(MCState(self.wm-1,self.wc-1,not self.boat))
-        # 如果船在东岸
-        else:
-            if self.em > 1:
-                sucs.append(MCState(self.wm+2,self.wc,not self.boat))
-            if self.em > 0:
-                sucs.append(MCState(self.wm+1,self.wc,not self.boat))
-            if self.ec > 1:
-                sucs.append(MCState(self.wm,self.wc+2,not self.boat))
-            if self.ec > 0:
-                sucs.append(MCState(self.wm,self.wc+1,not self.boat))
-            if self.em > 0 and self.ec > 0:
-                sucs.append(MCState(self.wm+1,self.wc+1,not self.boat))
-        return [x for x in sucs if x.is_legal]
+        # 先用数字判断合不合法，合法的才创建对象
+        # 船在西岸时人从西岸走，否则从东岸回来
+        sign = -1 if self.boat else 1
+        return [MCState(self.wm+sign*m,self.wc+sign*c,not self.boat,self.max_num)
+                for m,c in ((2,0),(1,0),(0,2),(0,1),(1,1))
+                if (m <= (self.wm if self.boat else self.em) and
+                    c <= (self.wc if self.boat else self.ec) and
+                    legal(self.wm+sign*m,self.wc+sign*c,self.max_num))]
 
+    # 没有__eq__和__hash__的话，bfs的explored集合认不出重复的状态
+    def __eq__(self,other):
+        if not isinstance(other,MCState):
+            return NotImplemented
+        return (self.wm,self.wc,self.boat,self.max_num) == \
+            (other.wm,other.wc,other.boat,other.max_num)
 
+    def __hash__(self):
+        return hash((self.wm,self.wc,self.boat,self.max_num))
 
     def __str__(self):
         return ("On the west bank there are {} missionaries and {} cannibals\n"
@@ -64,6 +59,68 @@ class MCState:
                 'west' if self.boat else 'east')
 
 
+def legal(wm:int,wc:int,max_num:int)->bool:
+    '''两岸都没有传教士比食人族少的情况（没有传教士时不算）'''
+    if wm < wc and wm > 0:
+        return False
+    em = max_num - wm
+    if em < max_num - wc and em > 0:
+        return False
+    return True
+
+
+class MissionariesPuzzle:
+    '''任意人数、任意船容量的传教士和食人族问题。
+    状态是一个整数：(西岸传教士*(max_num+1) + 西岸食人族)*2 + 船在不在西岸，
+    作为集合和字典的键比对象快得多，也省内存'''
+    def __init__(self,max_num:int=MAX_NUM,capacity:int=2)->None:
+        self.max_num:int = max_num
+        self.capacity:int = capacity
+        # 船上至少一个人，最多capacity个人
+        self.moves:List[Tuple[int,int]] = [(m,c) for m in range(capacity+1)
+                                           for c in range(capacity+1-m) if m+c > 0]
+        self.start:int = self.pack(max_num,max_num,True)
+        self.goal:int = self.pack(0,0,False)
+
+    def pack(self,wm:int,wc:int,boat:bool)->int:
+        return (wm*(self.max_num+1)+wc)*2+boat
+
+    def unpack(self,state:int)->MCState:
+        people,boat = divmod(state,2)
+        wm,wc = divmod(people,self.max_num+1)
+        return MCState(wm,wc,bool(boat),self.max_num)
+
+    def goal_test(self,state:int)->bool:
+        return state == self.goal
+
+    def successors(self,state:int)->List[int]:
+        people,boat = divmod(state,2)
+        wm,wc = divmod(people,self.max_num+1)
+        max_num = self.max_num
+        # 船在西岸时人从西岸走，否则从东岸回来
+        if boat:
+            sign,have_m,have_c = -1,wm,wc
+        else:
+            sign,have_m,have_c = 1,max_num-wm,max_num-wc
+        sucs:List[int] = []
+        for m,c in self.moves:
+            if m > have_m or c > have_c:
+                continue
+            nm = wm+sign*m
+            nc = wc+sign*c
+            if legal(nm,nc,max_num):
+                sucs.append((nm*(max_num+1)+nc)*2+(1-boat))
+        return sucs
+
+    def solve(self)->Optional[PathHandle[int]]:
+        '''用compact_bfs找最少的过河次数，结果的explored_count是发现过的状态数'''
+        return compact_bfs(self.start,self.goal_test,self.successors)
+
+    def path(self,handle:PathHandle[int])->Iterator[MCState]:
+        for state in handle.to_path():
+            yield self.unpack(state)
+
+
 def display_solution(path):
     '''这是用于打印解决方案给人看的函数'''
     if len(path) == 0:
@@ -88,4 +145,15 @@ if __name__ == '__main__':
         print('No solution')
     else:
         path = node_to_path(solution)
-        display_solution(path)
\ No newline at end of file
+        display_solution(path)
+
+    from time import perf_counter
+    for max_num,capacity in ((3,2),(100,4),(1000,5)):
+        puzzle = MissionariesPuzzle(max_num,capacity)
+        begin = perf_counter()
+        handle = puzzle.solve()
+        if handle is None:
+            print(f'{max_num} missionaries, {capacity} seats: no solution')
+            continue
+        print(f'{max_num} missionaries, {capacity} seats: {len(handle.to_path())-1} crossings, '
+              f'{handle.explored_count} states explored, {perf_counter()-begin:.3f}s')
@@ -0,0 +1,149 @@
+'''用多个进程一起解CSP。
+parallel_search把前几个变量所有一致的取值组合分给进程池，每个进程搜索其中一棵子树；
+portfolio_search让几种不同的搜索策略同时跑，谁先有结果就用谁的。
+一个进程找到解以后通过共享的Event通知其他进程放弃搜索。
+CSP和里面的Constraint、选择变量和取值顺序的函数都必须能被pickle。
+'''
+import multiprocessing
+import random
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from csp import CSP, Inference, ValueOrderer, VariableSelector, V, D
+
+# 下面这些只在工作进程里使用，由_init_worker设置
+_stop_event = None
+_csp: Optional[CSP] = None
+_select_variable: Optional[VariableSelector] = None
+_order_values: Optional[ValueOrderer] = None
+_inference: Optional[Inference] = None
+
+
+class Strategy(NamedTuple):
+    '''portfolio_search里的一种搜索策略'''
+    select_variable: Optional[VariableSelector] = None
+    order_values: Optional[ValueOrderer] = None
+    inference: Optional[Inference] = None
+
+
+class ShuffledOrder:
+    '''按固定的随机种子打乱取值顺序，不同的种子走不同的搜索路线'''
+    def __init__(self, seed: int) -> None:
+        self.seed: int = seed
+
+    def __call__(self, csp: CSP[V,D], variable: V, assignment: Dict[V,D]) -> List[D]:
+        values: List[D] = list(csp.current_domain(variable))
+        # 同一个变量在同样的深度总是得到同样的顺序
+        random.Random(f'{self.seed}-{variable}-{len(assignment)}').shuffle(values)
+        return values
+
+
+def split_assignments(csp: CSP[V,D], depth: int) -> List[Dict[V,D]]:
+    '''前depth个变量所有一致的取值组合，每个组合是一棵子树的根'''
+    variables: List[V] = csp.variables[:depth]
+    partials: List[Dict[V,D]] = [{}]
+    for variable in variables:
+        extended: List[Dict[V,D]] = []
+        for partial in partials:
+            for value in csp.domains[variable]:
+                assignment: Dict[V,D] = dict(partial)
+                assignment[variable] = value
+                if csp.consistent(variable, assignment):
+                    extended.append(assignment)
+        partials = extended
+    return partials
+
+
+def _init_worker(stop_event, csp: Optional[CSP], select_variable: Optional[VariableSelector],
+                 order_values: Optional[ValueOrderer], inference: Optional[Inference]) -> None:
+    global _stop_event, _csp, _select_variable, _order_values, _inference
+    _stop_event = stop_event
+    _csp = csp
+    _select_variable = select_variable
+    _order_values = order_values
+    _inference = inference
+
+
+def _solve_subtree(assignment: Dict) -> Tuple[Optional[Dict], bool]:
+    '''返回解，以及搜索是不是被别的进程叫停的'''
+    solution: Optional[Dict] = _csp.backtracking_search(
+        assignment, _select_variable, _order_values, _inference,
+        should_stop=_stop_event.is_set)
+    return solution, _stop_event.is_set()
+
+
+def _solve_with(csp: CSP, strategy: Strategy) -> Tuple[Optional[Dict], bool]:
+    solution: Optional[Dict] = csp.backtracking_search(
+        None, strategy.select_variable, strategy.order_values, strategy.inference,
+        should_stop=_stop_event.is_set)
+    return solution, _stop_event.is_set()
+
+
+def _first_solution(futures: List[Future], stop_event,
+                    complete: bool) -> Optional[Tuple[int, Dict]]:
+    '''等到有一个任务找到解，通知其他任务停下来。
+    complete表示每个任务都搜索整个问题，那么一个任务搜完了没找到解就说明无解'''
+    indexes: Dict[Future, int] = {future: index for index, future in enumerate(futures)}
+    try:
+        for future in as_completed(futures):
+            solution, stopped = future.result()
+            if solution is not None:
+                return indexes[future], solution
+            if complete and not stopped:
+                return None
+        return None
+    finally:
+        stop_event.set()
+        for future in futures:
+            future.cancel()
+
+
+def parallel_search(csp: CSP[V,D], split_depth: int = 2, workers: Optional[int] = None,
+                    select_variable: Optional[VariableSelector] = None,
+                    order_values: Optional[ValueOrderer] = None,
+                    inference: Optional[Inference] = None) -> Optional[Dict[V,D]]:
+    '''把前split_depth个变量的取值组合分给workers个进程，返回第一个找到的解'''
+    stop_event = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(stop_event, csp, select_variable,
+                                       order_values, inference)) as pool:
+        futures: List[Future] = [pool.submit(_solve_subtree, assignment)
+                                 for assignment in split_assignments(csp, split_depth)]
+        result: Optional[Tuple[int, Dict[V,D]]] = _first_solution(futures, stop_event, False)
+    return None if result is None else result[1]
+
+
+def portfolio_search(csp: CSP[V,D], strategies: List[Strategy],
+                     workers: Optional[int] = None) -> Optional[Tuple[int, Dict[V,D]]]:
+    '''每种策略一个任务同时搜索，返回最先找到解的策略的下标和解，无解返回None'''
+    stop_event = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=workers or len(strategies),
+                             initializer=_init_worker,
+                             initargs=(stop_event, None, None, None, None)) as pool:
+        futures: List[Future] = [pool.submit(_solve_with, csp, strategy)
+                                 for strategy in strategies]
+        return _first_solution(futures, stop_event, True)
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+    from csp import forward_checking, mac, minimum_remaining_values
+    from queens import queens_csp
+
+    n: int = 20
+    begin: float = perf_counter()
+    solution = queens_csp(n).backtracking_search()
+    print(f'{n} queens, one process: {perf_counter() - begin:.2f}s')
+    begin = perf_counter()
+    solution = parallel_search(queens_csp(n), split_depth=2)
+    print(f'{n} queens, parallel_search: {perf_counter() - begin:.2f}s')
+
+    strategies: List[Strategy] = [
+        Strategy(),
+        Strategy(minimum_remaining_values, None, forward_checking),
+        Strategy(minimum_remaining_values, None, mac),
+    ] + [Strategy(None, ShuffledOrder(seed), forward_checking) for seed in range(3)]
+    begin = perf_counter()
+    result = portfolio_search(queens_csp(60), strategies)
+    if result is not None:
+        print(f'60 queens, portfolio: strategy {result[0]} won in {perf_counter() - begin:.2f}s')
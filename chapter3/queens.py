@@ -1,6 +1,6 @@
-from typing import List,Dict,Optional
+from typing import List,Dict,Optional,Set
 
-from csp import Constraint,CSP
+from csp import Constraint,CSP,Symmetry
 
 class QueensConstraint(Constraint[int,int]):
     def __init__(self,columns: List[int]) -> None:
@@ -22,19 +22,50 @@ class QueensConstraint(Constraint[int,int]):
         # 没有冲突
         return True
 
-if __name__ == '__main__':
-    # 列是变量
-    columns: List[int] = [1,2,3,4,5,6,7,8]
-    # 行是地域
-    rows: Dict[int,List[int]] = {}
-    for column in columns:
-        rows[column] = [1,2,3,4,5,6,7,8]
+    def check(self, variable: int, assignment: Dict[int,int]) -> bool:
+        # 只需要比较刚放下的这个皇后和其他皇后
+        row: int = assignment[variable]
+        for column, other_row in assignment.items():
+            if column != variable and (other_row == row or
+                                       abs(column-variable) == abs(other_row-row)):
+                return False
+        return True
+
+    def conflicts(self, variable: int, assignment: Dict[int,int]) -> Set[int]:
+        # 能攻击到刚放下的这个皇后的那些皇后
+        row: int = assignment[variable]
+        return {column for column, other_row in assignment.items()
+                if column != variable and (other_row == row or
+                                           abs(column-variable) == abs(other_row-row))}
+
+class QueensMirrorSymmetry(Symmetry[int,int]):
+    '''上下翻转棋盘得到的还是解，所以只让第一列的皇后放在上半边。
+    n是奇数时放在正中间那一行的解翻转以后还是这样放的，只算一次'''
+    def __init__(self, n: int) -> None:
+        self.n: int = n
+
+    def allowed(self, assignment: Dict[int,int]) -> bool:
+        return assignment.get(1, 1) <= (self.n+1) // 2
+
+    def multiplicity(self, solution: Dict[int,int]) -> int:
+        return 1 if 2*solution[1] == self.n+1 else 2
+
+def queens_csp(n: int = 8) -> CSP[int,int]:
+    '''n皇后问题：列是变量，行是地域'''
+    columns: List[int] = list(range(1,n+1))
+    rows: Dict[int,List[int]] = {column: list(range(1,n+1)) for column in columns}
     csp: CSP[int,int] = CSP(columns,rows)
     csp.add_constraint(QueensConstraint(columns))
+    return csp
+
+
+if __name__ == '__main__':
+    csp: CSP[int,int] = queens_csp(8)
     solution: Optional[Dict[int,int]] = csp.backtracking_search()
     if solution is None:
         print('No solution')
     else:
         print(solution)
-
-    
\ No newline at end of file
+    # 用对称性数一数12皇后有多少个解
+    n: int = 12
+    print(f'{n} queens: {queens_csp(n).count_solutions(symmetry=QueensMirrorSymmetry(n))} solutions')
@@ -30,17 +30,20 @@ class SendMoreMoneyConstraint(Constraint[str,int]):
         return True
 
 
-if __name__ == '__main__':
+def send_more_money_csp() -> CSP[str,int]:
     letters: List[str] = ['S','E','N','D','M','O','R','Y']
     possible_digits: Dict[str, List[int]] = \
         {letter:[0,1,2,3,4,5,6,7,8,9] for letter in letters}
     possible_digits['M'] = [1]
     csp: CSP[str,int] = CSP(letters,possible_digits)
     csp.add_constraint(SendMoreMoneyConstraint(letters))
+    return csp
+
+
+if __name__ == '__main__':
+    csp: CSP[str,int] = send_more_money_csp()
     solution: Optional[Dict[str,int]] = csp.backtracking_search()
     if solution is None:
         print('No solution')
     else:
         print(solution)
-
-    
\ No newline at end of file
@@ -0,0 +1,426 @@
+import unittest
+from typing import Dict
+
+from csp import (CSP, Constraint, BinaryConstraint, DomainStore, NogoodCache,
+                 first_unassigned, minimum_remaining_values, degree,
+                 mrv_degree, domain_order, least_constraining_value,
+                 forward_checking, mac)
+from queens import queens_csp, QueensMirrorSymmetry
+from map_coloring import australia_csp
+from send_more_money import send_more_money_csp
+import circuit_board
+import word_search
+import missionaries
+from bitboard_queens import BitboardQueens, BitboardQueensCSP
+from cryptarithmetic import cryptarithmetic_csp, parse_puzzle, solve_cryptarithmetic
+from dancing_links import ExactCover, placement_search
+from parallel_csp import Strategy, ShuffledOrder, parallel_search, portfolio_search
+
+SELECTORS = [first_unassigned, minimum_remaining_values, degree, mrv_degree]
+ORDERERS = [domain_order, least_constraining_value]
+
+
+def satisfies_all(csp: CSP, solution: Dict) -> bool:
+    '''检查一个完整的解是否满足所有的限制条件'''
+    if set(solution) != set(csp.variables):
+        return False
+    return all(constraint.satisfied(solution)
+               for constraints in csp.constraints.values()
+               for constraint in constraints)
+
+
+class DifferentConstraint(Constraint):
+    '''两个变量的值不能一样'''
+    def __init__(self, first, second) -> None:
+        super().__init__([first, second])
+        self.first = first
+        self.second = second
+
+    def satisfied(self, assignment: Dict) -> bool:
+        if self.first not in assignment or self.second not in assignment:
+            return True
+        return assignment[self.first] != assignment[self.second]
+
+
+class LessThanConstraint(BinaryConstraint):
+    '''first的值要比second小'''
+    def allowed(self, first_value, second_value) -> bool:
+        return first_value < second_value
+
+
+class HeuristicsTestCase(unittest.TestCase):
+    def test_every_combination_solves(self):
+        '''每种变量选择和取值顺序的组合都能找到合法的解'''
+        for make_csp in (lambda: queens_csp(8), australia_csp):
+            for select_variable in SELECTORS:
+                for order_values in ORDERERS:
+                    csp = make_csp()
+                    solution = csp.backtracking_search(select_variable=select_variable,
+                                                       order_values=order_values)
+                    self.assertTrue(satisfies_all(csp, solution))
+                    self.assertGreater(csp.assignments_tried, 0)
+
+    def test_mrv_tries_fewer_assignments(self):
+        '''16皇后用MRV尝试的赋值次数少得多'''
+        plain = queens_csp(16)
+        plain.backtracking_search()
+        mrv = queens_csp(16)
+        mrv.backtracking_search(select_variable=minimum_remaining_values)
+        self.assertLess(mrv.assignments_tried * 10, plain.assignments_tried)
+
+    def test_lcv_order(self):
+        '''LCV把给邻居留下选择最多的值排在前面'''
+        csp = australia_csp()
+        assignment = {'Western Australia': 'red', 'Queensland': 'green'}
+        order = least_constraining_value(csp, 'Northern Territory', assignment)
+        # NT取蓝色会让南澳大利亚无色可选
+        self.assertEqual(order[-1], 'blue')
+
+    def test_lcv_order_with_domain_store(self):
+        '''做约束传播时LCV也按试探的值给邻居留下的选择排序，不是原来的顺序'''
+        csp = queens_csp(8)
+        assignment = {1: 1}
+        csp.domain_store = DomainStore(csp.domains)
+        forward_checking(csp, csp.domain_store, None, assignment)
+        self.assertEqual(csp.domain_store.values(2), [3, 4, 5, 6, 7, 8])
+        # 第2列放在偶数行时后面几列一共还剩26个值，放在奇数行时只剩25个
+        self.assertEqual(least_constraining_value(csp, 2, assignment), [4, 6, 8, 3, 5, 7])
+        csp.domain_store = None
+        for inference in (forward_checking, mac):
+            tried = []
+            for order_values in ORDERERS:
+                csp = queens_csp(20)
+                csp.backtracking_search(select_variable=minimum_remaining_values,
+                                        order_values=order_values, inference=inference)
+                tried.append(csp.assignments_tried)
+            self.assertLess(tried[1], tried[0])
+
+
+class PropagationTestCase(unittest.TestCase):
+    def test_inference_solves(self):
+        '''前向检查和MAC找到的解都合法，搜索结束后不留下剩余值'''
+        for make_csp in (lambda: queens_csp(8), australia_csp, send_more_money_csp):
+            for inference in (forward_checking, mac):
+                csp = make_csp()
+                solution = csp.backtracking_search(select_variable=minimum_remaining_values,
+                                                   inference=inference)
+                self.assertTrue(satisfies_all(csp, solution))
+                self.assertIsNone(csp.domain_store)
+
+    def test_unsolvable(self):
+        '''3皇后无解'''
+        for inference in (None, forward_checking, mac):
+            self.assertIsNone(queens_csp(3).backtracking_search(inference=inference))
+
+    def test_propagation_prunes(self):
+        '''传播越强，尝试的赋值次数越少'''
+        tried = []
+        for inference in (None, forward_checking, mac):
+            csp = queens_csp(12)
+            csp.backtracking_search(inference=inference)
+            tried.append(csp.assignments_tried)
+        self.assertGreater(tried[0], tried[1])
+        self.assertGreaterEqual(tried[1], tried[2])
+
+    def test_domain_store_undo(self):
+        '''undo把mark之后删掉的值都恢复'''
+        store = DomainStore({'a': [1, 2, 3], 'b': [4, 5]})
+        mark = store.mark()
+        store.remove('a', 1)
+        store.remove('b', 0)
+        self.assertEqual(store.values('a'), [1, 3])
+        self.assertEqual(store.size('b'), 1)
+        store.undo(mark)
+        self.assertEqual(store.values('a'), [1, 2, 3])
+        self.assertEqual(store.values('b'), [4, 5])
+
+
+class IterativeSearchTestCase(unittest.TestCase):
+    def test_many_variables(self):
+        '''几万个变量的链也不会超过递归深度'''
+        n = 30000
+        csp = CSP(list(range(n)), {v: [0, 1] for v in range(n)})
+        for v in range(n - 1):
+            csp.add_constraint(DifferentConstraint(v, v + 1))
+        solution = csp.backtracking_search()
+        self.assertEqual(len(solution), n)
+        self.assertTrue(all(solution[v] != solution[v + 1] for v in range(n - 1)))
+
+    def test_partial_assignment_not_modified(self):
+        '''传进去的部分安排不会被修改，搜索从它出发'''
+        given = {'Western Australia': 'blue'}
+        csp = australia_csp()
+        solution = csp.backtracking_search(given)
+        self.assertEqual(given, {'Western Australia': 'blue'})
+        self.assertEqual(solution['Western Australia'], 'blue')
+        self.assertTrue(satisfies_all(csp, solution))
+
+
+class ConstraintCheckTestCase(unittest.TestCase):
+    def test_binary_direction(self):
+        '''二元限制不管从哪一边检查，方向都不会弄反'''
+        csp = CSP(['a', 'b', 'c'], {v: [1, 2, 3] for v in 'abc'})
+        csp.add_constraint(LessThanConstraint('a', 'b'))
+        csp.add_constraint(LessThanConstraint('b', 'c'))
+        self.assertTrue(csp.consistent('b', {'a': 1, 'b': 2}))
+        self.assertFalse(csp.consistent('a', {'a': 2, 'b': 2}))
+        self.assertFalse(csp.consistent('b', {'b': 3, 'c': 2}))
+        self.assertEqual(csp.backtracking_search(), {'a': 1, 'b': 2, 'c': 3})
+
+    def test_queens_check(self):
+        '''QueensConstraint.check和satisfied的结论一样'''
+        constraint = queens_csp(6).constraints[1][0]
+        placed = {1: 2, 2: 4, 3: 6}
+        for row in range(1, 7):
+            assignment = dict(placed)
+            assignment[4] = row
+            self.assertEqual(constraint.check(4, assignment), constraint.satisfied(assignment))
+
+
+class SolutionEnumerationTestCase(unittest.TestCase):
+    def test_count_queens(self):
+        '''8皇后有92个解，用对称性也数得对'''
+        self.assertEqual(queens_csp(8).count_solutions(), 92)
+        for n, expected in ((5, 10), (6, 4), (8, 92)):
+            self.assertEqual(queens_csp(n).count_solutions(symmetry=QueensMirrorSymmetry(n)),
+                             expected)
+
+    def test_iter_solutions(self):
+        '''产生的解各不相同、都合法，limit限制个数'''
+        csp = australia_csp()
+        solutions = list(csp.iter_solutions(inference=forward_checking))
+        self.assertEqual(len(solutions), 12)
+        self.assertEqual(len({tuple(sorted(s.items())) for s in solutions}), 12)
+        self.assertTrue(all(satisfies_all(csp, s) for s in solutions))
+        self.assertEqual(len(list(csp.iter_solutions(limit=5))), 5)
+        self.assertEqual(csp.count_solutions(limit=3), 3)
+
+    def test_limit_stops_early(self):
+        '''找够limit个解马上停下，不再去找下一个解；limit不大于0时什么都不搜索'''
+        plain = queens_csp(8)
+        plain.backtracking_search()
+        for count in (lambda csp: csp.count_solutions(limit=1),
+                      lambda csp: len(list(csp.iter_solutions(limit=1)))):
+            csp = queens_csp(8)
+            self.assertEqual(count(csp), 1)
+            self.assertEqual(csp.assignments_tried, plain.assignments_tried)
+        csp = queens_csp(8)
+        self.assertEqual(csp.count_solutions(limit=0), 0)
+        self.assertEqual(list(csp.iter_solutions(limit=0)), [])
+        self.assertEqual(csp.assignments_tried, 0)
+
+    def test_lazy(self):
+        '''第一个解马上就出来，不需要先找到所有的解'''
+        solutions = queens_csp(30).iter_solutions(select_variable=minimum_remaining_values,
+                                                  inference=forward_checking)
+        self.assertEqual(len(next(solutions)), 30)
+
+
+class ParallelSearchTestCase(unittest.TestCase):
+    def test_should_stop(self):
+        '''should_stop返回True时搜索放弃，返回None'''
+        self.assertIsNone(queens_csp(20).backtracking_search(should_stop=lambda: True))
+
+    def test_parallel_search(self):
+        '''分成子树并行搜索能找到合法的解，无解时返回None'''
+        csp = queens_csp(8)
+        solution = parallel_search(csp, split_depth=2, workers=2)
+        self.assertTrue(satisfies_all(csp, solution))
+        self.assertIsNone(parallel_search(queens_csp(3), workers=2))
+
+    def test_portfolio_search(self):
+        '''几种策略一起跑，返回赢的策略的下标和它的解'''
+        csp = queens_csp(10)
+        strategies = [Strategy(), Strategy(minimum_remaining_values, ShuffledOrder(1),
+                                           forward_checking)]
+        index, solution = portfolio_search(csp, strategies)
+        self.assertIn(index, (0, 1))
+        self.assertTrue(satisfies_all(csp, solution))
+        self.assertIsNone(portfolio_search(queens_csp(3), strategies))
+
+
+class BackjumpingTestCase(unittest.TestCase):
+    def test_solves(self):
+        '''回跳找到的解合法，无解时返回None'''
+        for make_csp in (lambda: queens_csp(8), australia_csp):
+            for select_variable in (None, minimum_remaining_values):
+                csp = make_csp()
+                self.assertTrue(satisfies_all(csp, csp.backjumping_search(
+                    select_variable=select_variable)))
+        self.assertIsNone(queens_csp(3).backjumping_search())
+
+    def test_jumps_over_irrelevant_variables(self):
+        '''x5只和x1冲突，失败时直接跳回x1，不用把中间的变量都试一遍'''
+        def make_csp():
+            variables = ['x1', 'x2', 'x3', 'x4', 'x5']
+            domains = {v: [0, 1, 2] for v in variables}
+            domains['x5'] = [0]
+            csp = CSP(variables, domains)
+            csp.add_constraint(DifferentConstraint('x1', 'x5'))
+            csp.add_constraint(DifferentConstraint('x2', 'x3'))
+            return csp
+        plain = make_csp()
+        expected = plain.backtracking_search()
+        jumping = make_csp()
+        self.assertEqual(jumping.backjumping_search(), expected)
+        self.assertLess(jumping.assignments_tried, plain.assignments_tried)
+
+    def test_non_binary_constraints(self):
+        '''每一列的加法涉及好几个变量，冲突集要包括它们全部，不能漏掉有解的分支'''
+        for puzzle in ('SEND + MORE = MONEY', 'BASE + BALL = GAMES', 'CROSS + ROADS = DANGER'):
+            expected = cryptarithmetic_csp(puzzle).backtracking_search()
+            csp = cryptarithmetic_csp(puzzle)
+            solution = csp.backjumping_search()
+            self.assertTrue(satisfies_all(csp, solution))
+            self.assertEqual(solution, expected)
+
+    def test_nogood_cache_eviction(self):
+        '''nogood满了淘汰最久没用过的，查到的是nogood里的其他变量'''
+        cache = NogoodCache(2)
+        cache.add({'a': 1, 'b': 2})
+        cache.add({'c': 3})
+        self.assertEqual(cache.conflicts('b', 2, {'a': 1, 'b': 2}), {'a'})
+        cache.add({'d': 4})
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.conflicts('c', 3, {'c': 3}), set())
+        self.assertEqual(cache.conflicts('a', 1, {'a': 1, 'b': 2}), {'b'})
+        self.assertEqual(cache.conflicts('a', 1, {'a': 1, 'b': 3}), set())
+
+
+class PlacementMaskTestCase(unittest.TestCase):
+    def test_word_search_domain(self):
+        '''每个摆放正好占单词长度个格子，而且都在格子里面'''
+        grid = word_search.generate_grid(6, 7)
+        for placement in word_search.generate_domain('MARY', grid):
+            self.assertEqual(len(placement), 4)
+            self.assertTrue(all(0 <= r < 6 and 0 <= c < 7 for r, c in placement))
+
+    def test_masks_match_locations(self):
+        '''mask版的domain和GridLocation版的是同样的摆放、同样的顺序'''
+        for module, name in ((word_search, 'SARAH'), (circuit_board, 'A32')):
+            grid = module.generate_grid(7, 6)
+            masks = module.generate_mask_domain(name, grid)
+            locations = module.generate_domain(name, grid)
+            self.assertEqual(len(masks), len(locations))
+            self.assertEqual([module.mask_to_locations(mask, grid) for mask in masks],
+                             [sorted(placement) for placement in locations])
+
+    def test_mask_csp(self):
+        '''mask版的电路板找到的芯片互不重叠'''
+        grid = circuit_board.generate_grid(9, 9)
+        chips = ['A94', 'B33', 'D61', 'E25']
+        solution = circuit_board.circuit_board_mask_csp(grid, chips).backtracking_search()
+        cells = [cell for mask in solution.values()
+                 for cell in circuit_board.mask_to_locations(mask, grid)]
+        self.assertEqual(len(cells), 36 + 9 + 6 + 10)
+        self.assertEqual(len(set(cells)), len(cells))
+
+
+class DancingLinksTestCase(unittest.TestCase):
+    def test_exact_cover(self):
+        '''Knuth论文里的例子只有一个解'''
+        problem = ExactCover('ABCDEFG')
+        for name, items in (('a', 'CEF'), ('b', 'ADG'), ('c', 'BCF'), ('d', 'AD'),
+                            ('e', 'BG'), ('f', 'DEG')):
+            problem.add_row(name, items)
+        self.assertEqual([sorted(s) for s in problem.solutions()], [['a', 'd', 'e']])
+
+    def test_placement_search(self):
+        '''GridLocation列表和mask两种domain都能解，放不下时返回None'''
+        grid = circuit_board.generate_grid(10, 10)
+        chips = ['A43', 'B33', 'C13', 'D12', 'E22', 'F22', 'G31', 'H42',
+                 'I43', 'J13', 'K21', 'L21', 'M23', 'N43', 'O23', 'P43']
+        solution = circuit_board.solve_circuit_board(grid, chips, backend='dlx')
+        cells = [cell for locations in solution.values() for cell in locations]
+        self.assertEqual(len(set(cells)), 100)
+        csp = circuit_board.circuit_board_csp(grid, chips[:3])
+        self.assertTrue(satisfies_all(csp, placement_search(csp.domains)))
+        self.assertIsNone(circuit_board.solve_circuit_board(
+            circuit_board.generate_grid(3, 3), ['A22', 'B22'], backend='dlx'))
+
+
+class BitboardQueensTestCase(unittest.TestCase):
+    def test_count(self):
+        '''和已知的n皇后解的个数一致'''
+        known = [1, 0, 0, 2, 10, 4, 40, 92, 352, 724]
+        self.assertEqual([BitboardQueens(n).count() for n in range(1, 11)], known)
+
+    def test_same_as_csp(self):
+        '''产生的解和通用搜索的一样，部分安排也被遵守'''
+        csp = BitboardQueensCSP(8)
+        fast = {tuple(sorted(s.items())) for s in csp.iter_solutions()}
+        slow = {tuple(sorted(s.items())) for s in queens_csp(8).iter_solutions()}
+        self.assertEqual(fast, slow)
+        self.assertEqual(csp.count_solutions(symmetry=QueensMirrorSymmetry(8)), 92)
+        self.assertEqual(len(list(csp.iter_solutions({1: 1, 2: 5}))),
+                         len(list(queens_csp(8).iter_solutions({1: 1, 2: 5}))))
+        self.assertIsNone(csp.backtracking_search({1: 1, 2: 2}))
+        solution = csp.backtracking_search(select_variable=minimum_remaining_values)
+        self.assertTrue(satisfies_all(csp, solution))
+
+    def test_count_solutions(self):
+        '''没有限制时count_solutions直接用BitboardQueens.count，有限制时还是逐个数'''
+        engine = BitboardQueens(9)
+        engine.count()
+        csp = BitboardQueensCSP(9)
+        self.assertEqual(csp.count_solutions(), 352)
+        self.assertEqual(csp.assignments_tried, engine.nodes)
+        self.assertEqual(csp.count_solutions(symmetry=QueensMirrorSymmetry(9)), 352)
+        self.assertEqual(csp.count_solutions(limit=7), 7)
+        self.assertEqual(csp.count_solutions({1: 1}), queens_csp(9).count_solutions({1: 1}))
+
+    def test_large_board(self):
+        '''30皇后很快就能找到解'''
+        csp = BitboardQueensCSP(30)
+        solution = csp.backtracking_search()
+        self.assertEqual(len(solution), 30)
+        self.assertTrue(satisfies_all(csp, solution))
+
+
+class CryptarithmeticTestCase(unittest.TestCase):
+    def test_solve(self):
+        '''解出来的数字代入以后等式成立，最高位不是0'''
+        for puzzle in ('SEND + MORE = MONEY', 'THIS + IS + VERY = EASY'):
+            solution = solve_cryptarithmetic(puzzle)
+            addends, result = parse_puzzle(puzzle)
+            number = lambda word: int(''.join(str(solution[letter]) for letter in word))
+            self.assertEqual(sum(number(word) for word in addends), number(result))
+            self.assertEqual(len(set(solution.values())), len(solution))
+            self.assertNotEqual(solution[result[0]], 0)
+
+    def test_unsolvable(self):
+        '''无解时返回None，格式不对时抛出ValueError'''
+        self.assertIsNone(solve_cryptarithmetic('A + B = AB'))
+        self.assertRaises(ValueError, parse_puzzle, 'SEND + MORE')
+        self.assertRaises(ValueError, cryptarithmetic_csp, 'ABC + D = EF')
+
+    def test_partial_column(self):
+        '''一列还没安排完时，取值范围已经不可能时就判为冲突'''
+        csp = cryptarithmetic_csp('A + B = CD')
+        self.assertFalse(csp.consistent('C', {'C': 2}))
+
+
+class MissionariesTestCase(unittest.TestCase):
+    def test_state_hash(self):
+        '''一样的状态相等，哈希也一样，bfs才能去重'''
+        self.assertEqual(missionaries.MCState(3, 2, True), missionaries.MCState(3, 2, True))
+        self.assertEqual(len({missionaries.MCState(3, 2, True),
+                              missionaries.MCState(3, 2, True),
+                              missionaries.MCState(3, 2, False)}), 2)
+
+    def test_compact_puzzle(self):
+        '''整数状态和对象状态找到的路径一样长，人多船大时也能解'''
+        start = missionaries.MCState(3, 3, True)
+        node = missionaries.bfs(start, missionaries.MCState.goal_test,
+                                missionaries.MCState.successors)
+        puzzle = missionaries.MissionariesPuzzle(3, 2)
+        handle = puzzle.solve()
+        self.assertEqual(len(handle.to_path()), len(missionaries.node_to_path(node)))
+        self.assertTrue(all(state.is_legal for state in puzzle.path(handle)))
+        handle = missionaries.MissionariesPuzzle(1000, 5).solve()
+        self.assertIsNotNone(handle)
+        self.assertLess(handle.explored_count, 10000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 from random import choice
 from string import ascii_uppercase
-from typing import Dict,List,NamedTuple,Optional
+from typing import Dict,List,NamedTuple,Optional,Set
 
 from csp import CSP,Constraint
+from grid_mask import PlacementMasks,MaskOverlapConstraint,cell_index,line_shape,mask_cells
 
 Grid = List[List[str]]
 
@@ -25,20 +26,50 @@ def generate_domain(word: str, grid: Grid) -> List[List[GridLocation]]:
     length: int = len(word)
     for row in range(height):
         for col in range(width):
-            columns = range(col,col+length+1)
-            rows = range(row,row+length+1)
+            columns = range(col,col+length)
+            rows = range(row,row+length)
             if col+length <= width:
                 # 从左到右
                 domain.append([GridLocation(row,c) for c in columns])
-                # 斜着向右下角
-                domain.append([GridLocation(r,col+(r-row)) for r in rows])
+                if row+length <= height:
+                    # 斜着向右下角
+                    domain.append([GridLocation(r,col+(r-row)) for r in rows])
             if row+length <= height:
                 # 从上到下
                 domain.append([GridLocation(r,col) for r in rows])
-                # 斜着向左下角
-                domain.append([GridLocation(r,col-(r-row)) for r in rows])
+                if col+1 >= length:
+                    # 斜着向左下角
+                    domain.append([GridLocation(r,col-(r-row)) for r in rows])
     return domain
 
+def generate_mask_domain(word: str, grid: Grid) -> PlacementMasks:
+    '''和generate_domain一样的摆放、一样的顺序，但每个摆放是一个整数mask'''
+    domain: PlacementMasks = PlacementMasks()
+    height: int = len(grid)
+    width: int = len(grid[0])
+    length: int = len(word)
+    # 四个方向上相邻两个字母的位相差多少
+    across: int = line_shape(length,1)
+    down_right: int = line_shape(length,width+1)
+    down: int = line_shape(length,width)
+    down_left: int = line_shape(length,width-1)
+    for row in range(height):
+        for col in range(width):
+            start: int = cell_index(row,col,width)
+            if col+length <= width:
+                domain.add(across,start)
+                if row+length <= height:
+                    domain.add(down_right,start)
+            if row+length <= height:
+                domain.add(down,start)
+                if col+1 >= length:
+                    domain.add(down_left,start)
+    return domain
+
+def mask_to_locations(mask: int, grid: Grid) -> List[GridLocation]:
+    '''把mask变回格子的列表，顺序和generate_domain里的一样'''
+    return [GridLocation(r,c) for r,c in mask_cells(mask,len(grid[0]))]
+
 class WordSearchConstraint(Constraint[str,List[GridLocation]]):
     def __init__(self,words: List[str]) -> None:
         super().__init__(words)
@@ -50,10 +81,24 @@ class WordSearchConstraint(Constraint[str,List[GridLocation]]):
             for locs in values]
         return len(set(all_locations)) == len(all_locations)
 
+    def check(self, variable: str, assignment: Dict[str, List[GridLocation]]) -> bool:
+        # 只需要看刚放下的这个和其他已经放好的有没有重叠
+        placed = set(assignment[variable])
+        for other in self.words:
+            if other != variable and other in assignment and \
+                    not placed.isdisjoint(assignment[other]):
+                return False
+        return True
 
-if __name__ == '__main__':
-    grid: Grid = generate_grid(9,9)
-    words: List[str] = ['MATTHEW','JOE','MARY','SARAH','SALLY']
+    def conflicts(self, variable: str, assignment: Dict[str, List[GridLocation]]) -> Set[str]:
+        # 和刚放下的这个有重叠的那些
+        placed = set(assignment[variable])
+        return {other for other in self.words if other != variable and other in assignment
+                and not placed.isdisjoint(assignment[other])}
+
+
+def word_search_csp(grid: Grid, words: List[str]) -> CSP[str,List[GridLocation]]:
+    '''单词是变量，单词在格子里所有能放的位置是domain'''
     locations: Dict[str, List[List[GridLocation]]] = {}
     # 这个字典是用于优化的
     cache: Dict[int, List[List[GridLocation]]] = {}
@@ -69,19 +114,55 @@ if __name__ == '__main__':
             cache[word_length] = locations[word] = domain
     csp:CSP[str,List[GridLocation]] = CSP(words, locations)
     csp.add_constraint(WordSearchConstraint(words))
-    solution:Optional[Dict[str, List[GridLocation]]] = csp.backtracking_search()
+    return csp
+
+
+def word_search_mask_csp(grid: Grid, words: List[str]) -> CSP[str,int]:
+    '''和word_search_csp一样，但摆放用mask表示，检查重叠只要按位与'''
+    locations: Dict[str, PlacementMasks] = {}
+    cache: Dict[int, PlacementMasks] = {}
+    for word in words:
+        if (word_length:=len(word)) not in cache:
+            cache[word_length] = generate_mask_domain(word,grid)
+        locations[word] = cache[word_length]
+    csp: CSP[str,int] = CSP(words, locations)
+    csp.add_constraint(MaskOverlapConstraint(words))
+    return csp
+
+
+def solve_word_search(grid: Grid, words: List[str],
+                      backend: str = 'csp') -> Optional[Dict[str,List[GridLocation]]]:
+    '''backend是'csp'时用回溯法，是'dlx'时当成精确覆盖问题用Dancing Links解'''
+    if backend == 'dlx':
+        from dancing_links import placement_search
+        domains: Dict[str,PlacementMasks] = word_search_mask_csp(grid,words).domains
+        solution: Optional[Dict[str,int]] = placement_search(domains)
+    elif backend == 'csp':
+        solution = word_search_mask_csp(grid,words).backtracking_search()
+    else:
+        raise ValueError(f'Unknown backend {backend!r}.')
+    if solution is None:
+        return None
+    return {word: mask_to_locations(mask,grid) for word,mask in solution.items()}
+
+
+if __name__ == '__main__':
+    grid: Grid = generate_grid(9,9)
+    words: List[str] = ['MATTHEW','JOE','MARY','SARAH','SALLY']
+    csp:CSP[str,int] = word_search_mask_csp(grid, words)
+    solution:Optional[Dict[str, int]] = csp.backtracking_search()
     if solution is None:
         print('No solution')
     else:
-        for word,grid_locations in solution.items():
+        for word,mask in solution.items():
+            grid_locations: List[GridLocation] = mask_to_locations(mask,grid)
             # 随机翻转一半的单词
             if choice([True,False]):
                 grid_locations.reverse()
             for index,letter in enumerate(word):
                 row,col = grid_locations[index].row,grid_locations[index].column
                 grid[row][col] = letter
-        display_grid(grid)  
-        print(cache.keys())  
+        display_grid(grid)
     
 
    
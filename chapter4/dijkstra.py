@@ -1,6 +1,5 @@
 from __future__ import annotations
 from typing import TypeVar, List, Optional, Tuple, Dict
-from dataclasses import dataclass
 
 from mst import WeightedPath, print_weighted_path
 from weighted_graph import WeightedGraph
@@ -9,20 +8,6 @@ from priority_queue import PriorityQueue
 
 V = TypeVar('V')
 
-@dataclass
-class DijkstraNode:
-    # 顶点的索引
-    vertex: int
-    # 起点到该顶点的距离
-    distance: float
-
-    def __lt__(self, other: DijkstraNode) -> bool:
-        return self.distance < other.distance
-
-    def __eq__(self, other: DijkstraNode) -> bool:
-        return self.distance == other.distance
-
-
 def dijkstra(wg: WeightedGraph[V], root:V) -> Tuple[List[Optional[float]],\
     Dict[int: WeightedEdge]]:
     # 找到起点的索引
@@ -33,32 +18,36 @@ def dijkstra(wg: WeightedGraph[V], root:V) -> Tuple[List[Optional[float]],\
     distances[first] = 0
     # 这个字典用于存放我们是如何到达各个顶点的
     path_dict:Dict[int, WeightedEdge] = {}
-    # 堆
-    pq: PriorityQueue[DijkstraNode] = PriorityQueue()
-    # 把起始顶点包裹成的节点压进堆
-    pq.push(DijkstraNode(first,0))
+    # 堆，里面放的是(起点到该顶点的距离, 顶点的索引)
+    # 元组在C里面比较，比自己写__lt__的节点类快
+    pq: PriorityQueue[Tuple[float, int]] = PriorityQueue()
+    # 把起始顶点压进堆
+    pq.push((0,first))
 
     while not pq.empty:
         # 弹出堆顶元素，获取它的索引
-        # 由于堆里面的元素都是节点类型，
-        # 而节点类型是按照起点到该顶点的距离比较大小的
+        # 元组先按距离比较大小，
         # 所以堆顶元素一定是目前距离起点最近的元素
-        u: int = pq.pop().vertex
+        dist, u = pq.pop()
+        # 同一个顶点可能被压进堆好几次，距离已经被更新得更短的是过时的，跳过
+        if dist > distances[u]:
+            continue
         # 取出起点到该顶点的距离,所有堆里的顶点到起点的最小距离都是已知的
         dist_u: float = distances[u]
         # 查看当前顶点的所有边
-        for we in wg.edges_for_index(u):
+        # 只取邻居的索引和权重，边对象只在更新路径时才创建
+        for v, weight in wg.neighbors_with_weights(u):
             # 取出原来保存的起点到这条边的另一端v的距离
-            dist_v:float = distances[we.v]
+            dist_v:float = distances[v]
             # 如果这个v是第一次见到或者发现从u走到v比原来的保存路径更短
-            if dist_v is None or dist_v>we.weight + dist_u:
+            if dist_v is None or dist_v>weight + dist_u:
                 # 更新从起点到v的最短距离
-                distances[we.v] = we.weight + dist_u
+                distances[v] = weight + dist_u
                 # 更新到v这个顶点的最短路径
-                path_dict[we.v] = we
+                path_dict[v] = WeightedEdge(u,v,weight)
 
                 # 把这个点压进堆
-                pq.push(DijkstraNode(we.v,we.weight+dist_u))
+                pq.push((weight+dist_u,v))
     return distances,path_dict
 
 def distance_array_to_vertex_dict(wg: WeightedGraph[V], 
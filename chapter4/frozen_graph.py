@@ -0,0 +1,149 @@
+from array import array
+from typing import Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from edge import Edge
+from graph import Graph
+from weighted_edge import WeightedEdge
+from weighted_graph import WeightedGraph
+
+V = TypeVar('V')
+
+
+class FrozenGraph(Generic[V]):
+    '''只读的CSR（压缩稀疏行）图，由Graph.freeze()生成。
+    顶点index的边是targets[offsets[index]:offsets[index + 1]]，带权图的权重在weights的同样位置，
+    每条有向边只占一个4字节的整数和一个8字节的浮点数，不再是一个dataclass对象。
+    对外的查询接口和Graph、WeightedGraph一样，所以dijkstra、mst和bfs可以直接用。
+    dijkstra和mst通过neighbors_with_weights直接读数组，只有edges_for_index才临时创建边对象。
+    三个数组也可以是graph_file里映射到文件的memoryview'''
+
+    def __init__(self, vertices: Sequence[V], offsets: array, targets: array,
+                 weights: Optional[array] = None) -> None:
+        self._vertices: Sequence[V] = vertices
+        # 顶点到索引的字典第一次按顶点查询时才建立，只按索引用的话不用读所有的顶点
+        self._indices: Optional[Dict[V, int]] = None
+        self.offsets: array = offsets
+        self.targets: array = targets
+        # 不带权的图没有weights
+        self.weights: Optional[array] = weights
+
+    @classmethod
+    def from_graph(cls, graph: Graph[V]) -> 'FrozenGraph[V]':
+        weighted: bool = isinstance(graph, WeightedGraph)
+        # 固定宽度的类型，写到文件里换一台机器也能读
+        offsets: array = array('q', [0])
+        targets: array = array('i')
+        weights: Optional[array] = array('d') if weighted else None
+        for index in range(graph.vertex_count):
+            edges: List[Edge] = graph.edges_for_index(index)
+            targets.extend([edge.v for edge in edges])
+            if weights is not None:
+                weights.extend([edge.weight for edge in edges])
+            offsets.append(len(targets))
+        return cls(list(graph._vertices), offsets, targets, weights)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self._vertices)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @property
+    def weighted(self) -> bool:
+        return self.weights is not None
+
+    def vertex_at(self, index: int) -> V:
+        return self._vertices[index]
+
+    def index_of(self, vertex: V) -> int:
+        if self._indices is None:
+            self._indices = {}
+            for index, vertex_at in enumerate(self._vertices):
+                # 和Graph一样，重复的顶点用第一次出现的位置
+                self._indices.setdefault(vertex_at, index)
+        try:
+            return self._indices[vertex]
+        except KeyError:
+            raise ValueError(f'{vertex!r} is not in graph') from None
+
+    def neighbor_indices(self, index: int) -> array:
+        '''顶点index的邻居的索引，是targets的一段'''
+        return self.targets[self.offsets[index]:self.offsets[index + 1]]
+
+    def neighbors_for_index(self, index: int) -> List[V]:
+        vertices: Sequence[V] = self._vertices
+        return [vertices[target] for target in self.neighbor_indices(index)]
+
+    def neighbors_for_vertex(self, vertex: V) -> List[V]:
+        return self.neighbors_for_index(self.index_of(vertex))
+
+    def edges_for_index(self, index: int) -> List[Union[Edge, WeightedEdge]]:
+        begin: int = self.offsets[index]
+        end: int = self.offsets[index + 1]
+        if self.weights is None:
+            return [Edge(index, target) for target in self.targets[begin:end]]
+        return [WeightedEdge(index, target, weight)
+                for target, weight in zip(self.targets[begin:end], self.weights[begin:end])]
+
+    def edges_for_vertex(self, vertex: V) -> List[Union[Edge, WeightedEdge]]:
+        return self.edges_for_index(self.index_of(vertex))
+
+    def _require_weights(self) -> array:
+        if self.weights is None:
+            raise ValueError('Graph is not weighted')
+        return self.weights
+
+    def neighbors_with_weights(self, index: int) -> Iterator[Tuple[int, float]]:
+        '''顶点index的邻居的索引和边的权重，直接从targets和weights的同一段里读，不创建边对象。
+        不带权的图抛出ValueError'''
+        weights: array = self._require_weights()
+        begin: int = self.offsets[index]
+        end: int = self.offsets[index + 1]
+        return zip(self.targets[begin:end], weights[begin:end])
+
+    def neighbors_for_index_with_weights(self, index: int) -> List[Tuple[V, float]]:
+        vertices: Sequence[V] = self._vertices
+        return [(vertices[target], weight) for target, weight in self.neighbors_with_weights(index)]
+
+    def __str__(self) -> str:
+        desc: str = ''
+        for i in range(self.vertex_count):
+            if self.weights is None:
+                desc += f'{self.vertex_at(i)} -> {self.neighbors_for_index(i)}\n'
+            else:
+                desc += f'{self.vertex_at(i)} -> {self.neighbors_for_index_with_weights(i)}\n'
+        return desc
+
+
+if __name__ == '__main__':
+    import random
+    import tracemalloc
+    from time import perf_counter
+    from dijkstra import dijkstra
+    from mst import mst, total_weight
+
+    random.seed(2020)
+    size: int = 100000
+    tracemalloc.start()
+    graph: WeightedGraph[int] = WeightedGraph(list(range(size)))
+    for u in range(size):
+        for v in random.sample(range(size), 3):
+            graph.add_edge_by_indices(u, v, random.randint(1, 100))
+    graph_bytes: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    before: int = tracemalloc.get_traced_memory()[0]
+    frozen: FrozenGraph[int] = graph.freeze()
+    frozen_bytes: int = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f'{graph.edge_count} directed edges: WeightedGraph {graph_bytes / 2**20:.1f} MiB, '
+          f'FrozenGraph {frozen_bytes / 2**20:.1f} MiB')
+
+    for name, g in (('WeightedGraph', graph), ('FrozenGraph', frozen)):
+        begin: float = perf_counter()
+        distances, _ = dijkstra(g, 0)
+        middle: float = perf_counter()
+        tree = mst(g)
+        print(f'{name}: dijkstra {middle - begin:.2f}s, mst {perf_counter() - middle:.2f}s, '
+              f'mst weight {total_weight(tree)}')
@@ -1,4 +1,4 @@
-from typing import Generic, List, Optional, TypeVar
+from typing import Dict, Generic, List, Optional, TypeVar
 
 from edge import Edge
 
@@ -10,8 +10,14 @@ class Graph(Generic[V]):
     def __init__(self, vertices: Optional[List[V]] = None) -> None:
         # 为了保证不会出现一些奇怪的行为，默认值我尽量不适用空列表
         # 这里vertices的默认值使用了None，在方法体内做了判断
-        self._vertices: List[V] = vertices or []
+        # 复制一份，免得调用者改了原来的列表以后和下面的字典对不上
+        self._vertices: List[V] = list(vertices) if vertices else []
         self._edges: List[List[Edge]] = [[] for _ in self._vertices]
+        # 顶点到索引的字典，按顶点查索引不用再在列表里一个一个找
+        self._indices: Dict[V, int] = {}
+        for index, vertex in enumerate(self._vertices):
+            # 有重复的顶点时和list.index一样，用第一次出现的位置
+            self._indices.setdefault(vertex, index)
 
     @property
     def vertex_count(self) -> int:
@@ -25,6 +31,7 @@ class Graph(Generic[V]):
     def add_vertex(self, vertex: V) -> int:
         self._vertices.append(vertex)
         self._edges.append([])
+        self._indices.setdefault(vertex, self.vertex_count - 1)
         # 返回新添加的顶点的索引
         return self.vertex_count - 1
     
@@ -40,8 +47,8 @@ class Graph(Generic[V]):
     
     # 这还会上上个方法的变体，对用户比较友好
     def add_edge_by_vertices(self,first: V, second: V) -> None:
-        u: int = self._vertices.index(first)
-        v: int = self._vertices.index(second)
+        u: int = self.index_of(first)
+        v: int = self.index_of(second)
         self.add_edge_by_indices(u,v)
 
     # 查找指定索引处的顶点
@@ -50,7 +57,11 @@ class Graph(Generic[V]):
 
     # 查找指定顶点的索引
     def index_of(self, vertex: V) -> int:
-        return self._vertices.index(vertex)
+        try:
+            return self._indices[vertex]
+        except KeyError:
+            # 和原来的list.index一样抛出ValueError
+            raise ValueError(f'{vertex!r} is not in graph') from None
     
     # 根据给定的索引，查找这个顶点的邻居（也就是它指向的所有顶点）
     def neighbors_for_index(self, index: int) -> List[V]:
@@ -71,6 +82,12 @@ class Graph(Generic[V]):
     def edges_for_vertex(self, vertex: V) -> List[Edge]:
         return self.edges_for_index(self.index_of(vertex))
 
+    def freeze(self):
+        '''转换成只读的CSR图FrozenGraph，之后再改这个图不会影响它'''
+        # 在这里导入，避免graph和frozen_graph互相导入
+        from frozen_graph import FrozenGraph
+        return FrozenGraph.from_graph(self)
+
     def __str__(self) -> str:
         desc: str = ''
         for i in range(self.vertex_count):
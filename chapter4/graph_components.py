@@ -0,0 +1,109 @@
+from array import array
+from typing import Generic, List, TypeVar
+
+from graph import Graph
+from edge import Edge
+
+V = TypeVar('V')
+
+
+class UnionFind:
+    '''并查集，带路径减半和按大小合并，find几乎是常数时间'''
+
+    def __init__(self, size: int = 0) -> None:
+        self._parent: array = array('l', range(size))
+        self._size: array = array('l', [1]) * size
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def add(self) -> int:
+        '''新加一个只有自己的集合，返回它的编号'''
+        element: int = len(self._parent)
+        self._parent.append(element)
+        self._size.append(1)
+        return element
+
+    def find(self, element: int) -> int:
+        parent: array = self._parent
+        while parent[element] != element:
+            # 路径减半：顺手把自己挂到爷爷节点上
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, a: int, b: int) -> bool:
+        '''合并两个集合，原来就在一起返回False'''
+        root_a: int = self.find(a)
+        root_b: int = self.find(b)
+        if root_a == root_b:
+            return False
+        # 小的挂到大的下面
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        return True
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+    def size_of(self, element: int) -> int:
+        '''element所在集合的大小'''
+        return self._size[self.find(element)]
+
+
+class GraphComponents(Generic[V]):
+    '''无向图的连通分量索引。
+    通过它来加顶点和边，图和索引会一起更新，连通性查询几乎是常数时间'''
+
+    def __init__(self, graph: Graph[V]) -> None:
+        self.graph: Graph[V] = graph
+        self._sets: UnionFind = UnionFind(graph.vertex_count)
+        # 现在的component_count是顶点数减去成功的合并次数
+        self.component_count: int = graph.vertex_count
+        for index in range(graph.vertex_count):
+            for edge in graph.edges_for_index(index):
+                self._union(edge.u, edge.v)
+
+    def _union(self, u: int, v: int) -> None:
+        if self._sets.union(u, v):
+            self.component_count -= 1
+
+    def add_vertex(self, vertex: V) -> int:
+        index: int = self.graph.add_vertex(vertex)
+        self._sets.add()
+        self.component_count += 1
+        return index
+
+    def add_edge(self, edge: Edge) -> None:
+        self.graph.add_edge(edge)
+        self._union(edge.u, edge.v)
+
+    def add_edge_by_indices(self, u: int, v: int, *args) -> None:
+        '''args是带权图需要的权重'''
+        self.graph.add_edge_by_indices(u, v, *args)
+        self._union(u, v)
+
+    def add_edge_by_vertices(self, first: V, second: V, *args) -> None:
+        self.graph.add_edge_by_vertices(first, second, *args)
+        self._union(self.graph.index_of(first), self.graph.index_of(second))
+
+    def connected_indices(self, u: int, v: int) -> bool:
+        return self._sets.connected(u, v)
+
+    def connected(self, first: V, second: V) -> bool:
+        '''两个顶点之间有没有路径'''
+        return self.connected_indices(self.graph.index_of(first),
+                                      self.graph.index_of(second))
+
+    def component_of(self, vertex: V) -> int:
+        '''顶点所在连通分量的编号（并查集的根）'''
+        return self._sets.find(self.graph.index_of(vertex))
+
+    def components(self) -> List[List[V]]:
+        '''把所有连通分量列出来'''
+        groups: dict = {}
+        for index in range(self.graph.vertex_count):
+            groups.setdefault(self._sets.find(index), []).append(self.graph.vertex_at(index))
+        return list(groups.values())
@@ -0,0 +1,270 @@
+'''图的二进制文件格式，写一次以后用mmap打开，不用每次启动都重新加边。
+文件里依次是（都是小端，每一段从8字节对齐的位置开始）：
+    文件头     MAGIC、版本、是否带权、顶点数V、有向边数E、顶点名字的总字节数
+    offsets    V+1个int64，和FrozenGraph.offsets一样
+    targets    E个int32
+    weights    E个float64，不带权的图没有这一段
+    名字偏移   V+1个int64，第i个顶点的名字是名字区的[第i个, 第i+1个)字节
+    名字区     所有顶点名字的UTF-8编码连在一起
+打开文件时这些段都是直接指向映射内存的memoryview，不复制，顶点名字用到时才解码。
+顶点必须是字符串。
+'''
+import csv
+import mmap
+import struct
+import sys
+from array import array
+from collections import Counter
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+from frozen_graph import FrozenGraph
+from graph import Graph
+
+MAGIC: bytes = b'CSRGRAPH'
+VERSION: int = 1
+# MAGIC、版本、是否带权、V、E、名字区字节数
+HEADER = struct.Struct('<8sIIQQQ')
+
+
+def _aligned(position: int) -> int:
+    '''下一个8字节对齐的位置'''
+    return (position + 7) & ~7
+
+
+class MappedVertices(Sequence[str]):
+    '''文件里的顶点表，按索引取的时候才把名字解码成字符串'''
+
+    def __init__(self, offsets: Sequence[int], names: memoryview) -> None:
+        self._offsets: Sequence[int] = offsets
+        self._names: memoryview = names
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('vertex index out of range')
+        return str(self._names[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        offsets: Sequence[int] = self._offsets
+        names: memoryview = self._names
+        for index in range(len(self)):
+            yield str(names[offsets[index]:offsets[index + 1]], 'utf-8')
+
+
+def save_graph(graph: Union[Graph[str], FrozenGraph[str]], path: str) -> None:
+    '''把图写成二进制文件，Graph和WeightedGraph会先冻结'''
+    frozen: FrozenGraph[str] = graph if isinstance(graph, FrozenGraph) else graph.freeze()
+    encoded: List[bytes] = []
+    for vertex in frozen._vertices:
+        if not isinstance(vertex, str):
+            raise TypeError(f'Only str vertices can be saved, got {vertex!r}')
+        encoded.append(vertex.encode('utf-8'))
+    name_offsets: array = array('q', [0])
+    total: int = 0
+    for name in encoded:
+        total += len(name)
+        name_offsets.append(total)
+    sections: List[object] = [array('q', frozen.offsets), array('i', frozen.targets)]
+    if frozen.weights is not None:
+        sections.append(array('d', frozen.weights))
+    sections.append(name_offsets)
+    if sys.byteorder != 'little':
+        for section in sections:
+            section.byteswap()
+    sections.append(b''.join(encoded))
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, frozen.weights is not None,
+                               frozen.vertex_count, frozen.edge_count, total))
+        for section in sections:
+            # 每一段前面补0，对齐到8字节
+            file.write(b'\0' * (_aligned(file.tell()) - file.tell()))
+            file.write(section)
+
+
+def _section(buffer: memoryview, position: int, typecode: str, count: int):
+    '''从position开始的count个typecode类型的数，小端机器上直接是memoryview，
+    大端机器上只能复制出来再转换字节序'''
+    size: int = array(typecode).itemsize * count
+    raw: memoryview = buffer[position:position + size]
+    if sys.byteorder == 'little':
+        return raw.cast(typecode)
+    copied: array = array(typecode, raw.tobytes())
+    copied.byteswap()
+    return copied
+
+
+def open_graph(path: str) -> FrozenGraph[str]:
+    '''用mmap打开save_graph写的文件。返回的图引用着映射的内存，图不再使用时映射才会释放'''
+    with open(path, 'rb') as file:
+        mapped: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    buffer: memoryview = memoryview(mapped)
+    if len(buffer) < HEADER.size:
+        raise ValueError(f'{path} is not a graph file')
+    magic, version, weighted, vertex_count, edge_count, names_size = \
+        HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a graph file')
+    if version != VERSION:
+        raise ValueError(f'Unsupported graph file version {version}')
+    layout: List[Tuple[str, str, int]] = [('offsets', 'q', vertex_count + 1),
+                                          ('targets', 'i', edge_count),
+                                          ('weights', 'd', edge_count),
+                                          ('names', 'q', vertex_count + 1)]
+    if not weighted:
+        del layout[2]
+    # 先按文件头里的个数算出每一段的位置，和文件大小对不上就不去读
+    positions: List[int] = []
+    position: int = HEADER.size
+    for _, typecode, count in layout:
+        position = _aligned(position)
+        positions.append(position)
+        position += array(typecode).itemsize * count
+    position = _aligned(position)
+    if position + names_size != len(buffer):
+        raise ValueError(f'{path} has {len(buffer)} bytes, '
+                         f'but its header describes {position + names_size}')
+    sections: Dict[str, object] = {name: _section(buffer, start, typecode, count)
+                                   for (name, typecode, count), start in zip(layout, positions)}
+    offsets, names = sections['offsets'], sections['names']
+    if offsets[0] != 0 or offsets[-1] != edge_count or \
+            names[0] != 0 or names[-1] != names_size:
+        raise ValueError(f'{path} is corrupt')
+    vertices: MappedVertices = MappedVertices(names, buffer[position:position + names_size])
+    return FrozenGraph(vertices, sections['offsets'], sections['targets'],
+                       sections.get('weights'))
+
+
+def load_edge_csv(path: str, header: bool = False,
+                  chunk_size: int = 1 << 22) -> FrozenGraph[str]:
+    '''从"顶点,顶点[,权重]"每行一条边的CSV直接生成无向的FrozenGraph，
+    不创建Edge对象，也不经过Graph。有第三列就是带权图。
+    顶点按第一次出现的顺序编号，每个顶点的边的顺序和依次调用add_edge_by_vertices一样。
+    每次读大约chunk_size个字符，按列整批转换成数组，避免逐行的Python循环'''
+    indices: Dict[str, int] = {}
+    # 每条无向边拆成两条有向边：第2k条是u->v，第2k+1条是v->u，和Graph.add_edge的顺序一样，
+    # 所以sources就是按行的顺序依次排好的两个端点
+    sources: array = array('i')
+    weights: Optional[array] = None
+    columns: int = 0
+    with open(path, newline='', encoding='utf-8') as file:
+        if header:
+            file.readline()
+        while True:
+            lines: List[str] = file.readlines(chunk_size)
+            if not lines:
+                break
+            text: str = ''.join(lines).replace('\r\n', '\n').strip('\n')
+            if not text:
+                continue
+            if '"' in text or '\n\n' in text:
+                # 有引号的字段里可能有逗号，还有空行，只好交给csv模块一行一行地解析
+                rows: List[List[str]] = [row for row in csv.reader(text.split('\n')) if row]
+                columns = columns or len(rows[0])
+                if any(len(row) != columns for row in rows):
+                    raise ValueError(f'Rows in {path} have different numbers of columns')
+                flat: List[str] = [field for row in rows for field in row]
+            else:
+                # 整块一起按逗号切开，不用为每一行创建列表
+                columns = columns or text.split('\n', 1)[0].count(',') + 1
+                flat = text.replace('\n', ',').split(',')
+                if len(flat) != (text.count('\n') + 1) * columns:
+                    raise ValueError(f'Rows in {path} have different numbers of columns')
+            if columns not in (2, 3):
+                raise ValueError(f'Expected 2 or 3 columns in {path}, got {columns}')
+            if columns == 3 and weights is None:
+                weights = array('d')
+            # 每隔columns个字段是同一列，把两个端点按行的顺序交错排好
+            ends: List[str] = flat[:2 * (len(flat) // columns)]
+            ends[0::2] = flat[0::columns]
+            ends[1::2] = flat[1::columns]
+            # setdefault的第二个参数在插入之前求值，新顶点正好得到下一个编号，
+            # 顶点按第一次出现的顺序编号
+            sources.extend([indices.setdefault(name, len(indices)) for name in ends])
+            if weights is not None:
+                weights.extend(map(float, flat[2::columns]))
+    edge_count: int = len(sources)
+    destinations: array = array('i', sources)
+    destinations[0::2] = sources[1::2]
+    destinations[1::2] = sources[0::2]
+    degrees: Counter = Counter(sources)
+    offsets: array = array('q', [0])
+    offsets.extend(accumulate(map(degrees.__getitem__, range(len(indices)))))
+    # 计数排序：每个起点的下一条边放在positions[起点]，从它在offsets里那一段的开头往后填，
+    # 同一个起点的边保持原来的顺序，不用给每条边排序
+    positions: array = offsets[:-1]
+    targets: array = array('i', [0]) * edge_count
+    edge_weights: Optional[array] = None
+    if weights is None:
+        for edge, source in enumerate(sources):
+            position: int = positions[source]
+            targets[position] = destinations[edge]
+            positions[source] = position + 1
+    else:
+        edge_weights = array('d', [0.0]) * edge_count
+        for edge, source in enumerate(sources):
+            position = positions[source]
+            targets[position] = destinations[edge]
+            # 第2k条和第2k+1条有向边都是第k行的边
+            edge_weights[position] = weights[edge >> 1]
+            positions[source] = position + 1
+    return FrozenGraph(list(indices), offsets, targets, edge_weights)
+
+
+if __name__ == '__main__':
+    import os
+    import random
+    import shutil
+    import tempfile
+    from time import perf_counter
+    from weighted_graph import WeightedGraph
+
+    random.seed(2020)
+    size: int = 200000
+    directory: str = tempfile.mkdtemp()
+    csv_path: str = os.path.join(directory, 'edges.csv')
+    graph_path: str = os.path.join(directory, 'graph.bin')
+    with open(csv_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        for u in range(size):
+            for v in random.sample(range(size), 3):
+                writer.writerow((f'v{u}', f'v{v}', random.randint(1, 100)))
+
+    begin: float = perf_counter()
+    graph: WeightedGraph[str] = WeightedGraph()
+    indices: Dict[str, int] = {}
+    with open(csv_path, newline='') as file:
+        for first, second, weight in csv.reader(file):
+            for name in (first, second):
+                if name not in indices:
+                    indices[name] = graph.add_vertex(name)
+            graph.add_edge_by_indices(indices[first], indices[second], float(weight))
+    print(f'add_edge_by_indices from CSV: {perf_counter() - begin:.2f}s')
+
+    begin = perf_counter()
+    frozen: FrozenGraph[str] = load_edge_csv(csv_path)
+    print(f'load_edge_csv: {perf_counter() - begin:.2f}s, '
+          f'{frozen.vertex_count} vertices, {frozen.edge_count} directed edges')
+
+    begin = perf_counter()
+    save_graph(frozen, graph_path)
+    print(f'save_graph: {perf_counter() - begin:.2f}s, '
+          f'{os.path.getsize(graph_path) / 2**20:.1f} MiB')
+
+    begin = perf_counter()
+    opened: FrozenGraph[str] = open_graph(graph_path)
+    print(f'open_graph: {(perf_counter() - begin) * 1000:.2f}ms')
+    print(f'v0 -> {opened.neighbors_for_index_with_weights(0)}')
+    shutil.rmtree(directory)
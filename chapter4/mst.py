@@ -1,4 +1,4 @@
-from typing import TypeVar, List, Optional
+from typing import TypeVar, List, Optional, Tuple
 
 from weighted_graph import WeightedGraph
 from weighted_edge import WeightedEdge
@@ -19,7 +19,9 @@ def mst(wg: WeightedGraph[V], start: int=0) -> Optional[WeightedPath]:
     # 保存最终的路径
     result: WeightedPath = []
     # 用于保存还没有规划的边
-    pq: PriorityQueue[WeightedEdge] = PriorityQueue()
+    # 堆里放的是(权重, 起点, 终点)，元组比较比WeightedEdge.__lt__快，
+    # 边对象只在选中这条边时才创建
+    pq: PriorityQueue[Tuple[float,int,int]] = PriorityQueue()
     # 用于记录哪些顶点已经规划过了
     visited: [bool] = [False]*wg.vertex_count
 
@@ -29,23 +31,23 @@ def mst(wg: WeightedGraph[V], start: int=0) -> Optional[WeightedPath]:
         # 对于当前索引的顶点的所有边
         # 如果边的另一个顶点还没有规划
         # 就把这条边放进pq里
-        for edge in wg.edges_for_index(index):
-            if not visited[edge.v]:
-                pq.push(edge)
+        for v, weight in wg.neighbors_with_weights(index):
+            if not visited[v]:
+                pq.push((weight,index,v))
     # 先从第一个顶点开始规划
     # 执行的操作包括把它标记为已规划
     # 以及把它的边都添加到pq里面
     visit(start)
 
     while not pq.empty:
-        edge = pq.pop()
+        weight, u, v = pq.pop()
         # 避免重复添加
-        if visited[edge.v]:
+        if visited[v]:
             continue
         # 添加新的边
-        result.append(edge)
+        result.append(WeightedEdge(u,v,weight))
         # 规划这条边的另一个顶点
-        visit(edge.v)
+        visit(v)
     return result
 
 def print_weighted_path(wg: WeightedGraph, wp: WeightedPath) -> None:
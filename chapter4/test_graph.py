@@ -0,0 +1,190 @@
+import os
+import tempfile
+import unittest
+
+from graph import Graph
+from weighted_graph import WeightedGraph
+from graph_components import GraphComponents
+from dijkstra import dijkstra
+from mst import mst, total_weight
+from graph_file import HEADER, load_edge_csv, open_graph, save_graph
+
+
+def city_graph() -> WeightedGraph[str]:
+    graph: WeightedGraph[str] = WeightedGraph(['Seattle', 'San Francisco',
+                                               'Los Angeles', 'Riverside',
+                                               'Phoenix', 'Chicago'])
+    graph.add_edge_by_vertices('Seattle', 'Chicago', 1737)
+    graph.add_edge_by_vertices('Seattle', 'San Francisco', 678)
+    graph.add_edge_by_vertices('San Francisco', 'Riverside', 386)
+    graph.add_edge_by_vertices('Los Angeles', 'Riverside', 50)
+    graph.add_edge_by_vertices('Los Angeles', 'Phoenix', 357)
+    graph.add_edge_by_vertices('Riverside', 'Chicago', 1704)
+    return graph
+
+
+class GraphComponentsTestCase(unittest.TestCase):
+    def test_incremental_components(self):
+        '''加边以后连通分量会合并'''
+        graph: Graph[str] = Graph(['A', 'B', 'C', 'D'])
+        graph.add_edge_by_vertices('A', 'B')
+        components = GraphComponents(graph)
+        self.assertTrue(components.connected('A', 'B'))
+        self.assertFalse(components.connected('A', 'C'))
+        self.assertEqual(components.component_count, 3)
+        components.add_edge_by_vertices('C', 'D')
+        components.add_vertex('E')
+        self.assertEqual(components.component_count, 3)
+        components.add_edge_by_vertices('B', 'C')
+        self.assertTrue(components.connected('A', 'D'))
+        self.assertFalse(components.connected('A', 'E'))
+        self.assertEqual(sorted(map(sorted, components.components())),
+                         [['A', 'B', 'C', 'D'], ['E']])
+        # 图本身也加上了边
+        self.assertIn('C', graph.neighbors_for_vertex('B'))
+
+    def test_weighted_graph(self):
+        '''带权图也能用'''
+        components = GraphComponents(city_graph())
+        self.assertEqual(components.component_count, 1)
+        components.add_vertex('Boston')
+        self.assertFalse(components.connected('Boston', 'Seattle'))
+        components.add_edge_by_vertices('Boston', 'Chicago', 983)
+        self.assertTrue(components.connected('Boston', 'Phoenix'))
+
+
+class VertexIndexTestCase(unittest.TestCase):
+    def test_index_of(self):
+        '''按顶点查索引和list.index的结果一样'''
+        graph: Graph[str] = Graph(['A', 'B', 'A'])
+        self.assertEqual(graph.index_of('A'), 0)
+        self.assertEqual(graph.add_vertex('C'), 3)
+        self.assertEqual(graph.index_of('C'), 3)
+        self.assertRaises(ValueError, graph.index_of, 'D')
+        graph.add_edge_by_vertices('C', 'B')
+        self.assertEqual(graph.neighbors_for_vertex('B'), ['C'])
+
+    def test_weighted_graph(self):
+        '''带权图也维护了顶点到索引的字典'''
+        graph = city_graph()
+        index: int = graph.add_vertex('Boston')
+        self.assertEqual(graph.index_of('Boston'), index)
+        graph.add_edge_by_vertices('Boston', 'Chicago', 983)
+        self.assertIn(('Chicago', 983), graph.neighbors_for_index_with_weights(index))
+
+
+class FrozenGraphTestCase(unittest.TestCase):
+    def test_same_queries(self):
+        '''冻结以后查询结果不变，之后再改原来的图不影响它'''
+        graph = city_graph()
+        frozen = graph.freeze()
+        self.assertEqual(frozen.vertex_count, graph.vertex_count)
+        self.assertEqual(frozen.edge_count, graph.edge_count)
+        for index in range(graph.vertex_count):
+            self.assertEqual(frozen.edges_for_index(index), graph.edges_for_index(index))
+            self.assertEqual(frozen.neighbors_for_index_with_weights(index),
+                             graph.neighbors_for_index_with_weights(index))
+            self.assertEqual(list(frozen.neighbors_with_weights(index)),
+                             graph.neighbors_with_weights(index))
+        graph.add_vertex('Boston')
+        graph.add_edge_by_vertices('Boston', 'Chicago', 983)
+        self.assertRaises(ValueError, frozen.index_of, 'Boston')
+        self.assertNotIn('Boston', frozen.neighbors_for_vertex('Chicago'))
+
+    def test_algorithms(self):
+        '''dijkstra和mst直接在冻结的图上运行，结果一样'''
+        graph = city_graph()
+        frozen = graph.freeze()
+        self.assertEqual(dijkstra(frozen, 'Seattle')[0], dijkstra(graph, 'Seattle')[0])
+        self.assertEqual(total_weight(mst(frozen)), total_weight(mst(graph)))
+        _, path_dict = dijkstra(frozen, 'Seattle')
+        self.assertEqual(path_dict, dijkstra(graph, 'Seattle')[1])
+
+    def test_unweighted(self):
+        '''不带权的图冻结以后没有权重'''
+        graph: Graph[str] = Graph(['A', 'B', 'C'])
+        graph.add_edge_by_vertices('A', 'B')
+        frozen = graph.freeze()
+        self.assertFalse(frozen.weighted)
+        self.assertEqual(frozen.neighbors_for_vertex('B'), ['A'])
+        self.assertEqual(list(frozen.neighbor_indices(0)), [1])
+        self.assertRaises(ValueError, frozen.neighbors_with_weights, 0)
+        self.assertRaises(ValueError, frozen.neighbors_for_index_with_weights, 0)
+
+
+class GraphFileTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'graph.bin')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write_csv(self, text: str) -> str:
+        path: str = os.path.join(self.directory.name, 'edges.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            file.write(text)
+        return path
+
+    def test_save_and_open(self):
+        '''写到文件里再用mmap打开，查询结果和原来的图一样'''
+        graph = city_graph()
+        save_graph(graph, self.path)
+        opened = open_graph(self.path)
+        self.assertEqual(list(opened._vertices), graph._vertices)
+        self.assertEqual(opened.index_of('Phoenix'), graph.index_of('Phoenix'))
+        for index in range(graph.vertex_count):
+            self.assertEqual(opened.neighbors_for_index_with_weights(index),
+                             graph.neighbors_for_index_with_weights(index))
+        self.assertEqual(dijkstra(opened, 'Seattle')[0], dijkstra(graph, 'Seattle')[0])
+        unweighted: Graph[str] = Graph(['A', 'B', 'C'])
+        unweighted.add_edge_by_vertices('A', 'C')
+        save_graph(unweighted, self.path)
+        self.assertEqual(open_graph(self.path).neighbors_for_vertex('C'), ['A'])
+
+    def test_bad_file(self):
+        '''不是图文件时抛出ValueError'''
+        with open(self.path, 'wb') as file:
+            file.write(b'not a graph file at all, just some bytes here')
+        self.assertRaises(ValueError, open_graph, self.path)
+
+    def test_truncated_file(self):
+        '''文件大小和文件头对不上、offsets不对时抛出ValueError，不是在读数组时出错'''
+        save_graph(city_graph(), self.path)
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        offsets_start = (HEADER.size + 7) & ~7
+        corrupt = bytearray(data)
+        corrupt[offsets_start:offsets_start + 8] = (1).to_bytes(8, 'little')
+        for broken in (data[:-10], data[:HEADER.size + 3], data + bytes(8), bytes(corrupt)):
+            with open(self.path, 'wb') as file:
+                file.write(broken)
+            self.assertRaises(ValueError, open_graph, self.path)
+
+    def test_load_edge_csv(self):
+        '''从CSV加载的图和逐条add_edge_by_vertices的一样'''
+        rows = [('Seattle', 'Chicago', 1737), ('Seattle', 'San Francisco', 678),
+                ('San Francisco', 'Riverside', 386), ('Los Angeles', 'Riverside', 50)]
+        path: str = self.write_csv('first,second,weight\r\n' +
+                                   ''.join(f'{u},{v},{w}\r\n' for u, v, w in rows))
+        loaded = load_edge_csv(path, header=True)
+        graph: WeightedGraph[str] = WeightedGraph()
+        for u, v, w in rows:
+            for vertex in (u, v):
+                if vertex not in graph._vertices:
+                    graph.add_vertex(vertex)
+            graph.add_edge_by_vertices(u, v, w)
+        self.assertEqual(list(loaded._vertices), graph._vertices)
+        for index in range(graph.vertex_count):
+            self.assertEqual(loaded.edges_for_index(index), graph.edges_for_index(index))
+
+    def test_quoted_csv(self):
+        '''带引号的字段交给csv模块解析，列数不一致时抛出ValueError'''
+        loaded = load_edge_csv(self.write_csv('"Washington, D.C.",Boston\n\nBoston,Miami\n'))
+        self.assertFalse(loaded.weighted)
+        self.assertEqual(loaded.neighbors_for_vertex('Boston'), ['Washington, D.C.', 'Miami'])
+        self.assertRaises(ValueError, load_edge_csv, self.write_csv('A,B\nC,D,1\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,8 +10,7 @@ class WeightedGraph(Generic[V],Graph[V]):
         # 尽量不使用空列表做默认值
         # 所以这里使用None做默认值
         # 在方法体内加了判断
-        self._vertices: List[V] = vertices or []
-        self._edges: List[List[WeightedEdge]] = [[] for _ in self._vertices]
+        super().__init__(vertices)
 
     def add_edge_by_indices(self, u: int, v: int, weight: int) -> None:
         edge: WeightedEdge = WeightedEdge(u,v,weight)
@@ -19,10 +18,14 @@ class WeightedGraph(Generic[V],Graph[V]):
         self.add_edge(edge)
     
     def add_edge_by_vertices(self, first: V, second: V, weight: int) -> None:
-        u: int = self._vertices.index(first)
-        v: int = self._vertices.index(second)
+        u: int = self.index_of(first)
+        v: int = self.index_of(second)
         self.add_edge_by_indices(u,v,weight)
 
+    def neighbors_with_weights(self, index: int) -> List[Tuple[int,float]]:
+        '''顶点index的邻居的索引和边的权重，dijkstra和mst只需要这两个数'''
+        return [(edge.v, edge.weight) for edge in self._edges[index]]
+
     def neighbors_for_index_with_weights(self, index: int) -> List[Tuple[V,float]]:
         distance_tuples: List[Tuple[V,float]] = []
         for edge in self.edges_for_index(index):